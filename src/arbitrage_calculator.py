@@ -1,5 +1,8 @@
 import pandas as pd
 
+from perf import timed
+
+@timed()
 def calculate_arbitrage_benefits(mibel_data, analysis_type, battery_capacity_mwh, efficiency, 
                                 battery_cost_per_mwh, degradation_per_cycle):
     """Calculate arbitrage benefits for battery storage"""
@@ -28,6 +31,7 @@ def calculate_arbitrage_benefits(mibel_data, analysis_type, battery_capacity_mwh
     
     return daily_stats, roi_metrics, cycle_stats
 
+@timed()
 def calculate_1_cycle_arbitrage(df, efficiency):
     """Calculate 1-cycle arbitrage benefits"""
     daily_arbitrage = []
@@ -74,6 +78,7 @@ def calculate_1_cycle_arbitrage(df, efficiency):
     
     return daily_arbitrage
 
+@timed()
 def calculate_2_cycle_arbitrage(df, efficiency):
     """Calculate 2-cycle arbitrage benefits"""
     daily_arbitrage = []
@@ -148,6 +153,7 @@ def fallback_to_1_cycle(day_data, efficiency):
     
     return total_benefit, cycles_used, arbitrage_possible
 
+@timed()
 def apply_degradation_model(daily_stats, battery_capacity_mwh, degradation_per_cycle, analysis_type):
     """Apply battery degradation model to daily statistics"""
     daily_stats = daily_stats.reset_index(drop=True)
@@ -163,6 +169,7 @@ def apply_degradation_model(daily_stats, battery_capacity_mwh, degradation_per_c
     
     return daily_stats
 
+@timed()
 def calculate_roi_metrics(daily_stats, battery_capacity_mwh, battery_cost_per_mwh, degradation_per_cycle, analysis_type):
     """Calculate ROI and investment metrics"""
     total_benefit = daily_stats['degraded_benefit'].sum()
@@ -199,6 +206,7 @@ def calculate_roi_metrics(daily_stats, battery_capacity_mwh, battery_cost_per_mw
         'total_days': len(daily_stats)
     }
 
+@timed()
 def calculate_cycle_statistics(daily_stats, analysis_type):
     """Calculate cycle usage statistics"""
     if analysis_type == "2 Cycles":
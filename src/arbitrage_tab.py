@@ -1,29 +1,45 @@
 import streamlit as st
-from data_loader import load_mibel_data
+from data_loader import MULTI_ZONE, load_mibel_data, load_mibel_zones, load_reserve_prices, zone_frame
 from ui_components import (render_battery_configuration, render_analysis_type_selection, 
                           render_summary_statistics_table, render_best_worst_days)
 from arbitrage_calculator import calculate_arbitrage_benefits
-from plotting_utils import create_daily_benefits_chart, create_degradation_plot, create_arbitrage_plot
-from config import get_large_button_styles, get_arbitrage_results_html
+from core.backtest import to_hourly
+from revenue_stacking import calculate_stacked_revenue
+from plotting_utils import (create_daily_benefits_chart, create_degradation_plot, create_arbitrage_plot,
+                            create_stacked_revenue_chart)
+from config import get_large_button_styles, get_arbitrage_results_html, get_stacked_revenue_results_html
+from perf import span, timed
 
+@timed()
 def render_arbitrage_tab():
     """Render the Battery Arbitrage analysis tab"""
     st.subheader("🔋 Standalone BESS - MIBEL Market Arbitrage Analysis", help="Analysis assumes a 1-hour battery system (1C)")
     
     if st.session_state.data_submitted:
         # Load MIBEL data for arbitrage calculations with submitted parameters
+        multi_zone = st.session_state.submitted_country == MULTI_ZONE
+        if multi_zone:
+            zone = st.selectbox("Zone", ["Spain", "Portugal"], key="arbitrage_zone")
         with st.spinner(f"Loading {st.session_state.submitted_country} market data for arbitrage analysis..."):
-            mibel_data = load_mibel_data(
-                st.session_state.submitted_start_date, 
-                st.session_state.submitted_end_date, 
-                st.session_state.submitted_country
-            )
+            if multi_zone:
+                # Reuse the shared multi-zone cache entry; no extra round trip.
+                wide = load_mibel_zones(
+                    st.session_state.submitted_start_date,
+                    st.session_state.submitted_end_date
+                )
+                mibel_data = zone_frame(wide, zone)
+            else:
+                mibel_data = load_mibel_data(
+                    st.session_state.submitted_start_date, 
+                    st.session_state.submitted_end_date, 
+                    st.session_state.submitted_country
+                )
         
         if mibel_data is not None:
             # Arbitrage logic assumes one row per hour (uses index.hour bounds).
             # Resample to hourly mean to support native 15-min ENTSO-E data.
-            mibel_hourly = mibel_data.resample("1h").mean().dropna()
-            mibel_hourly.attrs["source"] = mibel_data.attrs.get("source", "n/a")
+            with span("arbitrage.resample_hourly"):
+                mibel_hourly = to_hourly(mibel_data)
 
             # Analysis type selection
             analysis_type = render_analysis_type_selection()
@@ -34,7 +50,10 @@ def render_arbitrage_tab():
             # Apply custom CSS for larger button
             st.markdown(get_large_button_styles(), unsafe_allow_html=True)
             
-            if st.button(f"Calculate Arbitrage Benefits", type="primary"):
+            if analysis_type == "Revenue Stacking":
+                if st.button("Calculate Stacked Revenue", type="primary"):
+                    render_revenue_stacking(mibel_hourly, battery_capacity_mwh, efficiency, battery_cost_per_mwh)
+            elif st.button(f"Calculate Arbitrage Benefits", type="primary"):
                 # Calculate arbitrage benefits
                 daily_stats, roi_metrics, cycle_stats = calculate_arbitrage_benefits(
                     mibel_hourly, analysis_type, battery_capacity_mwh, efficiency, 
@@ -55,6 +74,7 @@ def render_arbitrage_tab():
     else:
         st.info("🔄 Please select your date range and country, then click 'Load Data' to perform BESS arbitrage analysis.")
 
+@timed()
 def display_arbitrage_results(analysis_type, daily_stats, roi_metrics, cycle_stats, 
                              battery_capacity_mwh, efficiency, degradation_per_cycle):
     """Display arbitrage calculation results"""
@@ -94,6 +114,7 @@ def display_arbitrage_results(analysis_type, daily_stats, roi_metrics, cycle_sta
     # Add best/worst day statistics
     render_best_worst_days(daily_stats)
 
+@timed()
 def display_daily_breakdown(daily_stats, analysis_type, battery_capacity_mwh, mibel_data):
     """Display detailed daily breakdown charts and statistics"""
     st.subheader("📊 Daily Arbitrage Breakdown")
@@ -120,4 +141,37 @@ def display_daily_breakdown(daily_stats, analysis_type, battery_capacity_mwh, mi
     fig_arbitrage = create_arbitrage_plot(mibel_data, f"BESS Arbitrage Opportunities")
     if fig_arbitrage:
         st.plotly_chart(fig_arbitrage, use_container_width=True)
-        st.markdown(caption_html, unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown(caption_html, unsafe_allow_html=True)
+
+@timed()
+def render_revenue_stacking(mibel_hourly, battery_capacity_mwh, efficiency, battery_cost_per_mwh):
+    """Co-optimise spot arbitrage with aFRR/mFRR capacity and display the results"""
+    with st.spinner("Loading REN reserve prices..."):
+        reserves = load_reserve_prices(
+            st.session_state.submitted_start_date,
+            st.session_state.submitted_end_date
+        )
+    if reserves is None:
+        st.warning("⚠️ REN reserve prices unavailable for this period. Showing spot-only dispatch.")
+
+    with st.spinner("Optimising hourly dispatch..."):
+        daily_stats, summary = calculate_stacked_revenue(
+            mibel_hourly, reserves, battery_capacity_mwh, efficiency, battery_cost_per_mwh
+        )
+
+    html = get_stacked_revenue_results_html(
+        battery_capacity_mwh=battery_capacity_mwh, efficiency=efficiency, **summary
+    )
+    st.markdown(html, unsafe_allow_html=True)
+
+    st.subheader("📊 Daily Revenue Breakdown")
+    source = mibel_hourly.attrs.get("source", "n/a")
+    caption_html = (
+        f"<div style='font-size:0.65rem;color:#888;margin-top:-0.5rem;margin-bottom:0.5rem;'>"
+        f"Source: {source} (spot), REN (aFRR/mFRR, Portuguese control area)</div>"
+    )
+    st.plotly_chart(create_stacked_revenue_chart(daily_stats, battery_capacity_mwh), use_container_width=True)
+    st.markdown(caption_html, unsafe_allow_html=True)
+
+    with st.expander("Daily dispatch summary", expanded=False):
+        st.dataframe(daily_stats.round(2), use_container_width=True, hide_index=True)
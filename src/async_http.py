@@ -0,0 +1,218 @@
+"""Shared asyncio fetch layer for upstream market and LLM APIs.
+
+Pure module (no Streamlit). One event loop runs on a daemon thread for the
+whole process, so every Streamlit session shares:
+
+  * a single ``httpx.AsyncClient`` connection pool (keep-alive, HTTP/1.1),
+  * per-host concurrency limits (``HOST_LIMITS``), and
+  * request coalescing: identical requests issued while one is already in
+    flight await the same future instead of hitting the upstream again.
+    Two users clicking the same preset at the same moment cost one request.
+
+Synchronous callers (the Streamlit script thread, worker threads) use
+``run()`` to submit a coroutine to the loop and block on its result.
+Libraries that only offer a blocking API (``entsoe-py``) go through
+``run_blocking()``, which applies the same host limit and coalescing while
+the call itself runs on the loop's default executor.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Max concurrent requests per upstream host; anything else gets DEFAULT_HOST_LIMIT.
+HOST_LIMITS = {
+    "web-api.tp.entsoe.eu": 4,
+    "www.mercado.ren.pt": 4,
+    "openrouter.ai": 4,
+}
+DEFAULT_HOST_LIMIT = 8
+
+_POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30.0)
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_RETRY_AFTER = 30.0
+
+
+class AsyncHTTPError(RuntimeError):
+    """Raised when a request fails after retries (network error or bad status).
+
+    ``status`` and ``headers`` are those of the last response, when there was one.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, headers: Any = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class _LoopThread:
+    """Background event loop plus the state that must live on it."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-http", daemon=True)
+        self.thread.start()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphores: dict[str, asyncio.Semaphore] = {}
+        self.inflight: dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+
+_STATE: Optional[_LoopThread] = None
+_STATE_LOCK = threading.Lock()
+
+
+def _state() -> _LoopThread:
+    global _STATE
+    with _STATE_LOCK:
+        if _STATE is None:
+            _STATE = _LoopThread()
+        return _STATE
+
+
+def run(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run ``coro`` on the shared loop and block until it finishes.
+
+    Must not be called from the loop thread itself (use ``await`` there).
+    """
+    state = _state()
+    if threading.current_thread() is state.thread:
+        raise RuntimeError("async_http.run() called from the event loop thread")
+    future = asyncio.run_coroutine_threadsafe(coro, state.loop)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def run_all(coros, return_exceptions: bool = False, timeout: Optional[float] = None) -> list:
+    """Run coroutines concurrently on the shared loop; results keep input order."""
+    async def _gather():
+        return await asyncio.gather(*coros, return_exceptions=return_exceptions)
+
+    return run(_gather(), timeout)
+
+
+def _client() -> httpx.AsyncClient:
+    state = _state()
+    if state.client is None:
+        state.client = httpx.AsyncClient(limits=_POOL_LIMITS, follow_redirects=True)
+    return state.client
+
+
+def _semaphore(host: str) -> asyncio.Semaphore:
+    state = _state()
+    sem = state.semaphores.get(host)
+    if sem is None:
+        sem = state.semaphores[host] = asyncio.Semaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+    return sem
+
+
+async def coalesce(key: Hashable, factory: Callable[[], Awaitable]) -> Any:
+    """Await ``factory()`` once per ``key`` among concurrent callers.
+
+    The first caller starts the task; later callers with the same key await
+    it (shielded, so one caller cancelling does not cancel the others). The
+    entry is dropped as soon as the task completes, so results are never
+    cached beyond the in-flight window.
+    """
+    state = _state()
+    task = state.inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        state.inflight[key] = task
+        task.add_done_callback(lambda _: state.inflight.pop(key, None))
+    else:
+        state.coalesced += 1
+        logger.debug("Coalesced request %s", key)
+    return await asyncio.shield(task)
+
+
+def _retry_after(response: httpx.Response, fallback: float) -> float:
+    value = response.headers.get("Retry-After")
+    try:
+        return min(float(value), _MAX_RETRY_AFTER) if value is not None else fallback
+    except ValueError:
+        return fallback
+
+
+async def request(method: str, url: str, *, params: Optional[dict] = None, json: Any = None,
+                  headers: Optional[dict] = None, timeout: float = 30.0,
+                  max_retries: int = 3, backoff_factor: float = 0.5) -> httpx.Response:
+    """Send one request through the shared pool with retries.
+
+    Retries network errors and 429/5xx with exponential backoff
+    (``backoff_factor * 2**attempt``), honouring ``Retry-After``. Holds the
+    host's semaphore only while a request is on the wire. Raises
+    ``AsyncHTTPError`` when retries are exhausted or on any other non-2xx.
+    """
+    host = urlsplit(url).hostname or ""
+    client = _client()
+    for attempt in range(max_retries + 1):
+        delay = backoff_factor * (2 ** attempt)
+        try:
+            async with _semaphore(host):
+                response = await client.request(method, url, params=params, json=json,
+                                                headers=headers, timeout=timeout)
+        except httpx.HTTPError as e:
+            if attempt < max_retries:
+                logger.debug("%s %s failed (%s), retrying in %.1fs", method, url, e, delay)
+                await asyncio.sleep(delay)
+                continue
+            raise AsyncHTTPError(f"{method} {url} failed: {e}") from e
+
+        if response.status_code in _RETRY_STATUSES and attempt < max_retries:
+            delay = _retry_after(response, delay)
+            logger.debug("%s %s returned HTTP %d, retrying in %.1fs", method, url, response.status_code, delay)
+            await asyncio.sleep(delay)
+            continue
+        if response.is_error:
+            raise AsyncHTTPError(f"{method} {url} returned HTTP {response.status_code}: {response.text[:200]}",
+                                 status=response.status_code, headers=response.headers)
+        return response
+    raise AsyncHTTPError(f"{method} {url} failed")  # pragma: no cover - loop always returns/raises
+
+
+async def get_json(url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                   **kwargs) -> Any:
+    """Coalesced GET returning decoded JSON.
+
+    Concurrent calls with the same URL and params share one upstream request.
+    Raises ``AsyncHTTPError`` on failure or invalid JSON.
+    """
+    key = ("GET", url, tuple(sorted((params or {}).items())))
+
+    async def _fetch():
+        response = await request("GET", url, params=params, headers=headers, **kwargs)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise AsyncHTTPError(f"GET {url} returned invalid JSON: {e}") from e
+
+    return await coalesce(key, _fetch)
+
+
+async def run_blocking(key: Hashable, host: str, fn: Callable, *args) -> Any:
+    """Run a blocking ``fn(*args)`` under ``host``'s limit, coalesced on ``key``."""
+    loop = asyncio.get_running_loop()
+
+    async def _call():
+        async with _semaphore(host):
+            return await loop.run_in_executor(None, fn, *args)
+
+    return await coalesce(key, _call)
+
+
+def stats() -> dict:
+    """Snapshot of the shared layer: requests in flight and coalesced so far."""
+    state = _state()
+    return {"inflight": len(state.inflight), "coalesced": state.coalesced}
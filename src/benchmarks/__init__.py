@@ -0,0 +1,20 @@
+"""Performance benchmarks for the core computations.
+
+asv-style suites: every ``bench_*`` module defines classes whose ``time_*``
+methods are timed. A class may set ``params`` (a list of dataset names
+from :mod:`benchmarks.datasets`); ``setup(param)`` runs once per param,
+outside the timing. Inputs come from the seeded generator in
+``synthetic_prices``, so numbers are comparable between commits on the
+same machine.
+
+Run from ``src/``::
+
+    python -m benchmarks                      # run all, save data/benchmarks/<commit>.json
+    python -m benchmarks --filter executor    # only names matching the regex
+    python -m benchmarks --quick              # first param of each class, fewer repeats
+    python -m benchmarks --compare HEAD~1     # flag regressions vs a saved run
+
+See :mod:`benchmarks.runner` for the result format. The chat kernels'
+results are checked against per-window pandas references on the same
+datasets by ``python -m benchmarks.equivalence`` (:mod:`benchmarks.equivalence`).
+"""
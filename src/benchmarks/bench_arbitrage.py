@@ -0,0 +1,36 @@
+"""BESS arbitrage calculator and revenue stacking."""
+
+from arbitrage_calculator import calculate_arbitrage_benefits
+from revenue_stacking import calculate_stacked_revenue
+
+from benchmarks.datasets import dataset
+
+
+class Arbitrage:
+    params = ["1y-60min", "1y-15min", "10y-mixed"]
+
+    def setup(self, name):
+        self.df = dataset(name)
+
+    def time_one_cycle(self, name):
+        calculate_arbitrage_benefits(self.df, "1 Cycle", 10.0, 0.85, 300_000.0, 0.0001)
+
+    def time_two_cycles(self, name):
+        calculate_arbitrage_benefits(self.df, "2 Cycles", 10.0, 0.85, 300_000.0, 0.0001)
+
+
+class RevenueStacking:
+    params = ["1y-60min", "10y-mixed"]
+
+    def setup(self, name):
+        # The stacking engine is hourly; the arbitrage tab resamples the same way.
+        self.hourly = dataset(name).resample("h").mean().dropna()
+        reserves = self.hourly[["price"]].rename(columns={"price": "afrr"}) * 0.2
+        reserves["mfrr"] = reserves["afrr"] * 0.5
+        self.reserves = reserves
+
+    def time_spot_only(self, name):
+        calculate_stacked_revenue(self.hourly, None, 10.0, 0.85, 300_000.0)
+
+    def time_with_reserves(self, name):
+        calculate_stacked_revenue(self.hourly, self.reserves, 10.0, 0.85, 300_000.0)
@@ -0,0 +1,42 @@
+"""Price histograms, condition counting and multi-zone statistics."""
+
+from price_distribution import (
+    compute_price_histogram,
+    compute_price_histograms,
+    count_hours_matching_conditions,
+)
+from core.stats import compute_zone_stats
+
+from benchmarks.datasets import dataset
+
+
+class Distribution:
+    params = ["1y-15min", "10y-mixed", "10y-15min"]
+
+    def setup(self, name):
+        self.df = dataset(name)
+
+    def time_price_histogram(self, name):
+        compute_price_histogram(self.df, bin_width=5.0)
+
+    def time_price_histogram_fine(self, name):
+        compute_price_histogram(self.df, bin_width=0.5)
+
+    def time_count_one_condition(self, name):
+        count_hours_matching_conditions(self.df, [("<", 0.0)])
+
+    def time_count_band(self, name):
+        count_hours_matching_conditions(self.df, [(">=", 20.0), ("<", 60.0), ("<=", 59.5)])
+
+
+class Zones:
+    params = ["10y-zones"]
+
+    def setup(self, name):
+        self.wide = dataset(name)
+
+    def time_zone_histograms(self, name):
+        compute_price_histograms(self.wide, columns=["ES", "PT"])
+
+    def time_zone_stats(self, name):
+        compute_zone_stats(self.wide)
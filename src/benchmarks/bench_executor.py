@@ -0,0 +1,51 @@
+"""Chat executor intents on warm calendar features."""
+
+from calendar_features import build_calendar_features, get_calendar_features
+from llm_chat.executor import execute
+from llm_chat.schema import validate_plan
+
+from benchmarks.datasets import dataset
+
+PLANS = {
+    "extremum": {"intent": "extremum", "extremum_kind": "max"},
+    "aggregate_month": {"intent": "aggregate", "aggregation": "mean", "group_by": "month"},
+    "aggregate_date": {"intent": "aggregate", "aggregation": "mean", "group_by": "date"},
+    "threshold_hours": {"intent": "threshold_hours", "conditions": [{"op": "<", "value": 20}]},
+    "distribution": {"intent": "distribution"},
+    "top_k_days": {"intent": "top_k", "k": 10, "top_k_unit": "day"},
+    "negative_prices": {"intent": "negative_prices"},
+    "peak_offpeak": {"intent": "peak_offpeak", "preset": "peak_vs_offpeak"},
+    "streak": {"intent": "streak", "conditions": [{"op": "<", "value": 40}]},
+    "arbitrage": {"intent": "arbitrage", "arbitrage_direction": "best", "arbitrage_k": 5},
+    "percentile_hour": {"intent": "percentile", "group_by": "hour_of_day"},
+    "rolling": {"intent": "rolling", "aggregation": "max", "window_days": 30},
+    "volatility": {"intent": "volatility", "volatility_kind": "intraday"},
+    "ramp": {"intent": "ramp", "ramp_hours": 3},
+    "compare": {"intent": "compare", "periods": [
+        {"label": "2024", "start": "2024-01-01", "end": "2024-12-31"},
+        {"label": "2025", "start": "2025-01-01", "end": "2025-12-31"},
+    ]},
+}
+
+
+class Executor:
+    params = ["1y-15min", "10y-mixed", "10y-15min"]
+
+    def setup(self, name):
+        self.df = dataset(name)
+        self.plans = {k: validate_plan(v) for k, v in PLANS.items()}
+        get_calendar_features(self.df)
+
+    def time_calendar_features_build(self, name):
+        build_calendar_features(self.df)
+
+
+def _make(intent: str):
+    def bench(self, name):
+        execute(self.plans[intent], self.df)
+    bench.__name__ = f"time_{intent}"
+    return bench
+
+
+for _intent in PLANS:
+    setattr(Executor, f"time_{_intent}", _make(_intent))
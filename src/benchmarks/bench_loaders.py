@@ -0,0 +1,28 @@
+"""Loader-side transforms that run without the network."""
+
+from core.loading import align_zones, parse_omie_prices
+
+from benchmarks.datasets import dataset, omie_rows
+
+
+class OmieParser:
+    params = [1, 10]  # years of daily rows
+
+    def setup(self, years):
+        self.rows = omie_rows(years)
+
+    def time_parse_omie_prices(self, years):
+        parse_omie_prices(self.rows)
+
+
+class AlignZones:
+    params = ["1y-15min", "10y-15min"]
+
+    def setup(self, name):
+        es = dataset(name)
+        # PT served hourly by the fallback: exercises the resampling branch.
+        pt = es.resample("h").mean().dropna() + 1.0
+        self.frames = {"ES": es, "PT": pt}
+
+    def time_align_mixed_resolution(self, name):
+        align_zones(self.frames)
@@ -0,0 +1,22 @@
+"""Portuguese tariff band assignment."""
+
+from tariff_utils import assign_bands, compute_band_averages, load_tarifas
+
+from benchmarks.datasets import dataset
+
+
+class TariffBands:
+    params = ["1y-60min", "1y-15min", "10y-mixed"]
+
+    def setup(self, name):
+        self.df = dataset(name)
+        load_tarifas()
+
+    def time_assign_bands_weekly(self, name):
+        assign_bands(self.df, "Tetra-Horário Ciclo Semanal")
+
+    def time_assign_bands_daily(self, name):
+        assign_bands(self.df, "Bi-Horário Ciclo Diário")
+
+    def time_band_averages(self, name):
+        compute_band_averages(self.df, "Tetra-Horário Ciclo Semanal")
@@ -0,0 +1,41 @@
+"""Named synthetic inputs shared by the suites (built once per process)."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import pandas as pd
+
+from synthetic_prices import synthetic_omie_rows, synthetic_prices
+
+# name -> synthetic_prices kwargs
+DATASETS = {
+    "1y-60min": dict(start="2024-01-01", end="2024-12-31", resolution="60min"),
+    "1y-15min": dict(start="2024-01-01", end="2024-12-31", resolution="15min"),
+    "10y-mixed": dict(start="2016-01-01", end="2025-12-31", resolution="mixed"),
+    "10y-15min": dict(start="2016-01-01", end="2025-12-31", resolution="15min"),
+    "10y-zones": dict(start="2016-01-01", end="2025-12-31", resolution="mixed", zones=("ES", "PT")),
+}
+
+
+@lru_cache(maxsize=None)
+def _build(name: str) -> pd.DataFrame:
+    if name not in DATASETS:
+        raise KeyError(f"unknown dataset {name!r}; choose from {sorted(DATASETS)}")
+    return synthetic_prices(seed=0, **DATASETS[name])
+
+
+def dataset(name: str) -> pd.DataFrame:
+    """A copy of the named frame (suites may mutate their inputs)."""
+    df = _build(name)
+    out = df.copy()
+    out.attrs = dict(df.attrs)
+    return out
+
+
+@lru_cache(maxsize=None)
+def omie_rows(years: int) -> pd.DataFrame:
+    """OMIEData-shaped daily rows ending 2025-12-31, hour columns as objects."""
+    rows = synthetic_omie_rows(start=f"{2026 - years}-01-01", end="2025-12-31", seed=0)
+    # The importer builds its frame with pd.concat of dicts: object columns.
+    return rows.astype({c: object for c in rows.columns if c.startswith("H")})
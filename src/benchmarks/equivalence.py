@@ -0,0 +1,276 @@
+"""Equivalence checks: the vectorised chat kernels against per-window pandas.
+
+The chat executor answers from positional calendar features and
+``bincount`` / ``reduceat`` reductions over them. This module recomputes the
+same answers the way the executor did before those kernels: pandas groupbys
+on the sliced window, with the step taken from the median spacing of the
+samples. It then compares the two on the benchmark datasets: hourly,
+15-minute and the mixed series that turns 15-minute on 2025-10-01. The
+windows include both DST changes and the resolution switch. On a
+mixed-resolution window the reference step is taken one calendar day at a
+time, which is what the per-window code computed on a single-resolution
+window.
+
+Run from ``src/``::
+
+    python -m benchmarks.equivalence              # exit status 1 on any mismatch
+    python -m benchmarks.equivalence --verbose    # print every check
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from calendar_features import get_calendar_features
+from llm_chat.executor import execute
+from llm_chat.schema import validate_plan
+
+from benchmarks.datasets import dataset
+
+_TZ = "Europe/Madrid"
+
+# dataset -> (label, first day, last day) windows to check.
+WINDOWS = {
+    "1y-60min": [
+        ("year", "2024-01-01", "2024-12-31"),
+        ("spring DST", "2024-03-25", "2024-04-05"),
+        ("autumn DST", "2024-10-20", "2024-11-03"),
+    ],
+    "1y-15min": [
+        ("year", "2024-01-01", "2024-12-31"),
+        ("spring DST", "2024-03-25", "2024-04-05"),
+        ("autumn DST", "2024-10-20", "2024-11-03"),
+    ],
+    "10y-mixed": [
+        ("hourly month", "2025-07-01", "2025-07-31"),
+        ("15-min month", "2025-11-01", "2025-11-30"),
+        ("switch", "2025-09-15", "2025-10-31"),
+        ("year", "2025-01-01", "2025-12-31"),
+    ],
+}
+
+
+def _close(a, b) -> bool:
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return a.shape == b.shape and bool(np.allclose(a, b, rtol=1e-9, atol=1e-6, equal_nan=True))
+
+
+def _run(df: pd.DataFrame, intent: str, start: str, end: str, **fields):
+    plan = validate_plan({"intent": intent, "time_window": {"start": start, "end": end}, **fields})
+    return execute(plan, df)
+
+
+# --- references: the per-window pandas computations ----------------------
+
+def _window_step_hours(index: pd.DatetimeIndex) -> float:
+    """Step of a window as the executor used to take it (median spacing)."""
+    if len(index) < 2:
+        return 1.0
+    return pd.Series(index).diff().dt.total_seconds().median() / 3600.0
+
+
+def _ref_weights(sub: pd.DataFrame) -> np.ndarray:
+    """Hours per sample: the window step, computed for each calendar day."""
+    days = sub.index.normalize()
+    steps = {day: _window_step_hours(part.index) for day, part in sub.groupby(days)}
+    return days.map(steps).to_numpy(dtype=np.float64)
+
+
+def _day_lengths(days: pd.DatetimeIndex) -> np.ndarray:
+    """Elapsed hours of each local calendar day (23 and 25 on DST changes)."""
+    start = days.tz_localize(_TZ)
+    end = (days + pd.Timedelta(days=1)).tz_localize(_TZ)
+    return ((end - start) / pd.Timedelta(hours=1)).to_numpy()
+
+
+# --- checks -----------------------------------------------------------------
+# Each takes the dataset, the window (sub), its bounds and the reference
+# weights and yields (name, ok, detail).
+
+def check_calendar(df, sub, start, end, weights):
+    lo = df.index.searchsorted(sub.index[0])
+    feats = get_calendar_features(df).iloc[lo : lo + len(sub)]
+    idx = sub.index
+    epoch_days = ((idx.normalize() - pd.Timestamp("1970-01-01")) // pd.Timedelta(days=1)).to_numpy()
+    yield "calendar.day", np.array_equal(feats["day"].to_numpy(), epoch_days), ""
+    yield "calendar.hour", np.array_equal(feats["hour"].to_numpy(), idx.hour.to_numpy()), ""
+    yield "calendar.dow", np.array_equal(feats["dow"].to_numpy(), idx.dayofweek.to_numpy()), ""
+    yield "calendar.month", np.array_equal(feats["month"].to_numpy(), idx.month.to_numpy()), ""
+    got = feats["weight"].to_numpy()
+    yield "calendar.weight", _close(got, weights), f"{got.sum():.2f}h vs {weights.sum():.2f}h"
+
+    # Every complete day carries its elapsed hours, however it is sampled.
+    per_day = pd.Series(got).groupby(idx.normalize()).sum()
+    expected = _day_lengths(per_day.index)
+    bad = per_day.index[~np.isclose(per_day.to_numpy(), expected)]
+    yield "calendar.day_hours", bad.empty, f"{len(bad)} day(s) off" + (f", first {bad[0].date()}" if len(bad) else "")
+
+
+def check_threshold(df, sub, start, end, weights):
+    prices = sub["price"]
+    for conditions in ([{"op": "<", "value": 20}], [{"op": ">", "value": 60}, {"op": "<=", "value": 90}]):
+        res = _run(df, "threshold_hours", start, end, conditions=conditions)
+        mask = np.ones(len(sub), dtype=bool)
+        for c in conditions:
+            mask &= {"<": prices < c["value"], ">": prices > c["value"],
+                     "<=": prices <= c["value"]}[c["op"]].to_numpy()
+        want = (weights[mask].sum(), weights.sum())
+        got = (res.extra["matching_hours"], res.extra["total_hours"])
+        yield (f"threshold_hours {res.extra['conditions_label']}", _close(got, want),
+               "{:.2f}/{:.2f}h vs {:.2f}/{:.2f}h".format(*got, *want))
+
+
+_GROUPERS = {
+    "date": lambda idx: idx.date,
+    "hour_of_day": lambda idx: idx.hour,
+    "day_of_week": lambda idx: idx.dayofweek,
+    "month": lambda idx: idx.month,
+}
+
+
+def check_reductions(df, sub, start, end, weights):
+    prices = sub["price"]
+    for group_by, key in _GROUPERS.items():
+        for agg in ("mean", "max"):
+            res = _run(df, "aggregate", start, end, aggregation=agg, group_by=group_by)
+            want = prices.groupby(key(sub.index)).agg(agg)
+            yield f"aggregate {agg} by {group_by}", _close(res.series.to_numpy(), want.to_numpy()), ""
+
+    daily = prices.groupby(sub.index.date)
+    res = _run(df, "top_k", start, end, k=5, top_k_unit="day", top_k_direction="highest")
+    want = daily.mean().nlargest(5)
+    yield "top_k days", _close(res.series.to_numpy(), want.to_numpy()), ""
+
+    res = _run(df, "arbitrage", start, end, arbitrage_direction="best", arbitrage_k=5)
+    spread = daily.max() - daily.min()
+    got = (res.extra["avg_spread"], res.extra["best_spread"], res.extra["worst_spread"], res.extra["total_days"])
+    want = (spread.mean(), spread.max(), spread.min(), len(spread))
+    yield "arbitrage spreads", _close(got, want), "{:.2f}/{:.2f}/{:.2f} vs {:.2f}/{:.2f}/{:.2f}".format(*got[:3], *want[:3])
+
+
+def _ref_runs(mask: pd.Series, weights: np.ndarray) -> pd.DataFrame:
+    """Runs of True in ``mask`` with their sample count and hours (groupby on run ids)."""
+    run_id = (mask != mask.shift()).cumsum()
+    frame = pd.DataFrame({"run": run_id.to_numpy(), "hit": mask.to_numpy(), "hours": weights})
+    runs = frame[frame["hit"]].groupby("run")["hours"].agg(["size", "sum"])
+    return runs.rename(columns={"sum": "hours"})
+
+
+def check_streak(df, sub, start, end, weights):
+    for value, min_length in ((40, 0), (40, 3), (0, 0.5)):
+        conditions = [{"op": "<", "value": value}]
+        res = _run(df, "streak", start, end, conditions=conditions, min_length=min_length)
+        runs = _ref_runs(sub["price"] < value, weights)
+        runs = runs[runs["hours"] >= min_length - 1e-9]
+        name = f"streak price < {value}, min_length={min_length}h"
+        if runs.empty:
+            yield name, res.plot_kind == "none", res.summary_for_llm
+            continue
+        got = (res.extra["num_streaks"], res.extra["longest_hours"])
+        want = (len(runs), runs["hours"].max())
+        yield name, _close(got, want), "{} runs/{:.2f}h vs {} runs/{:.2f}h".format(*got, *want)
+
+        res = _run(df, "streak", start, end, conditions=conditions, min_length=min_length,
+                   streak_mode="histogram")
+        got = (res.value, res.extra["num_streaks"])
+        want = (runs["hours"].median(), len(runs))
+        yield f"{name} histogram", _close(got, want), "{:.2f}h/{} vs {:.2f}h/{}".format(*got, *want)
+
+
+def check_negative_prices(df, sub, start, end, weights):
+    res = _run(df, "negative_prices", start, end)
+    prices = sub["price"]
+    neg = (prices < 0).to_numpy()
+    if not neg.any():
+        yield "negative_prices", res.plot_kind == "none", res.summary_for_llm
+        return
+    hours = pd.Series(weights[neg], index=sub.index[neg])
+    got = (res.extra["negative_hours"], res.extra["pct"], res.extra["negative_days"], res.extra["min_price"])
+    want = (hours.sum(), hours.sum() / weights.sum() * 100.0,
+            hours.index.normalize().nunique(), prices[neg].min())
+    yield "negative_prices", _close(got, want), "{:.2f}h/{:.2f}%/{}d/{:.2f} vs {:.2f}h/{:.2f}%/{}d/{:.2f}".format(*got, *want)
+    yield ("negative_prices.min_timestamp", res.extra["min_timestamp"] == str(prices[neg].idxmin()),
+           f"{res.extra['min_timestamp']} vs {prices[neg].idxmin()}")
+
+    # "Most common hours of day" in the summary: negative hours per hour of day.
+    by_hour = hours.groupby(hours.index.hour).sum().nlargest(3).round(2)
+    yield "negative_prices.top_hours", f"Most common hours of day: {by_hour.to_dict()}" in res.summary_for_llm, ""
+
+
+def _ref_ramps(sub: pd.DataFrame, hours: float) -> pd.Series:
+    """Price change to the sample ``hours`` later, by starting time.
+
+    Pairs are looked up on the DST-aware index (the first of two repeated
+    autumn stamps is summer time), so they are ``hours`` apart in real
+    time. Like the executor, it drops pairs whose wall-clock distance
+    differs (across a DST change), pairs with an end in the repeated hour
+    and samples without a partner (gaps).
+    """
+    repeated = sub.index.duplicated(keep=False)
+    aware = sub.index.tz_localize(_TZ, ambiguous=sub.index.duplicated(keep="last"))
+    prices = sub["price"].set_axis(aware)
+    step = pd.Timedelta(hours=hours)
+    later = prices.reindex(aware + step)
+    wall = later.index.tz_localize(None)
+    keep = (wall - sub.index == step) & ~repeated & ~wall.isin(sub.index[repeated])
+    delta = pd.Series(later.to_numpy() - prices.to_numpy(), index=sub.index)
+    return delta[keep].dropna()
+
+
+def check_ramp(df, sub, start, end, weights):
+    for hours in (1, 3):
+        ramps = _ref_ramps(sub, hours)
+        res = _run(df, "ramp", start, end, ramp_hours=hours)
+        profile = ramps.groupby(ramps.index.hour).mean()
+        name = f"ramp {hours}h"
+        got = (res.extra["count"], res.extra["mean_abs"], res.extra["max_up"], res.extra["max_down"])
+        want = (len(ramps), ramps.abs().mean(), ramps.max(), ramps.min())
+        yield name, _close(got, want), "{}/{:.2f}/{:.2f}/{:.2f} vs {}/{:.2f}/{:.2f}/{:.2f}".format(*got, *want)
+        yield f"{name} profile", _close(res.series.to_numpy(), profile.to_numpy()), ""
+        yield (f"{name} largest rise at", res.extra["max_up_at"] == ramps.idxmax(),
+               f"{res.extra['max_up_at']} vs {ramps.idxmax()}")
+
+
+CHECKS = [check_calendar, check_threshold, check_reductions, check_streak, check_negative_prices,
+          check_ramp]
+
+
+def run_checks(names=None, verbose=False) -> int:
+    """Run every check on every window; returns the number of mismatches."""
+    failures = 0
+    for name, windows in WINDOWS.items():
+        if names and name not in names:
+            continue
+        df = dataset(name)
+        for label, start, end in windows:
+            sub = df.loc[start:end]
+            weights = _ref_weights(sub)
+            results = [r for check in CHECKS for r in check(df, sub, start, end, weights)]
+            bad = [r for r in results if not r[1]]
+            failures += len(bad)
+            print(f"{name:>10} {label:<13} {start} → {end}: "
+                  f"{len(results) - len(bad)}/{len(results)} match")
+            for check_name, ok, detail in results:
+                if verbose or not ok:
+                    print(f"{'':>12}{'ok  ' if ok else 'DIFF'} {check_name}"
+                          + (f" ({detail})" if detail and not ok else ""))
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.equivalence", description=__doc__.split("\n")[0])
+    parser.add_argument("--dataset", nargs="+", choices=sorted(WINDOWS), help="Only these datasets")
+    parser.add_argument("--verbose", action="store_true", help="Print every check, not only mismatches")
+    args = parser.parse_args(argv)
+    failures = run_checks(args.dataset, args.verbose)
+    print("all checks match" if not failures else f"{failures} mismatch(es)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Discover, time and compare the benchmark suites.
+
+Each benchmark is named ``<module>.<Class>.<method>[<param>]`` (module
+without the ``bench_`` prefix). It is called once untimed, then timed up
+to ``repeat`` times or until ``budget`` seconds have been spent, whichever
+comes first (always at least once). The median and the minimum are kept.
+
+A run is saved to ``BENCH_RESULTS_DIR`` (default ``data/benchmarks``) as
+``<commit>.json``::
+
+    {"commit": "ab12cd3", "dirty": false, "timestamp": "...",
+     "machine": {"python": "...", "numpy": "...", "pandas": "...", ...},
+     "results": {"executor.Executor.time_streak[10y-mixed]":
+                 {"median_s": 0.012, "min_s": 0.011, "runs": 7}, ...}}
+
+``--compare REF`` loads a saved run (a file path, or a commit-ish resolved
+with ``git rev-parse``) and reports the median ratio per benchmark. It exits
+with status 1 when any ratio exceeds ``--threshold``, so it can gate CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import benchmarks
+
+_DEFAULT_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "benchmarks")
+)
+BENCH_RESULTS_DIR = os.environ.get("BENCH_RESULTS_DIR", _DEFAULT_DIR)
+
+DEFAULT_REPEAT = 7
+DEFAULT_BUDGET_S = 3.0
+DEFAULT_THRESHOLD = 1.25
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _machine() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def discover(pattern: Optional[str] = None, quick: bool = False) -> list[tuple[str, type, str, object]]:
+    """``(name, class, method, param)`` for every benchmark matching ``pattern``."""
+    regex = re.compile(pattern) if pattern else None
+    found = []
+    for info in sorted(pkgutil.iter_modules(benchmarks.__path__), key=lambda m: m.name):
+        if not info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{info.name}")
+        short = info.name[len("bench_"):]
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            params = list(getattr(cls, "params", [None]))
+            if quick:
+                params = params[:1]
+            methods = sorted(m for m in dir(cls) if m.startswith("time_"))
+            for param in params:
+                for method in methods:
+                    name = f"{short}.{cls_name}.{method}"
+                    if param is not None:
+                        name += f"[{param}]"
+                    if regex is None or regex.search(name):
+                        found.append((name, cls, method, param))
+    return found
+
+
+def _call(fn, param):
+    return fn() if param is None else fn(param)
+
+
+def run(pattern: Optional[str] = None, quick: bool = False, repeat: int = DEFAULT_REPEAT,
+        budget: float = DEFAULT_BUDGET_S, verbose: bool = True) -> dict:
+    """Time every matching benchmark; returns the result document."""
+    if quick:
+        repeat = min(repeat, 3)
+    results: dict = {}
+    instances: dict = {}
+    for name, cls, method, param in discover(pattern, quick):
+        key = (cls, param)
+        try:
+            if key not in instances:
+                instance = cls()
+                if hasattr(instance, "setup"):
+                    _call(instance.setup, param)
+                instances[key] = instance
+            fn = getattr(instances[key], method)
+            _call(fn, param)
+            times = []
+            spent = 0.0
+            while len(times) < repeat and (not times or spent < budget):
+                t = time.perf_counter()
+                _call(fn, param)
+                times.append(time.perf_counter() - t)
+                spent += times[-1]
+        except Exception as e:  # noqa: BLE001 - record and keep going
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            if verbose:
+                print(f"{name:<64} ERROR {results[name]['error']}", flush=True)
+            continue
+        results[name] = {
+            "median_s": statistics.median(times),
+            "min_s": min(times),
+            "runs": len(times),
+        }
+        if verbose:
+            print(f"{name:<64} {_fmt(results[name]['median_s']):>10}  (n={len(times)})", flush=True)
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(status),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": _machine(),
+        "results": results,
+    }
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1.0:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds * 1e6:.0f} µs"
+
+
+def save(doc: dict, directory: str = BENCH_RESULTS_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{doc['commit']}{'-dirty' if doc['dirty'] else ''}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, indent=2)
+    return path
+
+
+def load(ref: str, directory: str = BENCH_RESULTS_DIR) -> dict:
+    """A saved run by file path or commit-ish."""
+    path = ref
+    if not os.path.exists(path):
+        commit = _git("rev-parse", "--short", ref) or ref
+        path = os.path.join(directory, f"{commit}.json")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no saved benchmark run for {ref!r} ({path})")
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Median ratios (current / baseline) for benchmarks present in both runs."""
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or "median_s" not in cur or "median_s" not in base or base["median_s"] <= 0:
+            continue
+        ratio = cur["median_s"] / base["median_s"]
+        rows.append({
+            "name": name,
+            "baseline_s": base["median_s"],
+            "current_s": cur["median_s"],
+            "ratio": ratio,
+            "regression": ratio > threshold,
+            "improvement": ratio < 1.0 / threshold,
+        })
+    return rows
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the benchmark suites")
+    parser.add_argument("--filter", help="Regex on benchmark names")
+    parser.add_argument("--quick", action="store_true", help="First param of each class, at most 3 runs")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S, help="Seconds per benchmark")
+    parser.add_argument("--list", action="store_true", help="Only list the benchmark names")
+    parser.add_argument("--compare", metavar="REF", help="Saved run (path or commit-ish) to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Ratio above which a benchmark counts as a regression")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, *_ in discover(args.filter, args.quick):
+            print(name)
+        return 0
+
+    try:
+        baseline = load(args.compare) if args.compare else None
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    doc = run(args.filter, quick=args.quick, repeat=args.repeat, budget=args.budget)
+    if not args.no_save:
+        print(f"saved {save(doc)}")
+    if baseline is None:
+        return 0
+
+    rows = compare(doc, baseline, args.threshold)
+    print(f"\nvs {baseline['commit']}{' (dirty)' if baseline.get('dirty') else ''}:")
+    for row in sorted(rows, key=lambda r: -r["ratio"]):
+        flag = "REGRESSION" if row["regression"] else ("faster" if row["improvement"] else "")
+        print(f"{row['name']:<64} {_fmt(row['baseline_s']):>10} -> {_fmt(row['current_s']):>10}"
+              f"  x{row['ratio']:.2f} {flag}")
+    regressions = [r for r in rows if r["regression"]]
+    print(f"{len(regressions)} regression(s) above x{args.threshold:.2f} out of {len(rows)} compared")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Calendar features derived once per loaded price dataset.
+
+Pure functions (no Streamlit). The chat executor answers most questions by
+grouping or masking on the hour, weekday, month or calendar day of each
+sample. Decomposing a multi-year ``DatetimeIndex`` for every question is the
+dominant cost, so the decomposition is done once per dataset and cached by
+a fingerprint of the index. The resulting frame is aligned *positionally*
+with the dataset: row ``i`` describes ``df.index[i]``, so any integer-position
+slice of the data can take the same slice of the features.
+
+Columns (all NumPy integer/float dtypes, no object arrays):
+
+``day``      days since 1970-01-01 of the (naive, local) timestamp (int64)
+``hour``     hour of day 0-23 (int8)
+``slot``     position of the sample within its day, in that day's steps (int16)
+``dow``      day of week, 0=Monday (int8)
+``month``    month 1-12 (int8)
+``season``   0=winter (Dec-Feb), 1=spring, 2=summer (Jun-Sep), 3=autumn (int8)
+``weight``   hours represented by the sample: the step of its day (float64)
+
+Weights come from each calendar day's median spacing, not from one
+dataset-wide step: MIBEL data is hourly before October 2025 and 15-minute
+after, so a single step would over- or under-count whole windows. The
+resolution only changes at midnight, and a per-day median is unaffected by
+the DST gap (one 2 h diff) or the repeated autumn hour (one 0 h diff) of
+the naive local index.
+"""
+from __future__ import annotations
+
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from price_distribution import infer_step_hours
+
+_NS_PER_DAY = 86_400 * 10**9
+_NS_PER_MINUTE = 60 * 10**9
+
+# Month (1-12) -> season code. Summer follows the Jun-Sep convention used by
+# the chat's summer-vs-winter comparison, winter is Dec-Feb.
+_SEASON_OF_MONTH = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 2, 3, 3, 0], dtype=np.int8)
+SEASON_LABELS = ("winter", "spring", "summer", "autumn")
+
+# A handful of datasets (zones x date ranges) are alive per process at most.
+_MAX_CACHED = 8
+_CACHE: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _index_ns(index: pd.Index) -> np.ndarray:
+    """Index as int64 nanoseconds of local wall-clock time."""
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    # Resolution varies (pandas >= 3 defaults to microseconds); pin it.
+    return idx.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Cheap identity of a dataset's index (CRC32 of the raw timestamps).
+
+    Features depend only on the index, so two frames with the same timestamps
+    share a fingerprint even if their value columns differ.
+    """
+    ns = np.ascontiguousarray(_index_ns(df.index))
+    return f"{len(ns)}-{zlib.crc32(ns.tobytes()):08x}"
+
+
+def _day_steps(ns: np.ndarray, day: np.ndarray, fallback_hours: float) -> np.ndarray:
+    """Per-sample step in hours: the median spacing within the sample's day.
+
+    Days with a single sample (or no positive spacing) take ``fallback_hours``.
+    """
+    steps = np.full(len(ns), fallback_hours, dtype=np.float64)
+    if len(ns) < 2:
+        return steps
+    same_day = day[1:] == day[:-1]
+    diffs = (ns[1:] - ns[:-1])[same_day] / 3.6e12
+    diff_day = day[1:][same_day]
+    positive = diffs > 0
+    if not positive.any():
+        return steps
+    median = pd.Series(diffs[positive]).groupby(diff_day[positive]).median()
+    per_day = pd.Series(day).map(median).to_numpy(dtype=np.float64)
+    return np.where(np.isnan(per_day), steps, per_day)
+
+
+def build_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Decompose ``df.index`` into the integer calendar columns listed above.
+
+    ``attrs["step_hours"]`` keeps the dataset-wide median step (see
+    :func:`price_distribution.infer_step_hours`) for display only; anything
+    that counts hours uses the per-sample ``weight``.
+    """
+    ns = _index_ns(df.index)
+    step_hours = infer_step_hours(df)
+
+    day = ns // _NS_PER_DAY
+    minute_of_day = (ns - day * _NS_PER_DAY) // _NS_PER_MINUTE
+    weight = _day_steps(ns, day, step_hours)
+    step_minutes = np.maximum(np.rint(weight * 60).astype(np.int64), 1)
+    idx = pd.DatetimeIndex(df.index)
+    month = idx.month.to_numpy(dtype=np.int8)
+
+    feats = pd.DataFrame(
+        {
+            "day": day.astype(np.int64),
+            "hour": (minute_of_day // 60).astype(np.int8),
+            "slot": (minute_of_day // step_minutes).astype(np.int16),
+            # 1970-01-01 was a Thursday (dow 3).
+            "dow": ((day + 3) % 7).astype(np.int8),
+            "month": month,
+            "season": _SEASON_OF_MONTH[month],
+            "weight": weight,
+        },
+        index=pd.RangeIndex(len(ns)),
+    )
+    feats.attrs["step_hours"] = step_hours
+    return feats
+
+
+def get_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the (cached) feature frame for ``df``; builds it on first use."""
+    key = dataset_fingerprint(df)
+    with _CACHE_LOCK:
+        feats = _CACHE.get(key)
+        if feats is not None:
+            _CACHE.move_to_end(key)
+            return feats
+    feats = build_calendar_features(df)
+    with _CACHE_LOCK:
+        _CACHE[key] = feats
+        while len(_CACHE) > _MAX_CACHED:
+            _CACHE.popitem(last=False)
+    return feats
+
+
+def day_code_to_timestamp(codes) -> pd.DatetimeIndex:
+    """Inverse of the ``day`` column: midnight of each day code."""
+    return pd.to_datetime(np.asarray(codes, dtype=np.int64), unit="D")
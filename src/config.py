@@ -159,4 +159,38 @@ def get_arbitrage_results_html(analysis_type, total_benefit, avg_daily_benefit,
                 </div>
             </div>
         </div>
-        """
\ No newline at end of file
+        """
+
+
+def get_stacked_revenue_results_html(total_revenue, spot_revenue, afrr_revenue, mfrr_revenue,
+                                     spot_only_revenue, uplift_pct, avg_daily_revenue, total_days,
+                                     battery_capacity_mwh, efficiency, total_investment,
+                                     yearly_benefit, payback_years):
+    """Generate HTML for revenue stacking results"""
+    uplift = f"{uplift_pct:+.1f}%" if uplift_pct == uplift_pct else "n/a"
+    # No revenue means no payback (payback_years is inf).
+    payback = f"{payback_years:.1f} years" if 0 <= payback_years < float("inf") else "n/a"
+    return f"""
+        <div style="background-color: #1e1e1e; padding: 1.5rem; border-radius: 0.5rem; margin: 1rem 0;">
+            <h4 style="color: white; margin-bottom: 1rem;">Revenue Stacking Results (Spot + aFRR + mFRR)</h4>
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 2rem; color: #ccc;">
+                <div>
+                    <h5 style="color: #ccc; margin-bottom: 0.5rem;">Period Analysis ({total_days} days)</h5>
+                    <div style="margin-bottom: 0.5rem;">Total Period Revenue: <strong>{total_revenue:,.2f} €</strong></div>
+                    <div style="margin-bottom: 0.5rem;">Spot Arbitrage: <strong>{spot_revenue:,.2f} €</strong></div>
+                    <div style="margin-bottom: 0.5rem;">aFRR Capacity: <strong>{afrr_revenue:,.2f} €</strong></div>
+                    <div style="margin-bottom: 0.5rem;">mFRR Capacity: <strong>{mfrr_revenue:,.2f} €</strong></div>
+                    <div style="margin-bottom: 0.5rem;">Average Daily Revenue: <strong>{avg_daily_revenue:.2f} €/day</strong></div>
+                    <div>Battery: <strong>{battery_capacity_mwh:.1f} MWh</strong> at <strong>{efficiency*100:.1f}%</strong> round-trip</div>
+                </div>
+                <div>
+                    <h5 style="color: #ccc; margin-bottom: 0.5rem;">ROI & Investment Analysis</h5>
+                    <div style="margin-bottom: 0.5rem;">Total Investment: <strong>{total_investment:,.0f} €</strong></div>
+                    <div style="margin-bottom: 0.5rem;">Yearly Benefit: <strong>{yearly_benefit:,.2f} €/year</strong></div>
+                    <div style="margin-bottom: 0.5rem;">Payback Period: <strong>{payback}</strong></div>
+                    <div style="margin-bottom: 0.5rem;">Spot-only Revenue: <strong>{spot_only_revenue:,.2f} €</strong></div>
+                    <div>Uplift vs Spot-only: <strong>{uplift}</strong></div>
+                </div>
+            </div>
+        </div>
+        """
@@ -0,0 +1,59 @@
+"""Streamlit-free core: loading, store, statistics, battery models, executor.
+
+Everything importable from here runs without Streamlit, so it works in
+worker processes and batch jobs (``python -m core``, see :mod:`core.cli`).
+The dashboard modules are UI layers on top: ``data_loader`` caches
+``core.loading`` and reports its status, ``statistics_utils`` renders
+``core.stats``.
+
+The battery, tariff, forecast, store and executor modules never depended
+on Streamlit and keep their import paths; they are re-exported here so
+batch code has a single import surface.
+"""
+from arbitrage_calculator import calculate_arbitrage_benefits
+from core.backtest import STRATEGIES, run_backtest, split_periods, to_hourly
+from core.loading import (
+    MULTI_ZONE,
+    DataSourceError,
+    align_zones,
+    fetch_context_series,
+    fetch_prices,
+    fetch_reserve_prices,
+    fetch_zones,
+    join_context,
+    register_key_source,
+    zone_frame,
+)
+from core.stats import compute_key_stats, compute_zone_stats
+from data_store import LocalStore, get_store
+from forecast_utils import generate_hourly_forecast
+from llm_chat.executor import execute
+from revenue_stacking import calculate_stacked_revenue
+from tariff_utils import assign_bands, compute_band_averages
+
+__all__ = [
+    "MULTI_ZONE",
+    "STRATEGIES",
+    "DataSourceError",
+    "LocalStore",
+    "align_zones",
+    "assign_bands",
+    "calculate_arbitrage_benefits",
+    "calculate_stacked_revenue",
+    "compute_band_averages",
+    "compute_key_stats",
+    "compute_zone_stats",
+    "execute",
+    "fetch_context_series",
+    "fetch_prices",
+    "fetch_reserve_prices",
+    "fetch_zones",
+    "generate_hourly_forecast",
+    "get_store",
+    "join_context",
+    "register_key_source",
+    "run_backtest",
+    "split_periods",
+    "to_hourly",
+    "zone_frame",
+]
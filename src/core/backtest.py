@@ -0,0 +1,87 @@
+"""Battery backtests over a price frame (no UI).
+
+``run_backtest`` computes what the Arbitrage tab shows for one zone and
+window: prices are averaged to hourly, then either the 1/2-cycle daily
+arbitrage with degradation and ROI (``arbitrage_calculator``) or the spot
++ aFRR/mFRR stacked dispatch (``revenue_stacking``) runs over them. It
+returns the per-day frame and a flat summary dict (one report row).
+"""
+import pandas as pd
+
+from arbitrage_calculator import calculate_arbitrage_benefits, find_best_worst_days
+from perf import timed
+from revenue_stacking import calculate_stacked_revenue
+
+STRATEGIES = ("1 Cycle", "2 Cycles", "Revenue Stacking")
+
+# Battery defaults of the Arbitrage tab (efficiency and degradation as fractions).
+DEFAULT_CAPACITY_MWH = 1.0
+DEFAULT_EFFICIENCY = 0.85
+DEFAULT_COST_PER_MWH = 300000.0
+DEFAULT_DEGRADATION = 0.0002
+
+_PERIOD_FREQ = {"year": "YS", "quarter": "QS", "month": "MS"}
+
+
+def to_hourly(prices):
+    """Hourly mean of a native-resolution frame (15-min samples averaged)."""
+    hourly = prices.resample("1h").mean().dropna()
+    hourly.attrs["source"] = prices.attrs.get("source", "n/a")
+    return hourly
+
+
+def split_periods(start, end, freq=None):
+    """Consecutive ``(first_day, last_day)`` windows covering ``start``..``end``.
+
+    ``freq`` is None (a single window), ``"year"``, ``"quarter"`` or
+    ``"month"``; the first and last windows are clipped to the range.
+    """
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    if end < start:
+        raise ValueError(f"end {end.date()} is before start {start.date()}")
+    if not freq:
+        return [(start.date(), end.date())]
+    if freq not in _PERIOD_FREQ:
+        raise ValueError(f"unknown period {freq!r}; choose from {sorted(_PERIOD_FREQ)}")
+    starts = [start] + [b for b in pd.date_range(start, end, freq=_PERIOD_FREQ[freq]) if b > start]
+    ends = [s - pd.Timedelta(days=1) for s in starts[1:]] + [end]
+    return [(s.date(), e.date()) for s, e in zip(starts, ends)]
+
+
+def slice_period(df, first_day, last_day):
+    """Rows of ``df`` (naive local index) from ``first_day`` to the end of ``last_day``."""
+    if df is None:
+        return None
+    return df.loc[str(first_day):str(last_day)]
+
+
+@timed()
+def run_backtest(prices, strategy="1 Cycle", capacity_mwh=DEFAULT_CAPACITY_MWH,
+                 efficiency=DEFAULT_EFFICIENCY, cost_per_mwh=DEFAULT_COST_PER_MWH,
+                 degradation_per_cycle=DEFAULT_DEGRADATION, reserves=None):
+    """Backtest one battery over ``prices`` (a frame with a ``price`` column).
+
+    ``strategy`` is one of ``STRATEGIES``. ``reserves`` (``afrr`` / ``mfrr``
+    columns, €/MW/h) only matters for Revenue Stacking; without it the
+    stacked dispatch is spot-only. Degradation is not modelled by Revenue
+    Stacking. Returns ``(daily_stats, summary)``, or ``(None, None)`` when
+    the window holds no prices.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r}; choose from {list(STRATEGIES)}")
+    hourly = to_hourly(prices[["price"]])
+    if hourly.empty:
+        return None, None
+
+    if strategy == "Revenue Stacking":
+        daily_stats, summary = calculate_stacked_revenue(
+            hourly, reserves, capacity_mwh, efficiency, cost_per_mwh
+        )
+        return daily_stats, dict(summary)
+
+    daily_stats, roi_metrics, cycle_stats = calculate_arbitrage_benefits(
+        hourly, strategy, capacity_mwh, efficiency, cost_per_mwh, degradation_per_cycle
+    )
+    summary = {**roi_metrics, **cycle_stats, **(find_best_worst_days(daily_stats) or {})}
+    return daily_stats, summary
@@ -0,0 +1,206 @@
+"""Headless batch runs: price sources, a process pool and report files.
+
+Used by ``core.cli``. Each zone's prices are loaded once for the whole date
+range in the parent process and handed to the workers when the pool starts
+(the pool ``initializer``), so a task only carries its window and battery
+settings. Tasks run in ``ProcessPoolExecutor`` workers; ``workers=1`` runs
+them inline, which is easier to debug and profile.
+
+A price *source* is ``"live"`` (``core.loading``: local store, ENTSO-E,
+MIBEL fallback), ``"synthetic"`` (the seeded generator, offline) or the
+path of a Parquet/CSV file with a datetime index and either a ``price``
+column (used for every zone asked for) or one column per zone (``ES``,
+``PT``), optionally with ``afrr`` / ``mfrr`` reserve prices.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from core.backtest import run_backtest, slice_period
+from core.loading import (
+    DataSourceError,
+    _ENTSOE_ZONE,
+    fetch_context_series,
+    fetch_prices,
+    fetch_reserve_prices,
+    join_context,
+    zone_frame,
+)
+from core.stats import compute_key_stats
+from perf import span
+from price_distribution import count_hours_matching
+from synthetic_prices import synthetic_prices
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "reports")
+)
+REPORTS_DIR = os.environ.get("REPORTS_DIR", _DEFAULT_DIR)
+
+COUNTRIES = tuple(_ENTSOE_ZONE)
+FORMATS = ("parquet", "csv")
+_RESERVE_COLUMNS = ["afrr", "mfrr"]
+
+
+def read_frame(path):
+    """A Parquet or CSV file as a frame on a sorted naive ``DatetimeIndex``."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    elif path.endswith(".csv"):
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+    else:
+        raise ValueError(f"unsupported input {path!r}; expected .parquet or .csv")
+    df.index = pd.DatetimeIndex(df.index, name="datetime")
+    if df.index.tz is not None:
+        df.index = df.index.tz_convert("Europe/Madrid").tz_localize(None)
+    df = df.sort_index(kind="stable")
+    df.attrs["source"] = os.path.basename(path)
+    return df
+
+
+def load_prices(source, start, end, country="Spain", seed=0):
+    """One zone's prices for ``start``..``end`` from ``source`` (see module doc)."""
+    if source == "live":
+        df, status = fetch_prices(start, end, country)
+        if status == "failed":
+            raise DataSourceError(f"no prices for {country} {start}..{end}")
+        if status == "fallback":
+            logger.warning("%s prices served by the MIBEL fallback (hourly)", country)
+        return df
+    if source == "synthetic":
+        wide = synthetic_prices(str(start), str(end), zones=("ES", "PT"), seed=seed)
+    else:
+        wide = slice_period(read_frame(source), start, end)
+    if "price" in wide.columns:
+        df = wide[["price"]].dropna()
+        df.attrs["source"] = wide.attrs.get("source", "n/a")
+    else:
+        df = zone_frame(wide, country)
+    if df is None or df.empty:
+        raise DataSourceError(f"{source}: no {country} prices for {start}..{end}")
+    return df
+
+
+def load_reserves(source, start, end):
+    """aFRR / mFRR prices for Revenue Stacking, or None (spot-only dispatch)."""
+    if source == "live":
+        reserves, failed = fetch_reserve_prices(start, end)
+        if failed:
+            logger.warning("Reserve prices could not be refreshed: %s", ", ".join(failed))
+        return reserves
+    if source == "synthetic":
+        return None
+    df = slice_period(read_frame(source), start, end)
+    columns = [c for c in _RESERVE_COLUMNS if c in df.columns]
+    return df[columns].dropna(how="all") if columns else None
+
+
+def load_context(source, start, end, country="Spain"):
+    """ENTSO-E context series for ``export --context`` (live source only)."""
+    if source != "live":
+        raise DataSourceError("context series are only available from the live source")
+    context, failed = fetch_context_series(start, end, country)
+    if failed:
+        logger.warning("Context series could not be refreshed: %s", ", ".join(failed))
+    return context
+
+
+# Frames of the running batch: {country: (prices, reserves)}. Set in each
+# worker by the pool initializer.
+_FRAMES = {}
+
+
+def _init_worker(frames):
+    global _FRAMES
+    _FRAMES = frames
+
+
+def _run_task(task):
+    """Run one task against ``_FRAMES``; returns ``(summary_row, daily or None)``."""
+    prices, reserves = _FRAMES[task["country"]]
+    window = slice_period(prices, task["start"], task["end"])
+    row = {**task, "source": prices.attrs.get("source", "n/a"), "samples": len(window)}
+    keep_daily = row.pop("keep_daily", False)
+    job = row.pop("job")
+
+    if job == "stats":
+        with span("batch.stats", country=task["country"]):
+            stats = compute_key_stats(window) if len(window) else None
+            if stats:
+                negative_hours, total_hours = count_hours_matching(window, "<", 0)
+                stats["negative_hours"] = negative_hours
+                stats["negative_pct"] = negative_hours / total_hours * 100 if total_hours else 0.0
+        row.update(stats or {})
+        return row, None
+
+    battery = {k: task[k] for k in ("capacity_mwh", "efficiency", "cost_per_mwh")}
+    with span("batch.backtest", country=task["country"], strategy=task["strategy"]):
+        daily, summary = run_backtest(
+            window, task["strategy"],
+            degradation_per_cycle=task.get("degradation_per_cycle") or 0.0,
+            reserves=slice_period(reserves, task["start"], task["end"]),
+            **battery,
+        )
+    row.update(summary or {})
+    if not keep_daily or daily is None:
+        return row, None
+    daily = daily.assign(country=task["country"], strategy=task["strategy"],
+                         period_start=task["start"])
+    return row, daily
+
+
+def run_tasks(frames, tasks, workers=None):
+    """Run ``tasks`` over ``frames`` in a process pool.
+
+    ``frames`` maps each country to ``(prices, reserves)``. Each task is a
+    dict with ``job`` (``"backtest"`` or ``"stats"``), ``country``, ``start``,
+    ``end`` and, for backtests, ``strategy`` and the battery settings of
+    ``run_backtest``; ``keep_daily`` asks for the per-day frame too. Returns
+    ``(summary, daily)``: one summary row per task, in task order, and the
+    concatenated per-day frames (None when none were kept).
+    """
+    if not tasks:
+        return pd.DataFrame(), None
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        _init_worker(frames)
+        try:
+            results = [_run_task(task) for task in tasks]
+        finally:
+            _init_worker({})
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(frames,)) as pool:
+            results = list(pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    summary = pd.DataFrame([row for row, _ in results])
+    dailies = [daily for _, daily in results if daily is not None and not daily.empty]
+    return summary, (pd.concat(dailies, ignore_index=True) if dailies else None)
+
+
+def write_report(df, directory, name, fmt="parquet"):
+    """Write ``df`` to ``<directory>/<name>.<fmt>``; returns the path."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; choose from {list(FORMATS)}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.{fmt}")
+    if fmt == "parquet":
+        df.to_parquet(path)
+    else:
+        df.to_csv(path)
+    return path
+
+
+def export_prices(source, start, end, country="Spain", resample=None, context=False, seed=0):
+    """Prices of one zone (optionally with context, resampled) for ``export``."""
+    df = load_prices(source, start, end, country, seed=seed)
+    if context:
+        df = join_context(df, load_context(source, start, end, country))
+    if resample:
+        source_label = df.attrs.get("source", "n/a")
+        df = df.resample(resample).mean().dropna(how="all")
+        df.attrs["source"] = source_label
+    return df
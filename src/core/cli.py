@@ -0,0 +1,205 @@
+"""Headless batch CLI over the core library.
+
+Run from ``src/``::
+
+    python -m core backtest --start 2024-01-01 --end 2024-12-31 --split month
+    python -m core sweep --start 2016-01-01 --end 2025-12-31 --split year \\
+        --strategy "1 Cycle" "2 Cycles" --capacity 1 2 4 --efficiency 0.8 0.85 0.9
+    python -m core export --start 2025-01-01 --end 2025-06-30 --country Spain Portugal --resample 1h
+
+``backtest`` writes ``backtest_summary`` (one row per zone, window and
+strategy) and ``backtest_daily`` (every simulated day). ``sweep`` runs the
+full grid of battery settings and writes one ``sweep`` summary. ``export``
+writes ``prices_<ZONE>`` per zone plus ``export_stats`` per window. Reports
+go to ``--out`` (default ``REPORTS_DIR``, ``data/reports``) as Parquet or
+CSV. Windows run in parallel worker processes (``--workers``, default one
+per CPU). ``--source synthetic`` runs fully offline.
+"""
+import argparse
+import itertools
+import logging
+import sys
+from typing import Optional
+
+import pandas as pd
+
+from core.backtest import (
+    DEFAULT_CAPACITY_MWH,
+    DEFAULT_COST_PER_MWH,
+    DEFAULT_DEGRADATION,
+    DEFAULT_EFFICIENCY,
+    STRATEGIES,
+    split_periods,
+)
+from core.batch import (
+    COUNTRIES,
+    FORMATS,
+    REPORTS_DIR,
+    export_prices,
+    load_prices,
+    load_reserves,
+    run_tasks,
+    write_report,
+)
+from core.loading import DataSourceError, _ENTSOE_ZONE
+from perf import span
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = ("year", "quarter", "month")
+# Columns echoed to stdout after a run (when present).
+_ECHO_COLUMNS = ["country", "start", "end", "strategy", "capacity_mwh", "efficiency",
+                 "total_benefit", "total_revenue", "roi_percentage", "payback_years",
+                 "avg_price", "arbitrage_value", "negative_pct"]
+
+
+def _date(value):
+    return pd.Timestamp(value).date()
+
+
+def _load_frames(args, with_reserves):
+    """``{country: (prices, reserves)}`` for the whole range."""
+    reserves = load_reserves(args.source, args.start, args.end) if with_reserves else None
+    return {
+        country: (load_prices(args.source, args.start, args.end, country, seed=args.seed), reserves)
+        for country in args.country
+    }
+
+
+def _battery_grid(args):
+    """Distinct battery settings; degradation is dropped for Revenue Stacking."""
+    seen = set()
+    for strategy, capacity, efficiency, cost, degradation in itertools.product(
+        args.strategy, args.capacity, args.efficiency, args.cost, args.degradation
+    ):
+        if strategy == "Revenue Stacking":
+            degradation = None
+        key = (strategy, capacity, efficiency, cost, degradation)
+        if key not in seen:
+            seen.add(key)
+            yield dict(zip(("strategy", "capacity_mwh", "efficiency", "cost_per_mwh",
+                            "degradation_per_cycle"), key))
+
+
+def _backtest_tasks(args, keep_daily):
+    periods = split_periods(args.start, args.end, args.split)
+    return [
+        {"job": "backtest", "country": country, "start": lo, "end": hi,
+         **battery, "keep_daily": keep_daily}
+        for country in args.country
+        for lo, hi in periods
+        for battery in _battery_grid(args)
+    ]
+
+
+def _echo(summary):
+    columns = [c for c in _ECHO_COLUMNS if c in summary.columns]
+    with pd.option_context("display.width", 160, "display.max_rows", 40):
+        print(summary[columns].round(2).to_string(index=False))
+
+
+def cmd_backtest(args):
+    frames = _load_frames(args, "Revenue Stacking" in args.strategy)
+    summary, daily = run_tasks(frames, _backtest_tasks(args, keep_daily=True), args.workers)
+    _echo(summary)
+    paths = [write_report(summary, args.out, "backtest_summary", args.format)]
+    if daily is not None:
+        paths.append(write_report(daily, args.out, "backtest_daily", args.format))
+    return paths
+
+
+def cmd_sweep(args):
+    frames = _load_frames(args, "Revenue Stacking" in args.strategy)
+    tasks = _backtest_tasks(args, keep_daily=False)
+    print(f"{len(tasks)} runs on {args.workers or 'all'} worker(s)")
+    summary, _ = run_tasks(frames, tasks, args.workers)
+    _echo(summary)
+    return [write_report(summary, args.out, "sweep", args.format)]
+
+
+def cmd_export(args):
+    paths = []
+    frames = {}
+    for country in args.country:
+        df = export_prices(args.source, args.start, args.end, country,
+                           resample=args.resample, context=args.context, seed=args.seed)
+        paths.append(write_report(df, args.out, f"prices_{_ENTSOE_ZONE[country]}", args.format))
+        frames[country] = (df, None)
+    tasks = [
+        {"job": "stats", "country": country, "start": lo, "end": hi}
+        for country in args.country
+        for lo, hi in split_periods(args.start, args.end, args.split)
+    ]
+    summary, _ = run_tasks(frames, tasks, args.workers)
+    _echo(summary)
+    paths.append(write_report(summary, args.out, "export_stats", args.format))
+    return paths
+
+
+def _add_battery_args(parser, many):
+    """Strategy and battery options; ``many`` accepts several values each (a grid)."""
+    nargs = "+" if many else None
+    parser.add_argument("--strategy", nargs="+", choices=STRATEGIES, default=["1 Cycle"])
+    parser.add_argument("--capacity", type=float, nargs=nargs, default=DEFAULT_CAPACITY_MWH, help="MWh")
+    parser.add_argument("--efficiency", type=float, nargs=nargs, default=DEFAULT_EFFICIENCY,
+                        help="Round-trip, as a fraction")
+    parser.add_argument("--cost", type=float, nargs=nargs, default=DEFAULT_COST_PER_MWH,
+                        help="€/MWh of capacity")
+    parser.add_argument("--degradation", type=float, nargs=nargs, default=DEFAULT_DEGRADATION,
+                        help="Capacity loss per cycle, as a fraction")
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m core", description="Headless backtests, sweeps and exports")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--start", type=_date, required=True, help="First day (YYYY-MM-DD)")
+    common.add_argument("--end", type=_date, required=True, help="Last day, inclusive")
+    common.add_argument("--country", nargs="+", choices=COUNTRIES, default=["Spain"])
+    common.add_argument("--split", choices=_PERIODS, help="One window per year/quarter/month")
+    common.add_argument("--source", default="live",
+                        help="live, synthetic, or a .parquet/.csv price file")
+    common.add_argument("--seed", type=int, default=0, help="Seed of the synthetic source")
+    common.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    common.add_argument("--out", default=REPORTS_DIR, help="Report directory")
+    common.add_argument("--format", choices=FORMATS, default="parquet")
+    common.add_argument("-v", "--verbose", action="store_true")
+
+    sub = parser.add_subparsers(dest="command", required=True)
+    backtest = sub.add_parser("backtest", parents=[common], help="Backtest one battery per window")
+    _add_battery_args(backtest, many=False)
+    backtest.set_defaults(run=cmd_backtest)
+    sweep = sub.add_parser("sweep", parents=[common], help="Backtest a grid of battery settings")
+    _add_battery_args(sweep, many=True)
+    sweep.set_defaults(run=cmd_sweep)
+    export = sub.add_parser("export", parents=[common], help="Export prices and per-window statistics")
+    export.add_argument("--resample", metavar="RULE", help="pandas offset, e.g. 1h or 1D (mean)")
+    export.add_argument("--context", action="store_true", help="Join ENTSO-E context series (live only)")
+    export.set_defaults(run=cmd_export)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(levelname)s %(name)s: %(message)s")
+    if args.end < args.start:
+        parser.error("--end is before --start")
+    for name in ("capacity", "efficiency", "cost", "degradation"):
+        value = getattr(args, name, None)
+        if value is not None and not isinstance(value, list):
+            setattr(args, name, [value])
+
+    try:
+        with span(f"cli.{args.command}", start=str(args.start), end=str(args.end)):
+            paths = args.run(args)
+    except (DataSourceError, ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    for path in paths:
+        print(f"wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,550 @@
+"""Price and market-context loading without any UI.
+
+Everything the dashboard loads goes through here: ENTSO-E day-ahead prices
+(through the local store, with the OMIEData/MIBEL importer as fallback),
+the ES/PT zone pair, ENTSO-E context series and REN reserve prices. Nothing
+imports Streamlit, so the same code runs in batch jobs and worker processes
+(see ``core.cli``). ``data_loader`` wraps these functions with
+``st.cache_data`` and turns their status into user-facing messages.
+
+The ENTSO-E key comes from ``ENTSOE_API_KEY``; callers with another secret
+store (the app's ``st.secrets``) add it with ``register_key_source``.
+"""
+import os
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+import async_http
+from data_store import get_store
+from perf import timed, wrap
+from price_distribution import infer_step_hours
+
+logger = logging.getLogger(__name__)
+
+
+class DataSourceError(RuntimeError):
+    """Raised when a source could not produce the requested data."""
+
+
+def _sanitize(message: str) -> str:
+    """Strip the ENTSO-E security token (and raw API key) from any string.
+
+    ENTSO-E errors echo the full request URL, which embeds ``securityToken=<key>``
+    in plaintext. We also scrub the raw key value in case it appears elsewhere.
+    """
+    text = str(message)
+    text = re.sub(r"securityToken=[^&\s]+", "securityToken=***", text, flags=re.IGNORECASE)
+    try:
+        key = get_entsoe_key()
+    except Exception:
+        key = None
+    if key:
+        text = text.replace(key, "***")
+    return text
+
+# Mapping from the app's country label to ENTSO-E bidding-zone code.
+# entsoe-py resolves short codes like "ES" / "PT" internally.
+_ENTSOE_ZONE = {
+    "Spain": "ES",
+    "Portugal": "PT",
+}
+
+# Country-selector label for the multi-zone (ES vs PT) comparison mode.
+MULTI_ZONE = "Spain vs Portugal"
+
+# Column order of the aligned multi-zone frame returned by ``fetch_zones``.
+_ZONE_COLUMNS = ["ES", "PT"]
+
+# Local timezone used by the rest of the app (Iberian market, naive timestamps).
+_LOCAL_TZ = "Europe/Madrid"
+
+# Callables tried in order before the environment when looking up the key.
+_KEY_SOURCES = []
+
+
+def register_key_source(source):
+    """Add a zero-argument callable returning the ENTSO-E key (or None)."""
+    if source not in _KEY_SOURCES:
+        _KEY_SOURCES.append(source)
+
+
+def get_entsoe_key():
+    """The ENTSO-E API key from the registered sources or the environment."""
+    for source in _KEY_SOURCES:
+        try:
+            key = source()
+        except Exception as e:
+            logger.debug("ENTSO-E key source %r failed: %s", source, e)
+            continue
+        if key:
+            return key
+    return os.environ.get("ENTSOE_API_KEY")
+
+
+def _to_local_naive_index(series_or_df):
+    """Convert a tz-aware index to Europe/Madrid and drop tz info."""
+    idx = series_or_df.index
+    if getattr(idx, "tz", None) is not None:
+        series_or_df = series_or_df.tz_convert(_LOCAL_TZ).tz_localize(None)
+    return series_or_df
+
+
+# --- ENTSO-E series fetchers ----------------------------------------------
+# Each fetcher takes (client, zone, start_ts, end_ts) with tz-aware bounds and
+# returns a DataFrame whose columns are the app-level series names.
+
+def _fetch_day_ahead(client, zone, start_ts, end_ts):
+    return client.query_day_ahead_prices(zone, start=start_ts, end=end_ts).to_frame(name="price")
+
+
+def _fetch_load(client, zone, start_ts, end_ts):
+    df = client.query_load(zone, start=start_ts, end=end_ts)
+    return pd.DataFrame({"load": df.iloc[:, 0]})
+
+
+def _fetch_load_forecast(client, zone, start_ts, end_ts):
+    df = client.query_load_forecast(zone, start=start_ts, end=end_ts)
+    return pd.DataFrame({"load_forecast": df.iloc[:, 0]})
+
+
+def _sum_columns(df, prefix):
+    cols = [c for c in df.columns if str(c).startswith(prefix)]
+    return df[cols].sum(axis=1, min_count=1) if cols else pd.Series(float("nan"), index=df.index)
+
+
+def _fetch_res_forecast(client, zone, start_ts, end_ts):
+    df = client.query_wind_and_solar_forecast(zone, start=start_ts, end=end_ts)
+    return pd.DataFrame({
+        "wind_forecast": _sum_columns(df, "Wind"),
+        "solar_forecast": _sum_columns(df, "Solar"),
+    })
+
+
+def _fetch_res_actual(client, zone, start_ts, end_ts):
+    df = client.query_generation(zone, start=start_ts, end=end_ts)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.xs("Actual Aggregated", axis=1, level=-1, drop_level=True)
+    return pd.DataFrame({
+        "wind": _sum_columns(df, "Wind"),
+        "solar": _sum_columns(df, "Solar"),
+    })
+
+
+def _net_flow(client, zone_from, zone_to, start_ts, end_ts, name):
+    forward = client.query_crossborder_flows(zone_from, zone_to, start=start_ts, end=end_ts)
+    backward = client.query_crossborder_flows(zone_to, zone_from, start=start_ts, end=end_ts)
+    return pd.DataFrame({name: forward.sub(backward, fill_value=0.0)})
+
+
+def _fetch_flow_es_pt(client, zone, start_ts, end_ts):
+    return _net_flow(client, "ES", "PT", start_ts, end_ts, "flow_es_pt")
+
+
+def _fetch_flow_es_fr(client, zone, start_ts, end_ts):
+    return _net_flow(client, "ES", "FR", start_ts, end_ts, "flow_es_fr")
+
+
+# Datasets ingested into the local store. ``zones`` lists the bidding zones
+# the series applies to; ``partition`` pins border series to one store key
+# so ES and PT share a single copy of the ES–PT flow.
+ENTSOE_SERIES = {
+    "price": {"fetch": _fetch_day_ahead, "zones": ("ES", "PT")},
+    "load": {"fetch": _fetch_load, "zones": ("ES", "PT")},
+    "load_forecast": {"fetch": _fetch_load_forecast, "zones": ("ES", "PT")},
+    "res_forecast": {"fetch": _fetch_res_forecast, "zones": ("ES", "PT")},
+    "res_actual": {"fetch": _fetch_res_actual, "zones": ("ES", "PT")},
+    "flow_es_pt": {"fetch": _fetch_flow_es_pt, "zones": ("ES", "PT"), "partition": "ES-PT"},
+    "flow_es_fr": {"fetch": _fetch_flow_es_fr, "zones": ("ES",), "partition": "ES-FR"},
+}
+
+# Context datasets loaded next to prices (everything except the price itself).
+CONTEXT_DATASETS = [name for name in ENTSOE_SERIES if name != "price"]
+
+# Display labels (with units) for every column the context datasets produce.
+SERIES_LABELS = {
+    "price": "Price (€/MWh)",
+    "load": "Actual load (MW)",
+    "load_forecast": "Load forecast (MW)",
+    "wind_forecast": "Wind forecast (MW)",
+    "solar_forecast": "Solar forecast (MW)",
+    "wind": "Wind generation (MW)",
+    "solar": "Solar generation (MW)",
+    "flow_es_pt": "Net flow ES→PT (MW)",
+    "flow_es_fr": "Net flow ES→FR (MW)",
+}
+
+# Upper bound on days per upstream request; chunks are fetched in parallel
+# (bounded by async_http.HOST_LIMITS for the ENTSO-E host).
+_CHUNK_DAYS = 31
+_ENTSOE_HOST = "web-api.tp.entsoe.eu"
+
+# entsoe-py is blocking; all its clients share one keep-alive pool.
+_ENTSOE_SESSION = None
+_ENTSOE_SESSION_LOCK = threading.Lock()
+
+
+def _entsoe_session():
+    global _ENTSOE_SESSION
+    with _ENTSOE_SESSION_LOCK:
+        if _ENTSOE_SESSION is None:
+            size = async_http.HOST_LIMITS.get(_ENTSOE_HOST, async_http.DEFAULT_HOST_LIMIT)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            _ENTSOE_SESSION = requests.Session()
+            _ENTSOE_SESSION.mount("https://", adapter)
+        return _ENTSOE_SESSION
+
+
+def _chunk_range(lo, hi, days=_CHUNK_DAYS):
+    """Split an inclusive day range into consecutive chunks of ``days``."""
+    chunks = []
+    cursor = lo
+    while cursor <= hi:
+        chunk_end = min(hi, cursor + timedelta(days=days - 1))
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _local_bounds(start_date, end_date):
+    """Tz-aware ``[start, end + 1 day)`` bounds for a local date window."""
+    start_ts = pd.Timestamp(start_date).tz_localize(_LOCAL_TZ)
+    end_ts = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).tz_localize(_LOCAL_TZ)
+    return start_ts, end_ts
+
+
+def _fetch_chunk(api_key, dataset, zone, lo, hi):
+    """Fetch one dataset chunk from ENTSO-E as a UTC-indexed frame."""
+    from entsoe import EntsoePandasClient
+    from entsoe.exceptions import NoMatchingDataError
+
+    # ENTSO-E's "end" is exclusive, so add one day to include the full hi day.
+    start_ts, end_ts = _local_bounds(lo, hi)
+
+    client = EntsoePandasClient(api_key=api_key, session=_entsoe_session())
+    try:
+        df = ENTSOE_SERIES[dataset]["fetch"](client, zone, start_ts, end_ts)
+    except NoMatchingDataError:
+        return None
+    if df is None or df.empty:
+        return None
+
+    df = df.loc[(df.index >= start_ts) & (df.index < end_ts)]
+    return df.tz_convert("UTC").sort_index()
+
+
+def _ingest_chunk(store, api_key, dataset, zone, key, lo, hi):
+    """Fetch one chunk and persist it under the store partition ``key``."""
+    df = _fetch_chunk(api_key, dataset, zone, lo, hi)
+    try:
+        store.write(dataset, key, df)
+        store.mark_covered(dataset, key, lo, hi)
+    except OSError as e:
+        # Read-only deployments still work, just without persistence.
+        logger.warning("Local store write failed for %s: %s", dataset, e)
+    return df
+
+
+@timed()
+def ingest_entsoe_series(datasets, country, start_date, end_date, store=None):
+    """Incrementally ingest ENTSO-E datasets into the local store.
+
+    Only day ranges missing from the store's coverage manifest are fetched;
+    they are split into chunks and fetched concurrently across datasets.
+    Returns ``{dataset: DataFrame or None}`` read back for the full window,
+    plus a list of datasets whose fetch failed (their data may be partial).
+    """
+    api_key = get_entsoe_key()
+    if not api_key:
+        raise RuntimeError("ENTSOE_API_KEY is not configured")
+
+    store = store or get_store()
+    zone = _ENTSOE_ZONE.get(country, "ES")
+    datasets = [d for d in datasets if zone in ENTSOE_SERIES[d]["zones"]]
+
+    tasks = []
+    for dataset in datasets:
+        key = ENTSOE_SERIES[dataset].get("partition", zone)
+        for lo, hi in store.missing_ranges(dataset, key, start_date, end_date):
+            for chunk in _chunk_range(lo, hi):
+                tasks.append((dataset, key, chunk))
+
+    failed = set()
+    fetched = {}
+    if tasks:
+        # Coalesced on the chunk of the store partition (not the zone), so
+        # concurrent sessions asking for the same range - including ES and
+        # PT sharing a border flow - make one upstream request and one write.
+        chunks = async_http.run_all([
+            async_http.run_blocking(
+                ("entsoe", dataset, key, lo, hi), _ENTSOE_HOST,
+                _ingest_chunk, store, api_key, dataset, zone, key, lo, hi,
+            )
+            for dataset, key, (lo, hi) in tasks
+        ], return_exceptions=True)
+        for (dataset, key, (lo, hi)), df in zip(tasks, chunks):
+            if isinstance(df, BaseException):
+                logger.warning("ENTSO-E %s fetch %s→%s failed: %s", dataset, lo, hi, _sanitize(df))
+                failed.add(dataset)
+                continue
+            fetched.setdefault(dataset, []).append(df)
+
+    window_start, window_end = _local_bounds(start_date, end_date)
+    results = {}
+    for dataset in datasets:
+        key = ENTSOE_SERIES[dataset].get("partition", zone)
+        stored = store.read(dataset, key, window_start, window_end)
+        frames = [f for f in [stored] + fetched.get(dataset, []) if f is not None and not f.empty]
+        if not frames:
+            results[dataset] = None
+            continue
+        df = pd.concat(frames).sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        df = df.loc[(df.index >= window_start) & (df.index < window_end)]
+        results[dataset] = _to_local_naive_index(df) if not df.empty else None
+    return results, sorted(failed)
+
+
+def _load_via_entsoe(start_date, end_date, country):
+    """Fetch day-ahead prices from ENTSO-E at native resolution.
+
+    Goes through the local store, so only days not fetched before hit the
+    network. Returns a DataFrame indexed by tz-naive local datetime with a
+    single ``price`` column (EUR/MWh). Raises on any failure so the caller
+    can trigger the MIBEL-library fallback.
+    """
+    results, failed = ingest_entsoe_series(["price"], country, start_date, end_date)
+    if failed:
+        raise RuntimeError("ENTSO-E price fetch failed")
+
+    df = results.get("price")
+    if df is None or df.empty:
+        raise RuntimeError("ENTSO-E returned no data within the requested window")
+
+    df = df[["price"]].copy()
+    df.attrs["source"] = "ENTSO-E"
+    return df
+
+
+def _load_via_mibel_library(start_date, end_date, country):
+    """Legacy MIBEL importer (backed by the OMIEData package, kept as a fallback). Returns hourly prices."""
+    from OMIEData.DataImport.omie_marginalprice_importer import (
+        OMIEMarginalPriceFileImporter,
+    )
+    from OMIEData.Enums.all_enums import DataTypeInMarginalPriceFile
+
+    if not isinstance(start_date, datetime):
+        start_date = datetime.combine(start_date, datetime.min.time())
+    if not isinstance(end_date, datetime):
+        end_date = datetime.combine(end_date, datetime.min.time())
+
+    df = OMIEMarginalPriceFileImporter(
+        date_ini=start_date, date_end=end_date
+    ).read_to_dataframe(verbose=False)
+
+    if df.empty:
+        return None
+
+    if country == "Portugal":
+        str_price = str(DataTypeInMarginalPriceFile.PRICE_PORTUGAL)
+    else:
+        str_price = str(DataTypeInMarginalPriceFile.PRICE_SPAIN)
+
+    result_df = parse_omie_prices(df[df.CONCEPT == str_price])
+    if result_df is None:
+        return None
+    result_df.attrs["source"] = "MIBEL library"
+    return result_df
+
+
+_OMIE_HOURS = [f"H{hour}" for hour in range(1, 25)]
+
+
+def parse_omie_prices(df_prices):
+    """Flatten OMIEData marginal-price rows into an hourly ``price`` frame.
+
+    ``df_prices`` holds one row per day (``DATE`` plus ``H1``..``H24``
+    columns); hour ``Hn`` is stamped ``DATE + (n - 1) h``. ``H25`` is ignored
+    and missing hours stay NaN, as the row-by-row importer did. Returns None
+    when nothing is left.
+    """
+    hours = [c for c in _OMIE_HOURS if c in df_prices.columns]
+    if df_prices.empty or not hours:
+        return None
+    dates = pd.to_datetime(df_prices["DATE"]).to_numpy(dtype="datetime64[ns]")
+    offsets = np.array([int(c[1:]) - 1 for c in hours], dtype="timedelta64[h]")
+    stamps = (dates[:, None] + offsets[None, :]).ravel()
+    prices = df_prices[hours].to_numpy(dtype=float).ravel()
+    result_df = pd.DataFrame(
+        {"price": prices}, index=pd.DatetimeIndex(stamps, name="datetime")
+    )
+    return result_df.sort_index(kind="stable")
+
+
+@timed()
+def fetch_prices(start_date, end_date, country="Spain"):
+    """Fetch one zone's day-ahead prices (thread-safe).
+
+    Primary source: ENTSO-E Transparency Platform (native resolution, may be
+    15-min or 60-min depending on the period/zone). Fallback: MIBEL library
+    via the OMIEData package (hourly) if ENTSO-E fails or returns empty.
+
+    Returns ``(df, status)`` where ``df`` is indexed by tz-naive local
+    ``datetime`` with a single ``price`` column and ``df.attrs['source']``
+    names the provider; ``status`` is ``"ok"``, ``"fallback"`` (served by the
+    MIBEL library) or ``"failed"`` (``df`` is None).
+    """
+    try:
+        return _load_via_entsoe(start_date, end_date, country), "ok"
+    except Exception as e:
+        logger.warning(
+            "ENTSO-E fetch failed for %s, falling back to MIBEL library: %s",
+            country, _sanitize(e),
+        )
+
+    try:
+        df = _load_via_mibel_library(start_date, end_date, country)
+    except Exception as e:
+        logger.exception("MIBEL library fallback failed: %s", _sanitize(e))
+        return None, "failed"
+    if df is None or df.empty:
+        return None, "failed"
+    return df, "fallback"
+
+
+def align_zones(frames):
+    """Align per-zone price frames into one wide frame.
+
+    ``frames`` maps a zone column name (``"ES"``, ``"PT"``) to a DataFrame
+    with a ``price`` column. When zones come back at different resolutions
+    (e.g. one from the hourly MIBEL fallback) the finer one is averaged onto
+    the coarser grid so every row compares like with like. The result has
+    one column per zone plus ``spread`` (first zone minus second).
+    """
+    frames = {k: v for k, v in frames.items() if v is not None and not v.empty}
+    if not frames:
+        return None
+
+    coarsest = max(infer_step_hours(v) for v in frames.values())
+    columns = {}
+    for zone, df in frames.items():
+        price = df["price"]
+        if infer_step_hours(df) < coarsest:
+            price = price.resample(pd.Timedelta(hours=coarsest)).mean().dropna()
+        columns[zone] = price
+
+    wide = pd.DataFrame(columns).sort_index()
+    wide = wide.dropna(how="all")
+    if all(z in wide.columns for z in _ZONE_COLUMNS):
+        wide["spread"] = wide["ES"] - wide["PT"]
+
+    sources = {zone: df.attrs.get("source", "n/a") for zone, df in frames.items()}
+    if len(set(sources.values())) == 1:
+        wide.attrs["source"] = next(iter(sources.values()))
+    else:
+        wide.attrs["source"] = ", ".join(f"{z}: {src}" for z, src in sources.items())
+    return wide
+
+
+@timed()
+def fetch_zones(start_date, end_date):
+    """Fetch ES and PT concurrently into one aligned wide frame.
+
+    Returns ``(wide, statuses)``: ``wide`` has columns ``ES``, ``PT`` and
+    ``spread`` (ES − PT) or is None; ``statuses`` maps each zone to its
+    ``fetch_prices`` status.
+    """
+    countries = {"ES": "Spain", "PT": "Portugal"}
+    with ThreadPoolExecutor(max_workers=len(countries)) as pool:
+        futures = {
+            zone: pool.submit(wrap(fetch_prices), start_date, end_date, country)
+            for zone, country in countries.items()
+        }
+        results = {zone: f.result() for zone, f in futures.items()}
+
+    statuses = {zone: status for zone, (_, status) in results.items()}
+    return align_zones({zone: df for zone, (df, _) in results.items()}), statuses
+
+
+def zone_frame(wide, country):
+    """Return a single-zone ``price`` frame from the wide multi-zone frame."""
+    if wide is None:
+        return None
+    column = _ENTSOE_ZONE.get(country, country)
+    if column not in wide.columns:
+        return None
+    df = wide[[column]].rename(columns={column: "price"}).dropna()
+    df.attrs["source"] = wide.attrs.get("source", "n/a")
+    return df
+
+
+@timed()
+def fetch_context_series(start_date, end_date, country="Spain"):
+    """Load ENTSO-E load, wind/solar and cross-border flow series.
+
+    Served from the local store; only missing days are fetched (concurrently).
+    Returns ``(frame, failed)``: a wide DataFrame at native resolution with
+    the columns listed in ``SERIES_LABELS`` that are available for the zone
+    (or None), and the datasets whose refresh failed. Raises
+    ``DataSourceError`` when ingestion could not run at all.
+    """
+    try:
+        results, failed = ingest_entsoe_series(CONTEXT_DATASETS, country, start_date, end_date)
+    except Exception as e:
+        raise DataSourceError(f"context series ingestion failed: {_sanitize(e)}") from None
+
+    frames = [df for df in results.values() if df is not None and not df.empty]
+    if not frames:
+        return None, failed
+    return pd.concat(frames, axis=1).sort_index(), failed
+
+
+def join_context(price_df, context):
+    """Align context series onto the price index.
+
+    Finer series are averaged onto the price step; coarser ones are
+    forward-filled within their own step, so a 60-min load value covers the
+    four 15-min price slots of that hour. Returns a new frame with ``price``
+    first followed by the context columns.
+    """
+    if price_df is None or context is None or context.empty:
+        return price_df
+
+    # The naive local index repeats the DST fall-back hour; keep its first copy.
+    context = context[~context.index.duplicated(keep="first")]
+    price_step = infer_step_hours(price_df)
+    context_step = infer_step_hours(context)
+    if context_step < price_step:
+        context = context.resample(pd.Timedelta(hours=price_step)).mean()
+    aligned = context.reindex(
+        price_df.index,
+        method="ffill",
+        tolerance=pd.Timedelta(hours=max(price_step, context_step)) - pd.Timedelta(seconds=1),
+    )
+    joined = price_df.join(aligned)
+    joined.attrs = dict(price_df.attrs)
+    return joined
+
+
+@timed()
+def fetch_reserve_prices(start_date, end_date):
+    """Load REN aFRR / mFRR prices (€/MW/h) from the local store.
+
+    Missing days are ingested from the REN API first. Returns ``(wide,
+    failed)``: a frame with ``afrr`` and ``mfrr`` columns on naive
+    Europe/Madrid time (or None), and the products that could not be refreshed.
+    """
+    from ren_api import ingest_reserve_prices
+
+    try:
+        return ingest_reserve_prices(start_date, end_date)
+    except Exception as e:
+        logger.warning("REN reserve price ingestion failed: %s", e)
+        return None, ["afrr", "mfrr"]
@@ -0,0 +1,90 @@
+"""Price statistics behind the dashboard's summary cards (no UI).
+
+``statistics_utils`` renders these; batch jobs write them to reports.
+"""
+import pandas as pd
+
+from perf import timed
+from price_distribution import infer_step_hours
+
+# Zones whose prices differ by less than this (€/MWh) count as coupled.
+COUPLING_TOLERANCE = 0.01
+
+@timed()
+def compute_key_stats(data, show_arbitrage=True):
+    """Average/max/min price plus the arbitrage (or volatility) figure.
+
+    With ``show_arbitrage`` the headline value is the mean daily max-min
+    spread and the average daily max and min are included; otherwise it is
+    the price standard deviation. Returns a dict, or None for empty data.
+    """
+    if data is None or data.empty:
+        return None
+
+    stats = {
+        'avg_price': data['price'].mean(),
+        'max_price': data['price'].max(),
+        'min_price': data['price'].min(),
+        'avg_daily_max': None,
+        'avg_daily_min': None,
+    }
+    if show_arbitrage:
+        df = data.copy()
+        df['date'] = pd.to_datetime(df.index).date
+        daily_stats = df.groupby('date')['price'].agg(['min', 'max'])
+        daily_stats['arbitrage'] = daily_stats['max'] - daily_stats['min']
+        stats['arbitrage_value'] = daily_stats['arbitrage'].mean()
+        stats['avg_daily_max'] = daily_stats['max'].mean()
+        stats['avg_daily_min'] = daily_stats['min'].mean()
+    else:
+        stats['arbitrage_value'] = data['price'].std()
+    return stats
+
+@timed()
+def compute_zone_stats(wide, zones=("ES", "PT")):
+    """Column-wise summary statistics for the aligned multi-zone frame.
+
+    Returns ``(per_zone, coupling)``: ``per_zone`` is a DataFrame indexed by
+    zone with mean/max/min and average daily max-min spread, computed in one
+    aggregation over all zones; ``coupling`` is a dict describing how often
+    the zones cleared at the same price (None without a ``spread`` column).
+    """
+    if wide is None or wide.empty:
+        return None, None
+    zones = [z for z in zones if z in wide.columns]
+    prices = wide[zones]
+
+    per_zone = prices.agg(['mean', 'max', 'min']).T
+    daily = prices.groupby(prices.index.normalize()).agg(['min', 'max'])
+    daily_range = daily.xs('max', axis=1, level=1) - daily.xs('min', axis=1, level=1)
+    per_zone['avg_daily_arbitrage'] = daily_range.mean()
+
+    coupling = None
+    if 'spread' in wide.columns:
+        spread = wide['spread'].dropna()
+        step_hours = infer_step_hours(wide)
+        coupled = spread.abs() < COUPLING_TOLERANCE
+        coupling = {
+            'coupled_pct': float(coupled.mean() * 100) if len(spread) else 0.0,
+            'coupled_hours': float(coupled.sum() * step_hours),
+            'es_premium_hours': float((spread >= COUPLING_TOLERANCE).sum() * step_hours),
+            'pt_premium_hours': float((spread <= -COUPLING_TOLERANCE).sum() * step_hours),
+            'mean_abs_spread': float(spread.abs().mean()) if len(spread) else 0.0,
+            'max_spread': float(spread.max()) if len(spread) else 0.0,
+            'min_spread': float(spread.min()) if len(spread) else 0.0,
+        }
+    return per_zone, coupling
+
+
+def calculate_summary_statistics(daily_stats):
+    """Calculate summary statistics for arbitrage analysis"""
+    if daily_stats.empty:
+        return None
+    
+    return {
+        'median_benefit': daily_stats['daily_benefit'].median(),
+        'std_benefit': daily_stats['daily_benefit'].std(),
+        'mean_benefit': daily_stats['daily_benefit'].mean(),
+        'max_benefit': daily_stats['daily_benefit'].max(),
+        'min_benefit': daily_stats['daily_benefit'].min()
+    }
@@ -0,0 +1,176 @@
+"""Partitioned local store for market time series.
+
+Pure module (no Streamlit). Every series is stored as Parquet partitions
+laid out as ``<root>/<dataset>/<zone>/<year>.parquet`` with a UTC
+``DatetimeIndex`` (so DST fall-back hours stay distinct); callers convert
+to local time on the way out. Next to the partitions, a small ``_coverage.json``
+manifest records which days have already been fetched from upstream so that
+ingestion is incremental: only the missing days are requested again, even
+when a fetched day legitimately had no rows.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_ROOT = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "store")
+)
+STORE_ROOT = os.environ.get("ENERGY_STORE_DIR", _DEFAULT_ROOT)
+
+_COVERAGE_FILE = "_coverage.json"
+
+
+def _as_date(value) -> date:
+    return pd.Timestamp(value).date()
+
+
+def _merge_intervals(intervals: Iterable[tuple[date, date]]) -> list[tuple[date, date]]:
+    """Merge inclusive day intervals that overlap or touch."""
+    merged: list[list[date]] = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return [(lo, hi) for lo, hi in merged]
+
+
+class LocalStore:
+    """Read/write helper around the partitioned Parquet layout.
+
+    Writes are serialised per ``(dataset, zone)`` with a lock, so concurrent
+    ingestion threads can target different series safely.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or STORE_ROOT
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # --- paths / locking -------------------------------------------------
+    def _series_dir(self, dataset: str, zone: str) -> str:
+        return os.path.join(self.root, dataset, zone)
+
+    def _partition_path(self, dataset: str, zone: str, year: int) -> str:
+        return os.path.join(self._series_dir(dataset, zone), f"{year}.parquet")
+
+    def _lock(self, dataset: str, zone: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((dataset, zone), threading.Lock())
+
+    # --- coverage manifest -----------------------------------------------
+    def _read_coverage(self, dataset: str, zone: str) -> list[tuple[date, date]]:
+        path = os.path.join(self._series_dir(dataset, zone), _COVERAGE_FILE)
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+            return [(_as_date(lo), _as_date(hi)) for lo, hi in raw]
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable coverage manifest %s: %s", path, e)
+            return []
+
+    def _write_coverage(self, dataset: str, zone: str, intervals) -> None:
+        directory = self._series_dir(dataset, zone)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, _COVERAGE_FILE)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump([[str(lo), str(hi)] for lo, hi in intervals], fh)
+        os.replace(tmp, path)
+
+    def mark_covered(self, dataset: str, zone: str, start, end) -> None:
+        """Record that ``[start, end]`` (inclusive days) has been fetched.
+
+        Days from today onwards are never marked, since day-ahead and actual
+        series for them may still be incomplete upstream.
+        """
+        lo = _as_date(start)
+        hi = min(_as_date(end), date.today() - timedelta(days=1))
+        if hi < lo:
+            return
+        with self._lock(dataset, zone):
+            intervals = self._read_coverage(dataset, zone)
+            intervals.append((lo, hi))
+            self._write_coverage(dataset, zone, _merge_intervals(intervals))
+
+    def missing_ranges(self, dataset: str, zone: str, start, end) -> list[tuple[date, date]]:
+        """Return the inclusive day ranges in ``[start, end]`` not yet fetched."""
+        lo = _as_date(start)
+        hi = _as_date(end)
+        missing = []
+        cursor = lo
+        for c_lo, c_hi in self._read_coverage(dataset, zone):
+            if c_hi < cursor or c_lo > hi:
+                continue
+            if c_lo > cursor:
+                missing.append((cursor, c_lo - timedelta(days=1)))
+            cursor = max(cursor, c_hi + timedelta(days=1))
+            if cursor > hi:
+                break
+        if cursor <= hi:
+            missing.append((cursor, hi))
+        return missing
+
+    # --- data ------------------------------------------------------------
+    def write(self, dataset: str, zone: str, df: pd.DataFrame) -> None:
+        """Merge ``df`` into the year partitions (new rows win on overlap)."""
+        if df is None or df.empty:
+            return
+        df = df.sort_index()
+        directory = self._series_dir(dataset, zone)
+        with self._lock(dataset, zone):
+            os.makedirs(directory, exist_ok=True)
+            for year, part in df.groupby(df.index.year):
+                path = self._partition_path(dataset, zone, int(year))
+                if os.path.exists(path):
+                    existing = pd.read_parquet(path)
+                    part = pd.concat([existing, part])
+                    part = part[~part.index.duplicated(keep="last")].sort_index()
+                tmp = f"{path}.tmp"
+                part.to_parquet(tmp)
+                os.replace(tmp, path)
+
+    def read(self, dataset: str, zone: str, start, end) -> Optional[pd.DataFrame]:
+        """Return rows in ``[start, end)`` or None when nothing is stored.
+
+        ``start`` / ``end`` are timestamps in the stored index's timezone
+        (tz-aware bounds are converted to UTC).
+        """
+        window_start = pd.Timestamp(start)
+        window_end = pd.Timestamp(end)
+        if window_start.tzinfo is not None:
+            window_start = window_start.tz_convert("UTC")
+            window_end = window_end.tz_convert("UTC")
+        parts = []
+        for year in range(window_start.year, window_end.year + 1):
+            path = self._partition_path(dataset, zone, year)
+            if os.path.exists(path):
+                parts.append(pd.read_parquet(path))
+        if not parts:
+            return None
+        df = pd.concat(parts).sort_index()
+        lo, hi = df.index.searchsorted([window_start, window_end])
+        df = df.iloc[lo:hi]
+        return None if df.empty else df
+
+
+_DEFAULT_STORE: Optional[LocalStore] = None
+
+
+def get_store() -> LocalStore:
+    """Process-wide store rooted at ``STORE_ROOT``."""
+    global _DEFAULT_STORE
+    if _DEFAULT_STORE is None:
+        _DEFAULT_STORE = LocalStore()
+    return _DEFAULT_STORE
@@ -1,6 +1,9 @@
 import pandas as pd
 from datetime import timedelta
 
+from perf import timed
+
+@timed()
 def generate_hourly_forecast(historical_data, forecast_hours=24):
     """
     Generate hourly forecast based on mean of past 7 days at homologue hour.
@@ -1,5 +1,14 @@
-"""LLM chat feature package."""
+"""LLM chat feature package.
 
-from llm_chat.chat_tab import render_chat_tab
+``render_chat_tab`` is imported on first use so that the pure parts
+(``llm_chat.executor``, ``llm_chat.schema``) can be used without Streamlit.
+"""
 
 __all__ = ["render_chat_tab"]
+
+
+def __getattr__(name):
+    if name == "render_chat_tab":
+        from llm_chat.chat_tab import render_chat_tab
+        return render_chat_tab
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
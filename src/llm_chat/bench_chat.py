@@ -0,0 +1,189 @@
+"""Chat latency benchmark against the local OpenRouter stand-in.
+
+Drives N concurrent simulated users through the same pipeline as the chat
+tab (route -> plan -> execute -> figures -> explain) on a synthetic hourly
+price series and reports end-to-end and per-stage latency percentiles,
+plus the client's call metrics and the mock server's counters.
+
+Questions come from ``data/chat_questions.jsonl``; each user asks
+``--questions`` of them, drawn with a fixed seed. Plans and results are
+cached in memory only, so runs never touch the on-disk plan cache. By
+default the stand-in from ``llm_chat.mock_openrouter`` is started in-process;
+pass ``--base-url`` to benchmark another endpoint instead.
+
+Run from ``src/``::
+
+    python -m llm_chat.bench_chat --users 8 --questions 10 --latency 1.2 --rate-limit-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from llm_chat import mock_openrouter, openrouter_client
+from llm_chat.executor import execute
+from llm_chat.explainer import explain_stream
+from llm_chat.openrouter_client import OpenRouterError, get_metrics, reset_metrics
+from llm_chat.plan_cache import PlanCache
+from llm_chat.planner import build_df_meta, plan_question
+from llm_chat.plot_rules import build_figures
+from llm_chat.result_cache import ResultCache, cached_execute
+from llm_chat.router import QUESTIONS_PATH, route_question
+from synthetic_prices import synthetic_prices
+
+STAGES = ("route", "plan", "execute", "figures", "explain_first", "explain", "total")
+
+
+def _load_questions(path: str) -> list[str]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line)["question"] for line in fh if line.strip()]
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"n": 0}
+    arr = np.asarray(values) * 1000.0
+    return {
+        "n": len(values),
+        "mean_ms": round(float(arr.mean()), 1),
+        "p50_ms": round(float(np.percentile(arr, 50)), 1),
+        "p90_ms": round(float(np.percentile(arr, 90)), 1),
+        "p99_ms": round(float(np.percentile(arr, 99)), 1),
+        "max_ms": round(float(arr.max()), 1),
+    }
+
+
+def run_benchmark(df: pd.DataFrame, questions: list[str], users: int, per_user: int,
+                  rich: bool = False, use_cache: bool = True, seed: int = 0) -> dict:
+    """Run the simulated users; returns the report dict (no server stats)."""
+    plan_cache = PlanCache(path=None)
+    result_cache = ResultCache()
+    df_meta = build_df_meta(df, country="ES")
+    reset_metrics()
+
+    def one_question(question: str) -> dict:
+        timings: dict = {}
+        outcome = {"timings": timings, "routed": False, "intent": None, "error": None}
+        t0 = time.perf_counter()
+        try:
+            t = time.perf_counter()
+            routed = route_question(question, df_meta)
+            timings["route"] = time.perf_counter() - t
+            if routed.confident:
+                plan = routed.plan
+                outcome["routed"] = True
+            else:
+                t = time.perf_counter()
+                plan = plan_question(question, df_meta, cache=plan_cache, use_cache=use_cache)
+                timings["plan"] = time.perf_counter() - t
+            outcome["intent"] = plan.intent
+
+            t = time.perf_counter()
+            result = cached_execute(plan, df, cache=result_cache) if use_cache else execute(plan, df)
+            timings["execute"] = time.perf_counter() - t
+
+            t = time.perf_counter()
+            build_figures(result)
+            timings["figures"] = time.perf_counter() - t
+
+            t = time.perf_counter()
+            for _ in explain_stream(question, plan, result, rich=rich):
+                timings.setdefault("explain_first", time.perf_counter() - t)
+            timings["explain"] = time.perf_counter() - t
+        except OpenRouterError as e:
+            outcome["error"] = f"openrouter: {e}"
+        except Exception as e:  # noqa: BLE001 - report, keep the other users going
+            outcome["error"] = f"{type(e).__name__}: {e}"
+        timings["total"] = time.perf_counter() - t0
+        return outcome
+
+    def one_user(user: int) -> list[dict]:
+        rng = random.Random(seed * 1000 + user)
+        return [one_question(rng.choice(questions)) for _ in range(per_user)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users, thread_name_prefix="bench-user") as pool:
+        outcomes = [o for batch in pool.map(one_user, range(users)) for o in batch]
+    wall = time.perf_counter() - started
+
+    ok = [o for o in outcomes if o["error"] is None]
+    errors = [o["error"] for o in outcomes if o["error"] is not None]
+    return {
+        "users": users,
+        "questions": len(outcomes),
+        "ok": len(ok),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "routed_share": round(sum(o["routed"] for o in outcomes) / len(outcomes), 3) if outcomes else 0.0,
+        "wall_s": round(wall, 2),
+        "throughput_qps": round(len(outcomes) / wall, 2) if wall > 0 else 0.0,
+        "stages": {s: _percentiles([o["timings"][s] for o in ok if s in o["timings"]]) for s in STAGES},
+        "plan_cache": {"hits": plan_cache.hits, "misses": plan_cache.misses},
+        "result_cache": result_cache.stats(),
+        "client": get_metrics(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chat pipeline against a mock OpenRouter")
+    parser.add_argument("--users", type=int, default=4, help="Concurrent simulated users")
+    parser.add_argument("--questions", type=int, default=5, help="Questions asked by each user")
+    parser.add_argument("--questions-file", help="Defaults to data/chat_questions.jsonl")
+    parser.add_argument("--rich", action="store_true", help="Stream LLM answers instead of templates")
+    parser.add_argument("--no-cache", action="store_true", help="Disable plan and result caches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", help="Benchmark this endpoint instead of the in-process mock")
+    parser.add_argument("--rpm", type=float, default=6000.0, help="Client rate limit (requests/minute)")
+    parser.add_argument("--burst", type=float, default=50.0, help="Client rate-limit burst")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock median latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--replay", help="JSONL of {match, content} completions for the mock")
+    parser.add_argument("--out", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        os.environ.setdefault("OPENROUTER_API_KEY", "mock")
+    openrouter_client.set_rate_limit(args.rpm, args.burst)
+
+    df = synthetic_prices("2023-01-01", "2025-06-30", resolution="60min", seed=args.seed)
+    questions = _load_questions(args.questions_file or QUESTIONS_PATH)
+
+    def bench() -> dict:
+        return run_benchmark(df, questions, args.users, args.questions,
+                             rich=args.rich, use_cache=not args.no_cache, seed=args.seed)
+
+    if args.base_url:
+        openrouter_client.OPENROUTER_BASE_URL = args.base_url.rstrip("/")
+        report = bench()
+    else:
+        config = mock_openrouter.MockConfig(
+            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+            chunk_delay=args.chunk_delay, seed=args.seed,
+            replay=mock_openrouter.load_replay(args.replay) if args.replay else [],
+        )
+        with mock_openrouter.serve_mock_openrouter(config) as server:
+            openrouter_client.OPENROUTER_BASE_URL = server.base_url
+            report = bench()
+            report["server"] = dict(server.counts)
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,109 @@
 """LLM chat UI for the MIBEL tab.
 
-Single-shot, data-aware Q&A box. Plans -> executes -> explains -> plots.
-Only the most recent turn is kept on screen.
+Multi-turn, data-aware Q&A. Plans -> executes -> plots -> explains. The
+figure is drawn as soon as the executor returns and the explanation is
+streamed into the answer bubble token by token.
+
+History lives in ``session_store`` (one bounded JSON file per session).
+Signed-in users (``st.user``) are keyed on their account; anyone else on a
+random id kept in ``st.session_state`` and in a browser cookie so it
+survives reloads. Nothing identifying goes in the URL, so shared links
+never carry a conversation. Turns hold plan dicts, summaries and result-cache keys only;
+figures of the last few turns are rebuilt from the result cache on each
+rerun, and the turns are handed to the planner so follow-ups ("and in
+August?") resolve against the conversation.
 """
 
 from __future__ import annotations
 
 import logging
-import time
+import os
+import re
+import uuid
 
 import pandas as pd
 import streamlit as st
 
-from llm_chat.executor import execute
-from llm_chat.explainer import explain
+from calendar_features import get_calendar_features
+from llm_chat.explainer import explain_stream
 from llm_chat.openrouter_client import OpenRouterError
-from llm_chat.plot_rules import build_figure
+from llm_chat.plot_rules import build_figures
 from llm_chat.planner import build_df_meta, plan_question
+from llm_chat.result_cache import cached_execute, dataset_key, get_result_cache, key_dataset
+from llm_chat.router import route_question
+from llm_chat.schema import PlanValidationError, plan_to_dict, validate_plan
+from llm_chat.session_store import DEFAULT_TTL_SECONDS, get_session_store
+from perf import span, timed
 
 logger = logging.getLogger(__name__)
 
-_LAST_TURN_KEY = "llm_chat_last_turn"
-_TURN_COUNTER_KEY = "llm_chat_turn_counter"
+_SESSION_COOKIE = "mibel_chat_session"
+_SESSION_KEY = "llm_chat_session_id"
+_SESSION_ID_RE = re.compile(r"[0-9a-f]{32}")
 _MAX_QUESTION_CHARS = 500
+_RICH_KEY = "llm_chat_rich_answers"
+# Turns shown on screen, and the most recent of them that get their chart.
+_VISIBLE_TURNS = 10
+_FIGURE_TURNS = 3
+
+
+def _session_id() -> str:
+    """Chat session of this user: the signed-in account, else a browser cookie."""
+    if st.user.get("is_logged_in"):
+        account = st.user.get("sub") or st.user.get("email")
+        if account:
+            return f"user:{account}"
+    sid = st.session_state.get(_SESSION_KEY)
+    if sid:
+        return sid
+    sid = str(st.context.cookies.get(_SESSION_COOKIE) or "")
+    if not _SESSION_ID_RE.fullmatch(sid):
+        sid = uuid.uuid4().hex
+        # Read back from the request headers (``st.context.cookies``) on the next visit.
+        st.html(
+            f"<script>document.cookie = '{_SESSION_COOKIE}={sid}; path=/; "
+            f"max-age={DEFAULT_TTL_SECONDS}; SameSite=Strict';</script>",
+            unsafe_allow_javascript=True,
+        )
+    st.session_state[_SESSION_KEY] = sid
+    return sid
+
 
+@timed()
+def _turn_figures(turn: dict, df: pd.DataFrame, data_key: str) -> list:
+    """Figures of a stored turn, from the result cache (recomputed on a miss).
 
-def _render_last_turn(entry: dict) -> None:
-    """Render the single most recent Q&A. No history is kept."""
+    Turns answered on another dataset (zone or date range changed) get none.
+    """
+    key = turn.get("result_key")
+    if not key or key_dataset(key) != data_key:
+        return []
+    try:
+        result = get_result_cache().get_key(key, df)
+        if result is None:
+            result = cached_execute(validate_plan(turn["plan_dict"]), df, key=key)
+        return build_figures(result)
+    except (PlanValidationError, KeyError):
+        return []
+    except Exception:  # noqa: BLE001 - a stale turn must not break the tab
+        logger.exception("chat_tab could not rebuild figures for turn %s", turn.get("turn"))
+        return []
+
+
+def _render_turn(turn: dict, figs: list) -> None:
     with st.chat_message("user"):
-        st.markdown(entry["question"])
+        st.markdown(turn["question"])
     with st.chat_message("assistant"):
-        st.markdown(entry["answer"])
-        fig = entry.get("fig")
-        if fig is not None:
+        st.markdown(turn["answer"])
+        for i, fig in enumerate(figs):
             st.plotly_chart(
                 fig,
                 use_container_width=True,
-                key=f"llm_fig_{entry.get('turn', 0)}",
+                key=f"llm_fig_{turn.get('turn', 0)}_{i}",
             )
 
 
+@timed()
 def render_chat_tab(df: pd.DataFrame, country: str) -> None:
     """Render the data-aware LLM Q&A box.
 
@@ -59,6 +123,21 @@ def render_chat_tab(df: pd.DataFrame, country: str) -> None:
     if df is None or df.empty:
         st.info("Load data first to enable the chat.")
         return
+    # Decompose the index once per dataset; every question reuses it.
+    get_calendar_features(df)
+
+    rich = st.toggle(
+        "Detailed answers (LLM)",
+        value=os.environ.get("CHAT_RICH_ANSWERS") == "1",
+        key=_RICH_KEY,
+        help="Word the answer with the language model instead of the built-in templates. Slower.",
+    )
+
+    store = get_session_store()
+    session_id = _session_id()
+    if st.button("New chat", key="llm_chat_new"):
+        store.clear(session_id)
+    history = store.load(session_id)
 
     with st.form(key="llm_chat_form", clear_on_submit=True):
         question = st.text_input(
@@ -69,6 +148,12 @@ def render_chat_tab(df: pd.DataFrame, country: str) -> None:
         )
         submitted = st.form_submit_button("Ask", type="primary")
 
+    data_key = dataset_key(df)
+    shown = history[-_VISIBLE_TURNS:]
+    for i, turn in enumerate(shown):
+        recent = i >= len(shown) - _FIGURE_TURNS
+        _render_turn(turn, _turn_figures(turn, df, data_key) if recent else [])
+
     if submitted and question and question.strip():
         # Hard cap on input length to limit token usage and abuse.
         question = question.strip()
@@ -78,20 +163,27 @@ def render_chat_tab(df: pd.DataFrame, country: str) -> None:
                 f"Question was truncated to {_MAX_QUESTION_CHARS} characters."
             )
 
-        # Single-shot: forget the previous turn before processing.
-        st.session_state.pop(_LAST_TURN_KEY, None)
-
         with st.chat_message("user"):
             st.markdown(question)
 
         with st.chat_message("assistant"):
+            # Answer first, figure below it; the answer slot is filled last.
+            answer_slot = st.empty()
             with st.spinner("Thinking..."):
                 df_meta = build_df_meta(df, country=country)
                 try:
-                    plan = plan_question(question, df_meta)
-                    result = execute(plan, df)
-                    answer = explain(question, plan, result)
-                    fig = build_figure(result)
+                    # Unambiguous questions skip the LLM planner entirely;
+                    # follow-ups are deferred to it along with the history.
+                    routed = route_question(question, df_meta, history)
+                    if routed.confident:
+                        plan = routed.plan
+                        logger.debug("routed %r via %s (%.2f)", question, routed.rule, routed.confidence)
+                    else:
+                        plan = plan_question(question, df_meta, history=history)
+                    # A plan repeated from an earlier turn is served from the cache.
+                    result_key = get_result_cache().make_key(plan, df, data_key)
+                    result = cached_execute(plan, df, key=result_key)
+                    figs = build_figures(result)
                 except OpenRouterError as e:
                     logger.warning("OpenRouter call failed: %s", e)
                     st.error(
@@ -109,23 +201,26 @@ def render_chat_tab(df: pd.DataFrame, country: str) -> None:
                     )
                     return
 
-            st.markdown(answer)
-            turn_id = st.session_state.get(_TURN_COUNTER_KEY, 0) + 1
-            if fig is not None:
-                st.plotly_chart(
-                    fig, use_container_width=True, key=f"llm_fig_new_{turn_id}"
-                )
+            turn_id = (history[-1]["turn"] + 1) if history else 1
+            with span("chat.draw_figures", figures=len(figs)):
+                for i, fig in enumerate(figs):
+                    st.plotly_chart(
+                        fig, use_container_width=True, key=f"llm_fig_new_{turn_id}_{i}"
+                    )
+
+            # explain_stream never raises; it falls back to the summary.
+            answer = ""
+            with span("chat.explain", rich=rich):
+                for fragment in explain_stream(question, plan, result, rich=rich):
+                    answer += fragment
+                    answer_slot.markdown(answer + "▌")
+            answer = answer.strip()
+            answer_slot.markdown(answer)
 
-        st.session_state[_TURN_COUNTER_KEY] = turn_id
-        st.session_state[_LAST_TURN_KEY] = {
+        store.append(session_id, {
             "question": question,
             "answer": answer,
-            "fig": fig,
-            "turn": turn_id,
-        }
-    else:
-        # No new question this rerun — re-render the last turn if any
-        # (e.g., after interacting with a Plotly chart triggers a rerun).
-        last = st.session_state.get(_LAST_TURN_KEY)
-        if last is not None:
-            _render_last_turn(last)
+            "plan_dict": plan_to_dict(plan),
+            "summary": result.summary_for_llm,
+            "result_key": result_key,
+        })
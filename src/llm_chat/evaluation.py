@@ -0,0 +1,253 @@
+"""Planner accuracy and latency evaluation on the labelled question set.
+
+Runs every labelled question in ``data/chat_questions.jsonl`` through
+``plan_question`` (one model, no plan cache, no hedging) or through the
+fast-path router, several at a time, and scores the plans:
+
+``intent_accuracy``  share of questions whose intent matches the label
+``field_accuracy``   share of labelled plan fields that match
+``retries``          validation re-asks the planner needed
+tokens / latency     from the OpenRouter usage of each question
+
+A question's label is its ``planner`` dict when present, else its
+``expected`` plan; only the fields present in the label are compared, so
+``{"intent": "compare"}`` accepts any periods. Unlabelled questions still
+run and count towards latency.
+
+LLM answers are cached in ``data/cache/eval_cache.json`` per (planner prompt
+hash, model), so after editing ``SYSTEM_PROMPT`` only the new prompt runs
+and a repeated run re-scores from the cache. Failed calls are not cached.
+
+Run from ``src/``::
+
+    python -m llm_chat.evaluation --model nvidia/nemotron-3-super-120b-a12b:free --concurrency 4
+    python -m llm_chat.evaluation --router
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from llm_chat.openrouter_client import DEFAULT_MODEL
+from llm_chat.planner import SYSTEM_PROMPT, plan_question
+from llm_chat.router import DEFAULT_META, QUESTIONS_PATH, load_labelled_questions, route_question
+from llm_chat.schema import Plan, PlanValidationError, plan_to_dict, validate_plan
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "cache", "eval_cache.json")
+)
+EVAL_CACHE_PATH = os.environ.get("EVAL_CACHE_PATH", _DEFAULT_PATH)
+
+# Planner hints that mean the call failed rather than the model declining.
+_FAILURE_PREFIXES = ("LLM error", "could not parse", "no model configured")
+
+
+def prompt_hash(prompt: str = SYSTEM_PROMPT) -> str:
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def _item_key(question: str, df_meta: dict) -> str:
+    payload = json.dumps([question, df_meta], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def label_of(item: dict) -> Optional[dict]:
+    """Expected plan fields for a corpus item, or None if unlabelled."""
+    return item.get("planner") or item.get("expected")
+
+
+def score_plan(label: dict, plan: Plan) -> dict:
+    """Compare ``plan`` with the fields present in ``label``."""
+    try:
+        want = plan_to_dict(validate_plan(label))
+    except PlanValidationError:
+        want = dict(label)
+    got = plan_to_dict(plan)
+    fields = [k for k in label if k != "explanation_hint"]
+    wrong = [k for k in fields if got.get(k) != want.get(k)]
+    return {
+        "intent_ok": got["intent"] == want.get("intent"),
+        "fields": len(fields),
+        "fields_ok": len(fields) - len(wrong),
+        "wrong": wrong,
+    }
+
+
+def _load_cache(path: Optional[str]) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as e:
+        logger.warning("Evaluation cache unreadable, starting empty: %s", e)
+        return {}
+
+
+def _save_cache(path: Optional[str], data: dict) -> None:
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Evaluation cache write failed: %s", e)
+
+
+def _run_llm(question: str, df_meta: dict, model: str) -> dict:
+    trace: dict = {}
+    started = time.perf_counter()
+    plan = plan_question(question, df_meta, model=model, use_cache=False,
+                         fallback_models=[], hedge_delay=0, trace=trace)
+    record = {
+        "plan": plan_to_dict(plan),
+        "latency_s": round(time.perf_counter() - started, 4),
+        "calls": trace.get("calls", 0),
+        "retries": trace.get("retries", 0),
+        "prompt_tokens": trace.get("prompt_tokens", 0),
+        "completion_tokens": trace.get("completion_tokens", 0),
+        "error": None,
+    }
+    if plan.intent == "unsupported" and plan.explanation_hint.startswith(_FAILURE_PREFIXES):
+        record["error"] = plan.explanation_hint
+    return record
+
+
+def _run_router(question: str, df_meta: dict) -> dict:
+    started = time.perf_counter()
+    routed = route_question(question, df_meta)
+    plan = routed.plan if routed.confident else Plan(intent="unsupported")
+    return {
+        "plan": plan_to_dict(plan),
+        "latency_s": round(time.perf_counter() - started, 6),
+        "calls": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0,
+        "error": None,
+        "deferred": not routed.confident,
+    }
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000.0, 2) if values else 0.0
+
+
+def evaluate(model: Optional[str] = None, router: bool = False, path: str = QUESTIONS_PATH,
+             concurrency: int = 4, cache_path: Optional[str] = EVAL_CACHE_PATH,
+             use_cache: bool = True) -> dict:
+    """Run and score the labelled set; see module docstring for the metrics.
+
+    ``router=True`` evaluates the fast-path router instead of the LLM (never
+    cached; deferred questions count as ``unsupported``). ``cache_path=None``
+    keeps results in memory only; ``use_cache=False`` re-runs everything.
+    """
+    items = load_labelled_questions(path)
+    model = "router" if router else (model or DEFAULT_MODEL)
+    bucket_key = f"{prompt_hash()}|{model}"
+    cache = _load_cache(cache_path) if not router else {}
+    bucket = cache.setdefault(bucket_key, {}) if use_cache else {}
+    lock = threading.Lock()
+
+    def run(item: dict) -> dict:
+        meta = item.get("df_meta") or DEFAULT_META
+        key = _item_key(item["question"], meta)
+        with lock:
+            record = bucket.get(key)
+        if record is not None:
+            return dict(record, cached=True)
+        record = _run_router(item["question"], meta) if router else _run_llm(item["question"], meta, model)
+        if record["error"] is None and not router:
+            with lock:
+                bucket[key] = record
+        return dict(record, cached=False)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="plan-eval") as pool:
+        records = list(pool.map(run, items))
+    wall = time.perf_counter() - started
+    if not router and use_cache:
+        _save_cache(cache_path, cache)
+
+    scored = fields = fields_ok = intents_ok = 0
+    mismatches = []
+    for item, record in zip(items, records):
+        label = label_of(item)
+        if label is None or record["error"] is not None:
+            continue
+        score = score_plan(label, validate_plan(record["plan"]))
+        scored += 1
+        intents_ok += score["intent_ok"]
+        fields += score["fields"]
+        fields_ok += score["fields_ok"]
+        if score["wrong"]:
+            got = {k: record["plan"].get(k) for k in score["wrong"]}
+            mismatches.append({"question": item["question"], "wrong": score["wrong"],
+                               "got": got, "expected": label})
+
+    fresh = [r for r in records if not r["cached"]]
+    latencies = [r["latency_s"] for r in records if r["error"] is None]
+    report = {
+        "model": model,
+        "prompt_hash": prompt_hash(),
+        "n": len(items),
+        "scored": scored,
+        "ran": len(fresh),
+        "cached": len(records) - len(fresh),
+        "failed": sum(r["error"] is not None for r in records),
+        "intent_accuracy": round(intents_ok / scored, 3) if scored else 0.0,
+        "field_accuracy": round(fields_ok / fields, 3) if fields else 0.0,
+        "retries": sum(r["retries"] for r in records),
+        "calls": sum(r["calls"] for r in fresh),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+        "completion_tokens": sum(r["completion_tokens"] for r in records),
+        "latency_p50_ms": _percentile(latencies, 50),
+        "latency_p90_ms": _percentile(latencies, 90),
+        "wall_s": round(wall, 2),
+        "mismatches": mismatches,
+        "failures": [{"question": i["question"], "error": r["error"]}
+                     for i, r in zip(items, records) if r["error"] is not None],
+    }
+    if router:
+        report["deferred"] = sum(r["deferred"] for r in records)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the chat planner on the labelled questions")
+    parser.add_argument("--model", help=f"OpenRouter model (default {DEFAULT_MODEL})")
+    parser.add_argument("--router", action="store_true", help="Evaluate the fast-path router instead")
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true", help="Re-run every question")
+    parser.add_argument("--show-errors", action="store_true", help="Print mismatches and failures")
+    parser.add_argument("--out", help="Also write the full report to this JSON file")
+    args = parser.parse_args()
+
+    report = evaluate(model=args.model, router=args.router, path=args.questions,
+                      concurrency=args.concurrency, use_cache=not args.no_cache)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+    mismatches = report.pop("mismatches")
+    failures = report.pop("failures")
+    print(json.dumps(report, indent=2))
+    if args.show_errors:
+        for row in mismatches + failures:
+            print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,30 @@
 """Deterministic executor that turns a validated ``Plan`` into a ``Result``.
 
 No LLM involvement here. Operates on the in-memory MIBEL DataFrame which
-has a tz-naive ``DatetimeIndex`` and a single ``price`` column (€/MWh).
+has a tz-naive ``DatetimeIndex`` and a ``price`` column (€/MWh), optionally
+joined with ENTSO-E context columns (load, wind/solar, flows; MW) that
+``Plan.column`` can select for the intents in ``COLUMN_INTENTS``.
+
+``multi`` plans run their steps as a small DAG: independent steps execute
+concurrently on a shared thread pool, a step with ``window_from`` starts once
+the step it depends on has finished, and identical steps within one turn are
+computed once.
 """
 
 from __future__ import annotations
 
+import json
 import operator as op_mod
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import replace
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
-from llm_chat.schema import Plan, Result
+from calendar_features import day_code_to_timestamp, get_calendar_features
+from llm_chat.schema import Plan, Result, TimeWindow, plan_to_dict
 
 
 _OP_FUNCS = {
@@ -22,44 +36,144 @@ _OP_FUNCS = {
 }
 
 
-def _apply_window(df: pd.DataFrame, plan: Plan) -> pd.DataFrame:
-    """Slice df to plan.time_window, clamping to the loaded range."""
-    if plan.time_window.start is None and plan.time_window.end is None:
-        return df
+def _unit(column: str) -> str:
+    return "EUR/MWh" if column == "price" else "MW"
+
+
+def _missing_column(intent: str, column: str) -> Result:
+    return Result(
+        intent=intent,
+        plot_kind="none",
+        summary_for_llm=f"series {column!r} is not loaded for this dataset",
+    )
+
+
+def _slice_positions(index: pd.DatetimeIndex, lo, hi) -> tuple[int, int]:
+    """Row range ``[i, j)`` of the sorted index with ``lo <= ts <= hi``.
+
+    Two binary searches instead of two full boolean masks, so slicing costs
+    O(log n) and ``df.iloc[i:j]`` is a view rather than a copy. ``None``
+    bounds are open; ``execute`` guarantees the index is sorted.
+    """
+    i = int(index.searchsorted(lo, side="left")) if lo is not None else 0
+    j = int(index.searchsorted(hi, side="right")) if hi is not None else len(index)
+    return i, max(i, j)
+
+
+def _end_of_day(day) -> pd.Timestamp:
+    return pd.Timestamp(day) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+
+
+def _window_positions(df: pd.DataFrame, plan: Plan) -> tuple[int, int]:
+    """Half-open row range ``[lo, hi)`` of df inside plan.time_window."""
     start = plan.time_window.start
     end = plan.time_window.end
-    lo = pd.Timestamp(start) if start else df.index.min()
-    # End-of-day inclusive
-    hi = (
-        pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-        if end
-        else df.index.max()
+    # End-of-day inclusive; missing bounds clamp to the loaded range.
+    return _slice_positions(
+        df.index,
+        pd.Timestamp(start) if start else None,
+        _end_of_day(end) if end else None,
     )
-    return df.loc[(df.index >= lo) & (df.index <= hi)]
+
+
+def _apply_window(df: pd.DataFrame, plan: Plan) -> pd.DataFrame:
+    """Slice df to plan.time_window, clamping to the loaded range."""
+    lo, hi = _window_positions(df, plan)
+    return df.iloc[lo:hi]
+
+
+def _apply_window_features(
+    df: pd.DataFrame, plan: Plan
+) -> tuple[pd.DataFrame, pd.DataFrame, int, int]:
+    """Like ``_apply_window`` but also returns the matching calendar features.
+
+    Returns ``(sub, feats, lo, hi)``; ``feats`` is positionally aligned with
+    ``sub`` and ``lo:hi`` locates both inside the full frame.
+    """
+    lo, hi = _window_positions(df, plan)
+    return df.iloc[lo:hi], get_calendar_features(df).iloc[lo:hi], lo, hi
+
+
+def _full_mask(df: pd.DataFrame, lo: int, window_mask: np.ndarray) -> pd.Series:
+    """Window-level boolean mask aligned to df (False outside the window)."""
+    full = np.zeros(len(df), dtype=bool)
+    full[lo : lo + len(window_mask)] = window_mask
+    return pd.Series(full, index=df.index)
+
+
+def _day_starts(day: np.ndarray) -> np.ndarray:
+    """Start position of each day's block in a sorted day-code array."""
+    return np.concatenate(([0], np.flatnonzero(np.diff(day)) + 1))
+
+
+def _daily_reduce(values: np.ndarray, day: np.ndarray, how: str) -> tuple[np.ndarray, np.ndarray]:
+    """Reduce ``values`` per calendar day with ``ufunc.reduceat``.
+
+    ``day`` is the (sorted) day-code column for the same rows, so every day
+    is one contiguous block. Returns ``(day_codes, reduced)``; NaNs are
+    skipped like a pandas groupby would.
+    """
+    starts = _day_starts(day)
+    if how == "min":
+        return day[starts], np.fmin.reduceat(values, starts)
+    if how == "max":
+        return day[starts], np.fmax.reduceat(values, starts)
+    # mean
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return day[starts], sums / counts
+
+
+# group_by -> calendar-feature column holding the group code.
+_GROUP_FEATURES = {"hour_of_day": "hour", "day_of_week": "dow", "month": "month", "date": "day"}
+
+
+def _group_key(feats: pd.DataFrame, group_by: str) -> np.ndarray:
+    """Integer group code per row (``dow`` 0=Monday, ``day`` = day code)."""
+    if group_by not in _GROUP_FEATURES:
+        # Defensive; validate_plan should have caught this.
+        raise ValueError(f"unknown group_by: {group_by}")
+    return feats[_GROUP_FEATURES[group_by]].to_numpy()
+
+
+def _group_index(codes: np.ndarray, group_by: str) -> pd.Index:
+    """Index of group labels (dates for ``date``, ints otherwise)."""
+    if group_by == "date":
+        index = pd.Index(day_code_to_timestamp(codes).date)
+    else:
+        index = pd.Index(np.asarray(codes).astype(int))
+    index.name = group_by
+    return index
 
 
 def _execute_extremum(df: pd.DataFrame, plan: Plan) -> Result:
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("extremum", col)
     sub = _apply_window(df, plan)
-    if sub.empty:
+    values = sub[col].dropna()
+    if values.empty:
         return Result(
             intent="extremum",
             plot_kind="none",
             summary_for_llm="no data in the requested window",
         )
     if plan.extremum_kind == "max":
-        idx = sub["price"].idxmax()
+        idx = values.idxmax()
     else:
-        idx = sub["price"].idxmin()
-    value = float(sub.loc[idx, "price"])
+        idx = values.idxmin()
+    value = float(values.loc[idx])
     ts = pd.Timestamp(idx)
 
     # Day-slice for plotting: full day containing the extremum.
     day_start = ts.normalize()
-    day_end = day_start + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-    day_df = df.loc[(df.index >= day_start) & (df.index <= day_end)].copy()
+    i, j = _slice_positions(df.index, day_start, _end_of_day(day_start))
+    day_df = df.iloc[i:j]
 
     summary = (
-        f"{plan.extremum_kind}_price={value:.2f} EUR/MWh at "
+        f"{plan.extremum_kind}_{col}={value:.2f} {_unit(col)} at "
         f"{ts.strftime('%Y-%m-%d %H:%M')}"
     )
     return Result(
@@ -69,11 +183,15 @@ def _execute_extremum(df: pd.DataFrame, plan: Plan) -> Result:
         value=value,
         timestamp=ts,
         slice_df=day_df,
+        extra={"column": col},
     )
 
 
 def _execute_aggregate(df: pd.DataFrame, plan: Plan) -> Result:
-    sub = _apply_window(df, plan)
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("aggregate", col)
+    sub, feats, _, _ = _apply_window_features(df, plan)
     if sub.empty:
         return Result(
             intent="aggregate",
@@ -85,9 +203,9 @@ def _execute_aggregate(df: pd.DataFrame, plan: Plan) -> Result:
     gb = plan.group_by
 
     if gb == "none":
-        value = float(getattr(sub["price"], agg)())
+        value = float(getattr(sub[col], agg)())
         summary = (
-            f"{agg}(price)={value:.2f} EUR/MWh over "
+            f"{agg}({col})={value:.2f} {_unit(col)} over "
             f"{sub.index.min().date()} → {sub.index.max().date()} ({len(sub)} samples)"
         )
         return Result(
@@ -96,34 +214,19 @@ def _execute_aggregate(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm=summary,
             value=value,
             slice_df=sub,
+            extra={"column": col},
         )
 
-    # Grouped
-    idx = pd.to_datetime(sub.index)
-    if gb == "hour_of_day":
-        key = idx.hour
-        key_name = "hour_of_day"
-    elif gb == "day_of_week":
-        key = idx.dayofweek  # 0=Monday
-        key_name = "day_of_week"
-    elif gb == "month":
-        key = idx.month
-        key_name = "month"
-    elif gb == "date":
-        key = idx.date
-        key_name = "date"
-    else:
-        # Defensive; validate_plan should have caught this.
-        raise ValueError(f"unknown group_by: {gb}")
-
-    grouped = sub["price"].groupby(key).agg(agg)
-    grouped.index.name = key_name
+    # Grouped, on the precomputed calendar columns.
+    key = _group_key(feats, gb)
+    grouped = sub[col].groupby(key).agg(agg)
+    grouped.index = _group_index(grouped.index.to_numpy(), gb)
 
     # Compact summary: top 3 highest + lowest groups.
     top = grouped.nlargest(3)
     bot = grouped.nsmallest(3)
     summary = (
-        f"{agg}(price) by {key_name} ({len(grouped)} groups). "
+        f"{agg}({col}) by {gb} ({len(grouped)} groups, {_unit(col)}). "
         f"Top: {top.round(2).to_dict()}. Bottom: {bot.round(2).to_dict()}."
     )
     return Result(
@@ -132,11 +235,12 @@ def _execute_aggregate(df: pd.DataFrame, plan: Plan) -> Result:
         summary_for_llm=summary,
         series=grouped,
         slice_df=sub,
+        extra={"column": col},
     )
 
 
 def _execute_threshold_hours(df: pd.DataFrame, plan: Plan) -> Result:
-    sub = _apply_window(df, plan)
+    sub, feats, lo, _ = _apply_window_features(df, plan)
     if sub.empty:
         return Result(
             intent="threshold_hours",
@@ -151,16 +255,9 @@ def _execute_threshold_hours(df: pd.DataFrame, plan: Plan) -> Result:
         mask &= f(sub["price"], c.value)
         parts.append(f"price {c.op} {c.value:g}")
 
-    # Approx hours per sample from the median timedelta.
-    if len(sub.index) > 1:
-        step_hours = (
-            pd.Series(sub.index).diff().dt.total_seconds().median() / 3600.0
-        )
-    else:
-        step_hours = 1.0
-    matching_samples = int(mask.sum())
-    matching_hours = matching_samples * step_hours
-    total_hours = len(sub) * step_hours
+    weight = feats["weight"].to_numpy()
+    matching_hours = float(weight[mask.to_numpy()].sum())
+    total_hours = float(weight.sum())
     pct = (matching_hours / total_hours * 100.0) if total_hours else 0.0
 
     cond_label = " AND ".join(parts)
@@ -169,8 +266,7 @@ def _execute_threshold_hours(df: pd.DataFrame, plan: Plan) -> Result:
         f"({pct:.2f}%) over {sub.index.min().date()} → {sub.index.max().date()}"
     )
     # Full mask aligned to df (False outside the window) for highlight plotting.
-    full_mask = pd.Series(False, index=df.index)
-    full_mask.loc[mask.index] = mask.values
+    full_mask = _full_mask(df, lo, mask.to_numpy())
     return Result(
         intent="threshold_hours",
         plot_kind="highlight",
@@ -188,6 +284,9 @@ def _execute_threshold_hours(df: pd.DataFrame, plan: Plan) -> Result:
 
 
 def _execute_slice(df: pd.DataFrame, plan: Plan) -> Result:
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("slice", col)
     sub = _apply_window(df, plan)
     if sub.empty:
         return Result(
@@ -196,25 +295,28 @@ def _execute_slice(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm="no data in the requested window",
         )
     summary = (
-        f"slice {sub.index.min()} → {sub.index.max()}: "
-        f"mean={sub['price'].mean():.2f}, min={sub['price'].min():.2f}, "
-        f"max={sub['price'].max():.2f}, n={len(sub)}"
+        f"slice of {col} ({_unit(col)}) {sub.index.min()} → {sub.index.max()}: "
+        f"mean={sub[col].mean():.2f}, min={sub[col].min():.2f}, "
+        f"max={sub[col].max():.2f}, n={len(sub)}"
     )
     return Result(
         intent="slice",
         plot_kind="slice",
         summary_for_llm=summary,
         slice_df=sub,
+        extra={"column": col},
     )
 
 
 def _apply_period(df: pd.DataFrame, start, end) -> pd.DataFrame:
-    lo = pd.Timestamp(start)
-    hi = pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-    return df.loc[(df.index >= lo) & (df.index <= hi)]
+    i, j = _slice_positions(df.index, pd.Timestamp(start), _end_of_day(end))
+    return df.iloc[i:j]
 
 
 def _execute_compare(df: pd.DataFrame, plan: Plan) -> Result:
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("compare", col)
     agg = plan.aggregation or "mean"
     values = {}
     for p in plan.periods:
@@ -222,19 +324,20 @@ def _execute_compare(df: pd.DataFrame, plan: Plan) -> Result:
         if sub.empty:
             values[p.label] = float("nan")
         else:
-            values[p.label] = float(getattr(sub["price"], agg)())
-    series = pd.Series(values, name=f"{agg}_price")
+            values[p.label] = float(getattr(sub[col], agg)())
+    series = pd.Series(values, name=f"{agg}_{col}")
     series.index.name = "period"
 
     parts = ", ".join(
         f"{lbl}={v:.2f}" for lbl, v in values.items() if pd.notna(v)
     )
-    summary = f"compare {agg}(price) across periods: {parts} (EUR/MWh)"
+    summary = f"compare {agg}({col}) across periods: {parts} ({_unit(col)})"
     return Result(
         intent="compare",
         plot_kind="bar",
         summary_for_llm=summary,
         series=series,
+        extra={"column": col},
     )
 
 
@@ -275,7 +378,7 @@ def _execute_distribution(df: pd.DataFrame, plan: Plan) -> Result:
 
 
 def _execute_top_k(df: pd.DataFrame, plan: Plan) -> Result:
-    sub = _apply_window(df, plan)
+    sub, feats, lo, _ = _apply_window_features(df, plan)
     if sub.empty:
         return Result(
             intent="top_k",
@@ -283,37 +386,35 @@ def _execute_top_k(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm="no data in the requested window",
         )
 
+    prices = sub["price"].to_numpy(dtype=float)
+    day = feats["day"].to_numpy()
     if plan.top_k_unit == "day":
-        daily = sub["price"].groupby(sub.index.date).mean()
-        daily.index = pd.to_datetime(daily.index)
-        picker = daily.nlargest if plan.top_k_direction == "highest" else daily.nsmallest
-        picked = picker(plan.k).sort_values(
-            ascending=(plan.top_k_direction == "lowest")
-        )
+        codes, means = _daily_reduce(prices, day, "mean")
+        candidates = pd.Series(means, index=codes)
         unit_label = "daily mean"
     else:
-        picker = sub["price"].nlargest if plan.top_k_direction == "highest" else sub["price"].nsmallest
-        picked = picker(plan.k).sort_values(
-            ascending=(plan.top_k_direction == "lowest")
-        )
+        # Keyed by row position so the mask can be set without label lookups.
+        candidates = pd.Series(prices)
         unit_label = "hourly"
+    picker = candidates.nlargest if plan.top_k_direction == "highest" else candidates.nsmallest
+    picked = picker(plan.k).sort_values(
+        ascending=(plan.top_k_direction == "lowest")
+    )
 
     # Build a label-indexed series for bar plotting.
-    labels = [pd.Timestamp(i).strftime("%Y-%m-%d %H:%M" if plan.top_k_unit == "hour" else "%Y-%m-%d") for i in picked.index]
-    series = pd.Series(picked.values, index=labels, name="price")
-    series.index.name = f"top_{plan.k}_{plan.top_k_direction}_{plan.top_k_unit}"
-
-    # Mask for highlight plot: mark those timestamps on the full series.
     if plan.top_k_unit == "hour":
-        mask = pd.Series(False, index=df.index)
-        mask.loc[picked.index] = True
+        stamps = sub.index[picked.index.to_numpy()]
+        labels = stamps.strftime("%Y-%m-%d %H:%M")
+        window_mask = np.zeros(len(sub), dtype=bool)
+        window_mask[picked.index.to_numpy()] = True
     else:
+        labels = day_code_to_timestamp(picked.index).strftime("%Y-%m-%d")
         # Highlight every sample belonging to a picked date.
-        picked_dates = set(pd.to_datetime(picked.index).date)
-        mask = pd.Series(
-            [d in picked_dates for d in df.index.date],
-            index=df.index,
-        )
+        window_mask = np.isin(day, picked.index.to_numpy())
+    series = pd.Series(picked.values, index=list(labels), name="price")
+    series.index.name = f"top_{plan.k}_{plan.top_k_direction}_{plan.top_k_unit}"
+    # Mask for highlight plot, aligned to the full series.
+    mask = _full_mask(df, lo, window_mask)
 
     summary = (
         f"top {plan.k} {plan.top_k_direction} {unit_label} prices: "
@@ -374,7 +475,7 @@ def _execute_tariff_band(df: pd.DataFrame, plan: Plan) -> Result:
 
 
 def _execute_negative_prices(df: pd.DataFrame, plan: Plan) -> Result:
-    sub = _apply_window(df, plan)
+    sub, feats, lo, _ = _apply_window_features(df, plan)
     if sub.empty:
         return Result(
             intent="negative_prices",
@@ -382,17 +483,12 @@ def _execute_negative_prices(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm="no data in the requested window",
         )
 
-    if len(sub.index) > 1:
-        step_hours = (
-            pd.Series(sub.index).diff().dt.total_seconds().median() / 3600.0
-        )
-    else:
-        step_hours = 1.0
-
     mask_sub = sub["price"] < 0
-    neg_samples = int(mask_sub.sum())
-    neg_hours = neg_samples * step_hours
-    total_hours = len(sub) * step_hours
+    mask_arr = mask_sub.to_numpy()
+    weight = feats["weight"].to_numpy()
+    neg_samples = int(mask_arr.sum())
+    neg_hours = float(weight[mask_arr].sum())
+    total_hours = float(weight.sum())
     pct = (neg_hours / total_hours * 100.0) if total_hours else 0.0
 
     if neg_samples == 0:
@@ -406,17 +502,28 @@ def _execute_negative_prices(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm=summary,
         )
 
-    neg_prices = sub.loc[mask_sub, "price"]
-    min_price = float(neg_prices.min())
-    min_ts = pd.Timestamp(neg_prices.idxmin())
-    by_hour = neg_prices.groupby(neg_prices.index.hour).size()
-    top_hours = by_hour.nlargest(3)
-
-    full_mask = pd.Series(False, index=df.index)
-    full_mask.loc[mask_sub.index] = mask_sub.values
+    prices = sub["price"].to_numpy(dtype=float)
+    min_pos = int(np.argmin(np.where(mask_arr, prices, np.inf)))
+    min_price = float(prices[min_pos])
+    min_ts = pd.Timestamp(sub.index[min_pos])
+    # Negative hours per hour of day, weighted so 15-minute days don't count 4x.
+    by_hour = pd.Series(np.bincount(feats["hour"].to_numpy()[mask_arr],
+                                    weights=weight[mask_arr], minlength=24))
+    top_hours = by_hour[by_hour > 0].nlargest(3).round(2)
+
+    # Negative hours per calendar day of the window.
+    day = feats["day"].to_numpy()
+    first = int(day[0])
+    per_day = np.bincount(day[mask_arr] - first, weights=weight[mask_arr],
+                          minlength=int(day[-1]) - first + 1)
+    neg_days = int((per_day > 0).sum())
+    worst_day = day_code_to_timestamp([first + int(per_day.argmax())])[0].date()
+
+    full_mask = _full_mask(df, lo, mask_arr)
 
     summary = (
-        f"{neg_hours:.2f}h of negative prices ({pct:.2f}% of period). "
+        f"{neg_hours:.2f}h of negative prices ({pct:.2f}% of period) on "
+        f"{neg_days} of {per_day.size} days; most on {worst_day} ({per_day.max():.2f}h). "
         f"Minimum: {min_price:.2f} EUR/MWh at {min_ts.strftime('%Y-%m-%d %H:%M')}. "
         f"Most common hours of day: {top_hours.to_dict()}"
     )
@@ -432,19 +539,20 @@ def _execute_negative_prices(df: pd.DataFrame, plan: Plan) -> Result:
             "pct": pct,
             "min_price": min_price,
             "min_timestamp": str(min_ts),
+            "negative_days": neg_days,
             "conditions_label": "price < 0",
         },
     )
 
 
-_PEAK_HOURS = set(range(18, 23))          # 18..22 inclusive
-_OFFPEAK_HOURS = set(range(0, 7))         # 0..6 inclusive
-_SUMMER_MONTHS = {6, 7, 8, 9}
-_WINTER_MONTHS = {12, 1, 2}
+_PEAK_HOURS = list(range(18, 23))         # 18..22 inclusive
+_OFFPEAK_HOURS = list(range(0, 7))        # 0..6 inclusive
+_SUMMER_SEASON = 2                        # Jun-Sep, see calendar_features
+_WINTER_SEASON = 0                        # Dec-Feb
 
 
 def _execute_peak_offpeak(df: pd.DataFrame, plan: Plan) -> Result:
-    sub = _apply_window(df, plan)
+    sub, feats, _, _ = _apply_window_features(df, plan)
     if sub.empty:
         return Result(
             intent="peak_offpeak",
@@ -452,21 +560,23 @@ def _execute_peak_offpeak(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm="no data in the requested window",
         )
     preset = plan.preset or "peak_vs_offpeak"
-    idx = sub.index
 
     if preset == "peak_vs_offpeak":
-        a_mask = idx.hour.isin(_PEAK_HOURS)
-        b_mask = idx.hour.isin(_OFFPEAK_HOURS)
+        hour = feats["hour"].to_numpy()
+        a_mask = np.isin(hour, _PEAK_HOURS)
+        b_mask = np.isin(hour, _OFFPEAK_HOURS)
         a_label = "Peak (18-22h)"
         b_label = "Off-peak (0-6h)"
     elif preset == "weekday_vs_weekend":
-        a_mask = idx.dayofweek < 5
-        b_mask = idx.dayofweek >= 5
+        dow = feats["dow"].to_numpy()
+        a_mask = dow < 5
+        b_mask = dow >= 5
         a_label = "Weekday"
         b_label = "Weekend"
     else:  # summer_vs_winter
-        a_mask = idx.month.isin(_SUMMER_MONTHS)
-        b_mask = idx.month.isin(_WINTER_MONTHS)
+        season = feats["season"].to_numpy()
+        a_mask = season == _SUMMER_SEASON
+        b_mask = season == _WINTER_SEASON
         a_label = "Summer (Jun-Sep)"
         b_label = "Winter (Dec-Feb)"
 
@@ -489,8 +599,34 @@ def _execute_peak_offpeak(df: pd.DataFrame, plan: Plan) -> Result:
     )
 
 
+def _run_bounds(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Run-length encode a boolean array.
+
+    Returns ``(starts, ends)``: start and exclusive end position of every run
+    of True, found from the +1/-1 steps of the zero-padded mask.
+    """
+    steps = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(steps == 1), np.flatnonzero(steps == -1)
+
+
+def _runs_mask(df: pd.DataFrame, lo: int, starts: np.ndarray, ends: np.ndarray) -> pd.Series:
+    """Mask over df marking the given (non-overlapping) runs of the window."""
+    marks = np.zeros(len(df) + 1, dtype=np.int32)
+    marks[lo + starts] += 1
+    marks[lo + ends] -= 1
+    return pd.Series(np.cumsum(marks[:-1]) > 0, index=df.index)
+
+
+def _describe_runs(index: pd.DatetimeIndex, starts, ends, hours) -> str:
+    return "; ".join(
+        f"{h:.1f}h ({index[s].strftime('%Y-%m-%d %H:%M')} "
+        f"-> {index[e - 1].strftime('%Y-%m-%d %H:%M')})"
+        for s, e, h in zip(starts, ends, hours)
+    )
+
+
 def _execute_streak(df: pd.DataFrame, plan: Plan) -> Result:
-    sub = _apply_window(df, plan)
+    sub, feats, lo, _ = _apply_window_features(df, plan)
     if sub.empty:
         return Result(
             intent="streak",
@@ -498,91 +634,182 @@ def _execute_streak(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm="no data in the requested window",
         )
 
-    if len(sub.index) > 1:
-        step_hours = (
-            pd.Series(sub.index).diff().dt.total_seconds().median() / 3600.0
-        )
-    else:
-        step_hours = 1.0
-
-    mask = pd.Series(True, index=sub.index)
+    prices = sub["price"].to_numpy()
+    mask = np.ones(len(sub), dtype=bool)
     parts = []
     for c in plan.conditions:
         f = _OP_FUNCS[c.op]
-        mask &= f(sub["price"], c.value)
+        mask &= f(prices, c.value)
         parts.append(f"price {c.op} {c.value:g}")
     cond_label = " AND ".join(parts)
 
-    # Find consecutive runs of True.
-    values = mask.values
-    runs: list[dict] = []
-    i = 0
-    n = len(values)
-    while i < n:
-        if values[i]:
-            j = i
-            while j < n and values[j]:
-                j += 1
-            length = j - i
-            if length >= plan.min_length:
-                runs.append(
-                    {
-                        "length": length,
-                        "hours": length * step_hours,
-                        "start": sub.index[i],
-                        "end": sub.index[j - 1],
-                    }
-                )
-            i = j
-        else:
-            i += 1
-
-    if not runs:
+    # Duration-weighted hours per run from the cumulative sample weights, so
+    # min_length means the same on hourly, 15-minute and mixed windows.
+    starts, ends = _run_bounds(mask)
+    cum = np.concatenate(([0.0], np.cumsum(feats["weight"].to_numpy())))
+    hours = cum[ends] - cum[starts]
+    keep = hours >= plan.min_length - 1e-9
+    starts, ends, hours = starts[keep], ends[keep], hours[keep]
+    span = f"over {sub.index.min().date()} -> {sub.index.max().date()}"
+    if starts.size == 0:
         return Result(
             intent="streak",
             plot_kind="none",
             summary_for_llm=(
-                f"no streaks of {cond_label} with length >= {plan.min_length} "
-                f"over {sub.index.min().date()} -> {sub.index.max().date()}"
+                f"no streaks of {cond_label} lasting >= {plan.min_length:g}h {span}"
             ),
         )
+    runs = (starts, ends, hours)
+
+    mode = plan.streak_mode
+    if mode == "per_day":
+        return _streak_per_day(sub, feats, runs, cond_label, plan)
+    if mode == "histogram":
+        return _streak_histogram(runs, cond_label, plan, span)
+    if mode == "crossing_midnight":
+        day = feats["day"].to_numpy()
+        crossing = day[starts] != day[ends - 1]
+        if not crossing.any():
+            return Result(
+                intent="streak",
+                plot_kind="none",
+                summary_for_llm=(
+                    f"none of the {starts.size} streak(s) of {cond_label} "
+                    f"(min_length={plan.min_length:g}h) crosses midnight {span}"
+                ),
+            )
+        starts, ends, hours = starts[crossing], ends[crossing], hours[crossing]
+        order = np.argsort(-hours, kind="stable")[:5]
+        summary = (
+            f"{starts.size} of {crossing.size} streak(s) of {cond_label} cross midnight "
+            f"(min_length={plan.min_length:g}h). Longest: {hours[order[0]]:.1f}h. "
+            f"Top runs: {_describe_runs(sub.index, starts[order], ends[order], hours[order])}"
+        )
+        return Result(
+            intent="streak",
+            plot_kind="highlight",
+            summary_for_llm=summary,
+            value=float(hours[order[0]]),
+            slice_df=df,
+            mask=_runs_mask(df, lo, starts, ends),
+            extra={
+                "num_streaks": int(starts.size),
+                "longest_hours": float(hours[order[0]]),
+                "conditions_label": f"streaks of {cond_label} crossing midnight",
+            },
+        )
 
-    runs.sort(key=lambda r: r["length"], reverse=True)
-    longest = runs[0]
-    top = runs[: min(5, len(runs))]
-
-    # Highlight the longest streak on the full series.
-    full_mask = pd.Series(False, index=df.index)
-    full_mask.loc[longest["start"] : longest["end"]] = True
+    if mode == "top_k":
+        order = np.argsort(-hours, kind="stable")[: plan.k]
+        picked = (starts[order], ends[order], hours[order])
+        series = pd.Series(
+            picked[2],
+            index=[sub.index[i].strftime("%Y-%m-%d %H:%M") for i in picked[0]],
+            name="hours",
+        )
+        series.index.name = f"top_{plan.k}_streaks"
+        summary = (
+            f"top {len(order)} of {starts.size} streak(s) of {cond_label} by duration "
+            f"(min_length={plan.min_length:g}h): {_describe_runs(sub.index, *picked)}"
+        )
+        return Result(
+            intent="streak",
+            plot_kind="highlight",
+            summary_for_llm=summary,
+            value=float(picked[2][0]),
+            series=series,
+            slice_df=df,
+            mask=_runs_mask(df, lo, picked[0], picked[1]),
+            extra={
+                "num_streaks": int(starts.size),
+                "longest_hours": float(picked[2][0]),
+                "conditions_label": f"top {len(order)} streaks {cond_label}",
+            },
+        )
 
-    top_desc = "; ".join(
-        f"{r['hours']:.1f}h ({pd.Timestamp(r['start']).strftime('%Y-%m-%d %H:%M')} "
-        f"-> {pd.Timestamp(r['end']).strftime('%Y-%m-%d %H:%M')})"
-        for r in top
-    )
+    # "longest": the longest run highlighted, ties in chronological order.
+    order = np.argsort(-hours, kind="stable")
+    longest = order[0]
+    top = order[:5]
     summary = (
-        f"{len(runs)} streak(s) of {cond_label} "
-        f"(min_length={plan.min_length}). "
-        f"Longest: {longest['hours']:.1f}h. "
-        f"Top runs: {top_desc}"
+        f"{starts.size} streak(s) of {cond_label} "
+        f"(min_length={plan.min_length:g}h). "
+        f"Longest: {hours[longest]:.1f}h. "
+        f"Top runs: {_describe_runs(sub.index, starts[top], ends[top], hours[top])}"
     )
     return Result(
         intent="streak",
         plot_kind="highlight",
         summary_for_llm=summary,
-        value=float(longest["hours"]),
+        value=float(hours[longest]),
         slice_df=df,
-        mask=full_mask,
+        mask=_runs_mask(df, lo, starts[longest : longest + 1], ends[longest : longest + 1]),
         extra={
-            "num_streaks": len(runs),
-            "longest_hours": longest["hours"],
+            "num_streaks": int(starts.size),
+            "longest_hours": float(hours[longest]),
             "conditions_label": f"longest streak {cond_label}",
         },
     )
 
 
+def _streak_per_day(sub: pd.DataFrame, feats: pd.DataFrame, runs, cond_label: str, plan: Plan) -> Result:
+    """Number of streaks starting on each day of the window."""
+    starts, _, hours = runs
+    day = feats["day"].to_numpy()
+    first = day[0]
+    n_days = int(day[-1] - first) + 1
+    counts = np.bincount(day[starts] - first, minlength=n_days)
+    series = pd.Series(
+        counts,
+        index=day_code_to_timestamp(np.arange(first, first + n_days)).date,
+        name="streaks",
+    )
+    series.index.name = "date"
+    busiest = series.nlargest(3)
+    summary = (
+        f"{starts.size} streak(s) of {cond_label} (min_length={plan.min_length:g}h) "
+        f"started on {int((counts > 0).sum())} of {n_days} days "
+        f"({starts.size / n_days:.2f} per day, {hours.mean():.1f}h on average). "
+        f"Busiest days: {{{', '.join(f'{d}: {c}' for d, c in busiest.items())}}}"
+    )
+    return Result(
+        intent="streak",
+        plot_kind="bar",
+        summary_for_llm=summary,
+        value=float(starts.size / n_days),
+        series=series,
+        slice_df=sub,
+        extra={"num_streaks": int(starts.size), "y_label": "Streaks"},
+    )
+
+
+def _streak_histogram(runs, cond_label: str, plan: Plan, span: str) -> Result:
+    """Distribution of streak durations, in hour-wide bins (wider for long runs)."""
+    _, _, hours = runs
+    width = max(1, int(np.ceil((hours.max() + 1) / 48)))
+    bins = np.floor(hours / width).astype(np.int64)
+    counts = np.bincount(bins)
+    labels = [f"{b * width}-{(b + 1) * width}h" for b in range(len(counts))]
+    series = pd.Series(counts, index=labels, name="streaks")
+    series.index.name = "duration"
+    series = series[series > 0]
+    summary = (
+        f"{hours.size} streak(s) of {cond_label} (min_length={plan.min_length:g}h) {span}: "
+        f"median={np.median(hours):.1f}h, p90={np.percentile(hours, 90):.1f}h, "
+        f"max={hours.max():.1f}h. Most common durations: {series.nlargest(3).to_dict()}"
+    )
+    return Result(
+        intent="streak",
+        plot_kind="bar",
+        summary_for_llm=summary,
+        value=float(np.median(hours)),
+        series=series,
+        extra={"num_streaks": int(hours.size), "y_label": "Streaks"},
+    )
+
+
 def _execute_arbitrage(df: pd.DataFrame, plan: Plan) -> Result:
-    sub = _apply_window(df, plan)
+    sub, feats, _, _ = _apply_window_features(df, plan)
     if sub.empty:
         return Result(
             intent="arbitrage",
@@ -590,7 +817,14 @@ def _execute_arbitrage(df: pd.DataFrame, plan: Plan) -> Result:
             summary_for_llm="no data in the requested window",
         )
 
-    daily = sub["price"].groupby(sub.index.date).agg(["min", "max"])
+    prices = sub["price"].to_numpy(dtype=float)
+    day = feats["day"].to_numpy()
+    codes, lows = _daily_reduce(prices, day, "min")
+    _, highs = _daily_reduce(prices, day, "max")
+    daily = pd.DataFrame(
+        {"min": lows, "max": highs},
+        index=day_code_to_timestamp(codes).date,
+    )
     daily["spread"] = daily["max"] - daily["min"]
 
     avg_spread = float(daily["spread"].mean())
@@ -635,6 +869,418 @@ def _execute_arbitrage(df: pd.DataFrame, plan: Plan) -> Result:
     )
 
 
+def _no_data(intent: str, why: str = "no data in the requested window") -> Result:
+    return Result(intent=intent, plot_kind="none", summary_for_llm=why)
+
+
+def _column_values(sub: pd.DataFrame, col: str) -> np.ndarray:
+    return sub[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _group_percentiles(
+    values: np.ndarray, key: np.ndarray, percentiles: list[float]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Percentiles of ``values`` per group code, with a single sort.
+
+    Returns ``(codes, table)`` where ``table[g, j]`` is ``percentiles[j]``
+    of group ``codes[g]``, interpolated linearly like ``np.percentile``.
+    NaNs are ignored.
+    """
+    valid = ~np.isnan(values)
+    values, key = values[valid], key[valid]
+    if values.size == 0:
+        return key[:0], np.empty((0, len(percentiles)))
+    order = np.lexsort((values, key))
+    v, k = values[order], key[order]
+    starts = _day_starts(k)
+    counts = np.diff(np.append(starts, len(k)))
+    pos = (counts[:, None] - 1) * (np.asarray(percentiles) / 100.0)[None, :]
+    below = np.floor(pos).astype(np.int64)
+    above = np.minimum(below + 1, counts[:, None] - 1)
+    lo = v[starts[:, None] + below]
+    hi = v[starts[:, None] + above]
+    return k[starts], lo + (pos - below) * (hi - lo)
+
+
+def _execute_percentile(df: pd.DataFrame, plan: Plan) -> Result:
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("percentile", col)
+    sub, feats, _, _ = _apply_window_features(df, plan)
+    values = _column_values(sub, col)
+    gb = plan.group_by
+    key = _group_key(feats, gb) if gb != "none" else np.zeros(len(values), dtype=np.int8)
+    codes, table = _group_percentiles(values, key, plan.percentiles)
+    if codes.size == 0:
+        return _no_data("percentile")
+
+    labels = [f"p{p:g}" for p in plan.percentiles]
+    unit = _unit(col)
+    if gb == "none":
+        row = {label: round(float(v), 2) for label, v in zip(labels, table[0])}
+        summary = (
+            f"percentiles of {col} ({unit}) over {sub.index.min().date()} → "
+            f"{sub.index.max().date()} ({int(np.count_nonzero(~np.isnan(values)))} samples): "
+            + ", ".join(f"{label}={v:.2f}" for label, v in row.items())
+        )
+        return Result(
+            intent="percentile",
+            plot_kind="percentile",
+            summary_for_llm=summary,
+            slice_df=sub,
+            extra={"column": col, "values": row},
+        )
+
+    frame = pd.DataFrame(table, index=_group_index(codes, gb), columns=labels)
+    parts = []
+    for label in labels:
+        s = frame[label]
+        parts.append(
+            f"{label} highest {s.idxmax()} ({s.max():.2f}), lowest {s.idxmin()} ({s.min():.2f})"
+        )
+    summary = f"percentiles of {col} by {gb} ({len(frame)} groups, {unit}): " + "; ".join(parts)
+    return Result(
+        intent="percentile",
+        plot_kind="percentile",
+        summary_for_llm=summary,
+        extra={"column": col, "table": frame, "group_by": gb},
+    )
+
+
+def _dense_daily(values: np.ndarray, day: np.ndarray) -> dict:
+    """Per-day moments on a gap-free calendar from the first to the last day.
+
+    Returns ``days`` (consecutive day codes) and, per day, ``count``,
+    ``sum``/``sumsq`` of the values minus ``offset`` (the overall mean,
+    subtracted so the squares stay well-conditioned for MW series) and
+    ``min``/``max`` (NaN on days without data).
+    """
+    valid = ~np.isnan(values)
+    offset = float(values[valid].mean()) if valid.any() else 0.0
+    centred = np.where(valid, values - offset, 0.0)
+    starts = _day_starts(day)
+    slot = day[starts] - day[0]
+    n_days = int(slot[-1]) + 1
+    out = {
+        "days": np.arange(day[0], day[0] + n_days, dtype=np.int64),
+        "offset": offset,
+        "count": np.zeros(n_days),
+        "sum": np.zeros(n_days),
+        "sumsq": np.zeros(n_days),
+        "min": np.full(n_days, np.nan),
+        "max": np.full(n_days, np.nan),
+    }
+    out["count"][slot] = np.add.reduceat(valid.astype(np.float64), starts)
+    out["sum"][slot] = np.add.reduceat(centred, starts)
+    out["sumsq"][slot] = np.add.reduceat(centred * centred, starts)
+    out["min"][slot] = np.fmin.reduceat(values, starts)
+    out["max"][slot] = np.fmax.reduceat(values, starts)
+    return out
+
+
+def _trailing_sum(x: np.ndarray, w: int) -> np.ndarray:
+    """Sums over every window of ``w`` consecutive entries (cumulative-sum trick).
+
+    Entry ``i`` covers ``x[i : i + w]``; the result has ``len(x) - w + 1`` entries.
+    """
+    cs = np.concatenate(([0.0], np.cumsum(x)))
+    return cs[w:] - cs[:-w]
+
+
+def _moments_std(count: np.ndarray, s1: np.ndarray, s2: np.ndarray) -> np.ndarray:
+    """Sample standard deviation (ddof=1) from count, sum and sum of squares."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (s2 - s1 * s1 / count) / (count - 1)
+    return np.where(count > 1, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def _day_series(days: np.ndarray, values: np.ndarray, name: str) -> pd.Series:
+    s = pd.Series(values, index=day_code_to_timestamp(days), name=name)
+    s.index.name = "date"
+    return s.dropna()
+
+
+def _series_extremes(s: pd.Series) -> dict:
+    return {
+        "latest": float(s.iloc[-1]),
+        "latest_day": str(s.index[-1].date()),
+        "max": float(s.max()),
+        "max_day": str(s.idxmax().date()),
+        "min": float(s.min()),
+        "min_day": str(s.idxmin().date()),
+        "mean": float(s.mean()),
+    }
+
+
+def _execute_rolling(df: pd.DataFrame, plan: Plan) -> Result:
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("rolling", col)
+    sub, feats, _, _ = _apply_window_features(df, plan)
+    if sub.empty:
+        return _no_data("rolling")
+    w, agg = plan.window_days, plan.aggregation
+    daily = _dense_daily(_column_values(sub, col), feats["day"].to_numpy())
+    if len(daily["days"]) < w:
+        return _no_data("rolling", f"the window holds {len(daily['days'])} days, fewer than {w}")
+
+    if agg in ("min", "max"):
+        # Strided view of every w-day window over the per-day extremes.
+        windows = np.lib.stride_tricks.sliding_window_view(daily[agg], w)
+        stat = (np.fmin if agg == "min" else np.fmax).reduce(windows, axis=1)
+    else:
+        count = _trailing_sum(daily["count"], w)
+        s1 = _trailing_sum(daily["sum"], w)
+        if agg == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                stat = np.where(count > 0, s1 / count + daily["offset"], np.nan)
+        else:
+            stat = _moments_std(count, s1, _trailing_sum(daily["sumsq"], w))
+    series = _day_series(daily["days"][w - 1:], stat, f"rolling_{agg}")
+    if series.empty:
+        return _no_data("rolling")
+
+    ext = _series_extremes(series)
+    summary = (
+        f"rolling {w}-day {agg}({col}) ({_unit(col)}, {len(series)} days): latest "
+        f"{ext['latest']:.2f} on {ext['latest_day']}; highest {ext['max']:.2f} on "
+        f"{ext['max_day']}; lowest {ext['min']:.2f} on {ext['min_day']}"
+    )
+    return Result(
+        intent="rolling",
+        plot_kind="rolling",
+        summary_for_llm=summary,
+        series=series,
+        extra={"column": col, "window_days": w, "aggregation": agg, **ext},
+    )
+
+
+def _execute_volatility(df: pd.DataFrame, plan: Plan) -> Result:
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("volatility", col)
+    sub, feats, _, _ = _apply_window_features(df, plan)
+    if sub.empty:
+        return _no_data("volatility")
+    w = plan.window_days
+    daily = _dense_daily(_column_values(sub, col), feats["day"].to_numpy())
+    days, count = daily["days"], daily["count"]
+
+    if plan.volatility_kind == "intraday":
+        stat = _moments_std(count, daily["sum"], daily["sumsq"])
+        series = _day_series(days, stat, "intraday_std")
+        # Trailing mean of the daily values, skipping days without one.
+        has = ~np.isnan(stat)
+        smoothed = None
+        if len(days) >= w:
+            n = _trailing_sum(has.astype(np.float64), w)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = _trailing_sum(np.where(has, stat, 0.0), w) / n
+            smoothed = _day_series(days[w - 1:], np.where(n > 0, mean, np.nan), f"mean_{w}d")
+        what = f"intraday std of {col}"
+    else:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, daily["sum"] / count, np.nan)
+        change = np.diff(mean)
+        has = ~np.isnan(change)
+        if len(change) < w:
+            return _no_data("volatility", f"the window holds {len(days)} days, too few for a {w}-day window")
+        x = np.where(has, change, 0.0)
+        n = _trailing_sum(has.astype(np.float64), w)
+        stat = _moments_std(n, _trailing_sum(x, w), _trailing_sum(x * x, w))
+        # Windows with mostly missing days say little; drop them.
+        stat = np.where(n >= max(2, w // 2), stat, np.nan)
+        series = _day_series(days[w:], stat, f"change_std_{w}d")
+        smoothed = None
+        what = f"rolling {w}-day std of day-on-day changes in daily mean {col}"
+    if series.empty:
+        return _no_data("volatility")
+
+    ext = _series_extremes(series)
+    summary = (
+        f"{what} ({_unit(col)}, {len(series)} days): mean {ext['mean']:.2f}; highest "
+        f"{ext['max']:.2f} on {ext['max_day']}; lowest {ext['min']:.2f} on {ext['min_day']}; "
+        f"latest {ext['latest']:.2f} on {ext['latest_day']}"
+    )
+    return Result(
+        intent="volatility",
+        plot_kind="volatility",
+        summary_for_llm=summary,
+        series=series,
+        extra={"column": col, "window_days": w, "kind": plan.volatility_kind,
+               "smoothed": smoothed, **ext},
+    )
+
+
+def _execute_ramp(df: pd.DataFrame, plan: Plan) -> Result:
+    col = plan.column
+    if col not in df.columns:
+        return _missing_column("ramp", col)
+    sub, feats, _, _ = _apply_window_features(df, plan)
+    h = plan.ramp_hours
+    if len(sub) < 2:
+        return _no_data("ramp")
+
+    # Pair every sample with the one h hours later on the clock, found by
+    # time rather than by position so hourly, 15-minute and mixed windows
+    # all work. The pair counts only if the samples in between represent
+    # exactly h hours, which skips data gaps and pairs across a DST change
+    # (the naive clock is 1 h off there). Stamps of the repeated autumn
+    # hour are ambiguous on the naive clock and are skipped.
+    values = _column_values(sub, col)
+    ns = sub.index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    target = ns + int(round(h * 3600 * 10**9))
+    later = np.minimum(np.searchsorted(ns, target), len(ns) - 1)
+    repeated = np.zeros(len(ns), dtype=bool)
+    repeated[1:] = ns[1:] == ns[:-1]
+    repeated[:-1] |= repeated[1:]
+    cum = np.concatenate(([0.0], np.cumsum(feats["weight"].to_numpy())))
+    delta = values[later] - values
+    ok = (
+        (ns[later] == target)
+        & ~repeated & ~repeated[later]
+        & np.isclose(cum[later] - cum[:-1], h)
+        & ~np.isnan(delta)
+    )
+    if plan.ramp_direction == "up":
+        ok &= delta > 0
+    elif plan.ramp_direction == "down":
+        ok &= delta < 0
+    if not ok.any():
+        return _no_data("ramp", "no ramps in the requested window")
+
+    hour = feats["hour"].to_numpy()[ok]
+    moves = delta[ok]
+    counts = np.bincount(hour, minlength=24)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        profile = np.bincount(hour, weights=moves, minlength=24) / counts
+    series = pd.Series(profile, index=pd.RangeIndex(24, name="hour_of_day"), name="mean_ramp").dropna()
+
+    unit = _unit(col)
+    extra = {
+        "column": col, "ramp_hours": h, "direction": plan.ramp_direction,
+        "count": int(moves.size),
+        "mean_abs": float(np.abs(moves).mean()),
+        "p95_abs": float(np.percentile(np.abs(moves), 95)),
+    }
+    pos = np.flatnonzero(ok)
+    parts = []
+    if plan.ramp_direction in ("both", "up") and moves.max() > 0:
+        i = pos[int(np.argmax(moves))]
+        extra.update(max_up=float(delta[i]), max_up_at=sub.index[i])
+        parts.append(f"largest rise {delta[i]:.2f} from {sub.index[i]:%Y-%m-%d %H:%M}")
+    if plan.ramp_direction in ("both", "down") and moves.min() < 0:
+        i = pos[int(np.argmin(moves))]
+        extra.update(max_down=float(delta[i]), max_down_at=sub.index[i])
+        parts.append(f"largest drop {delta[i]:.2f} from {sub.index[i]:%Y-%m-%d %H:%M}")
+    summary = (
+        f"{h}h {plan.ramp_direction} ramps of {col} ({unit} per {h} h, {extra['count']} ramps): "
+        + "; ".join(parts)
+        + f"; mean |ramp| {extra['mean_abs']:.2f}, p95 |ramp| {extra['p95_abs']:.2f}. "
+        f"Mean ramp by starting hour: steepest rise at {int(series.idxmax())}h "
+        f"({series.max():.2f}), steepest fall at {int(series.idxmin())}h ({series.min():.2f})"
+    )
+    return Result(
+        intent="ramp",
+        plot_kind="ramp",
+        summary_for_llm=summary,
+        series=series,
+        extra=extra,
+    )
+
+
+_MAX_STEP_WORKERS = 4
+_STEP_POOL: Optional[ThreadPoolExecutor] = None
+_STEP_POOL_LOCK = threading.Lock()
+
+
+def _step_pool() -> ThreadPoolExecutor:
+    global _STEP_POOL
+    with _STEP_POOL_LOCK:
+        if _STEP_POOL is None:
+            _STEP_POOL = ThreadPoolExecutor(
+                max_workers=_MAX_STEP_WORKERS, thread_name_prefix="plan-step"
+            )
+        return _STEP_POOL
+
+
+def _step_key(plan: Plan) -> str:
+    return json.dumps(plan_to_dict(plan), sort_keys=True, default=str)
+
+
+def _result_window(result: Result) -> Optional[TimeWindow]:
+    """Date range a step's answer points at, for steps that build on it."""
+    if result.timestamp is not None:
+        day = pd.Timestamp(result.timestamp).date()
+        return TimeWindow(start=day, end=day)
+    if result.mask is not None:
+        hits = np.flatnonzero(result.mask.to_numpy())
+        if hits.size:
+            idx = result.mask.index
+            return TimeWindow(start=idx[hits[0]].date(), end=idx[hits[-1]].date())
+        return None
+    if result.slice_df is not None and not result.slice_df.empty:
+        idx = result.slice_df.index
+        return TimeWindow(start=idx.min().date(), end=idx.max().date())
+    return None
+
+
+def _done(result: Result) -> Future:
+    fut: Future = Future()
+    fut.set_result(result)
+    return fut
+
+
+def _execute_multi(df: pd.DataFrame, plan: Plan) -> Result:
+    pool = _step_pool()
+    steps = plan.steps
+    futures: list[Optional[Future]] = [None] * len(steps)
+    # Per-turn cache: identical steps share one computation.
+    turn_cache: dict[str, Future] = {}
+
+    def submit(i: int, step: Plan) -> None:
+        key = _step_key(step)
+        if key not in turn_cache:
+            turn_cache[key] = pool.submit(execute, step, df)
+        futures[i] = turn_cache[key]
+
+    pending = list(range(len(steps)))
+    while pending:
+        for i in list(pending):
+            step = steps[i]
+            dep = step.window_from
+            if dep is None:
+                submit(i, step)
+            elif futures[dep] is not None and futures[dep].done():
+                window = _result_window(futures[dep].result())
+                if window is None:
+                    futures[i] = _done(Result(
+                        intent=step.intent,
+                        plot_kind="none",
+                        summary_for_llm=f"step {dep + 1} gave no time range to build on",
+                    ))
+                else:
+                    submit(i, replace(step, time_window=window, window_from=None))
+            else:
+                continue
+            pending.remove(i)
+        running = [f for f in futures if f is not None and not f.done()]
+        if pending and running:
+            wait(running, return_when=FIRST_COMPLETED)
+
+    results = [f.result() for f in futures]
+    summary = " | ".join(
+        f"step {i + 1} ({r.intent}): {r.summary_for_llm}" for i, r in enumerate(results)
+    )
+    plottable = any(r.plot_kind != "none" for r in results)
+    return Result(
+        intent="multi",
+        plot_kind="multi" if plottable else "none",
+        summary_for_llm=summary,
+        extra={"steps": results, "unique_steps": len(turn_cache)},
+    )
+
+
 def execute(plan: Plan, df: pd.DataFrame) -> Result:
     """Dispatch to the per-intent executor."""
     if df is None or df.empty:
@@ -643,6 +1289,9 @@ def execute(plan: Plan, df: pd.DataFrame) -> Result:
             plot_kind="none",
             summary_for_llm="no data loaded",
         )
+    if not df.index.is_monotonic_increasing:
+        # Window slicing binary-searches the index.
+        df = df.sort_index()
     if plan.intent == "extremum":
         return _execute_extremum(df, plan)
     if plan.intent == "aggregate":
@@ -667,6 +1316,16 @@ def execute(plan: Plan, df: pd.DataFrame) -> Result:
         return _execute_streak(df, plan)
     if plan.intent == "arbitrage":
         return _execute_arbitrage(df, plan)
+    if plan.intent == "percentile":
+        return _execute_percentile(df, plan)
+    if plan.intent == "rolling":
+        return _execute_rolling(df, plan)
+    if plan.intent == "volatility":
+        return _execute_volatility(df, plan)
+    if plan.intent == "ramp":
+        return _execute_ramp(df, plan)
+    if plan.intent == "multi":
+        return _execute_multi(df, plan)
     if plan.intent == "unsupported":
         return Result(
             intent="unsupported",
@@ -1,17 +1,22 @@
-"""Second LLM call: turn an executor ``Result`` into a 1-3 sentence answer.
+"""Turn an executor ``Result`` into a 1-3 sentence answer.
 
-We pass only the compact ``summary_for_llm`` string, never the raw series,
-to keep tokens and latency low. If the LLM call fails we fall back to the
-summary verbatim so the user still sees a useful answer.
+By default the answer comes from the local per-intent templates in
+``llm_chat.templates`` (same language as the question, no network call).
+The LLM is used in "rich" mode, or when no template fits the result. We pass
+only the compact ``summary_for_llm`` string, never the raw series, to keep
+tokens and latency low. If the LLM call fails we fall back to the summary
+verbatim so the user still sees a useful answer. ``explain_stream`` yields
+the same answer incrementally for token-by-token rendering.
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 
-from llm_chat.openrouter_client import OpenRouterError, chat
+from llm_chat.openrouter_client import OpenRouterError, chat, chat_stream
 from llm_chat.schema import Plan, Result
+from llm_chat.templates import render_answer
 
 logger = logging.getLogger(__name__)
 
@@ -25,13 +30,8 @@ SYSTEM_PROMPT = (
 )
 
 
-def explain(
-    question: str,
-    plan: Plan,
-    result: Result,
-    model: Optional[str] = None,
-) -> str:
-    """Return a human-readable answer; never raises."""
+def _canned_answer(result: Result) -> Optional[str]:
+    """Answer that needs no LLM call, or None."""
     if result.intent == "unsupported":
         return (
             "Sorry, I couldn't translate that question into a supported "
@@ -40,20 +40,85 @@ def explain(
         )
     if result.plot_kind == "none":
         return f"No data matched: {result.summary_for_llm}"
+    return None
+
 
+def _build_messages(question: str, plan: Plan, result: Result) -> list[dict]:
     user_msg = (
         f"Question: {question}\n"
         f"Plan intent: {plan.intent}\n"
         f"Result summary: {result.summary_for_llm}\n\n"
         f"Write the answer now."
     )
-    messages = [
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_msg},
     ]
+
+
+def explain(
+    question: str,
+    plan: Plan,
+    result: Result,
+    model: Optional[str] = None,
+    rich: bool = False,
+) -> str:
+    """Return a human-readable answer; never raises.
+
+    ``rich=True`` always asks the LLM instead of using a local template.
+    """
+    canned = _canned_answer(result)
+    if canned is not None:
+        return canned
+    if not rich:
+        local = render_answer(question, plan, result)
+        if local is not None:
+            return local
+    messages = _build_messages(question, plan, result)
     try:
         return chat(messages, model=model, temperature=0.2, max_tokens=600).strip()
     except OpenRouterError as e:
         logger.warning("explainer LLM call failed: %s", e)
         # Graceful fallback: just show the deterministic summary.
         return result.summary_for_llm
+
+
+def explain_stream(
+    question: str,
+    plan: Plan,
+    result: Result,
+    model: Optional[str] = None,
+    rich: bool = False,
+) -> Iterator[str]:
+    """Yield the answer in fragments as the LLM streams it; never raises.
+
+    Template answers (the default unless ``rich``) arrive as one fragment.
+    Falls back to the deterministic summary if the stream fails before any
+    text arrived; a stream cut short mid-answer keeps the partial text.
+    """
+    canned = _canned_answer(result)
+    if canned is not None:
+        yield canned
+        return
+    if not rich:
+        local = render_answer(question, plan, result)
+        if local is not None:
+            yield local
+            return
+    messages = _build_messages(question, plan, result)
+    started = False
+    try:
+        for fragment in chat_stream(messages, model=model, temperature=0.2, max_tokens=600):
+            if not started:
+                fragment = fragment.lstrip()
+                if not fragment:
+                    continue
+                started = True
+            yield fragment
+    except OpenRouterError as e:
+        logger.warning("explainer LLM stream failed: %s", e)
+        if not started:
+            yield result.summary_for_llm
+        return
+    if not started:
+        yield result.summary_for_llm
@@ -0,0 +1,278 @@
+"""Local OpenAI-compatible stand-in for OpenRouter.
+
+Serves ``POST /chat/completions`` (also under ``/api/v1``) so the planner,
+explainer and chat tab can be exercised and benchmarked without an API key.
+Point the client at it with ``OPENROUTER_BASE_URL=http://127.0.0.1:8765``
+and any non-empty ``OPENROUTER_API_KEY``.
+
+Replies are, in order of preference:
+  1. a replayed completion: the first entry of the ``--replay`` JSONL file
+     (``{"match": "substring of the last user message", "content": "..."}``)
+     whose ``match`` occurs in the request;
+  2. a scripted completion: planner requests get the fast-path router's plan
+     for the question (``unsupported`` if it does not route), explainer
+     requests get a sentence built from the result summary.
+
+Latency is log-normal around ``latency`` seconds with spread ``jitter``.
+A share of requests fails with HTTP 500 (``error_rate``) or HTTP 429 with a
+``Retry-After`` header (``rate_limit_rate``). Streaming requests are answered
+as server-sent events over chunked transfer-encoding, one word per event,
+``chunk_delay`` seconds apart.
+
+Usage::
+
+    with serve_mock_openrouter(MockConfig(latency=0.8)) as server:
+        openrouter_client.OPENROUTER_BASE_URL = server.base_url
+
+Run ``python -m llm_chat.mock_openrouter --port 8765`` (from ``src/``) to
+start it standalone; ``python -m llm_chat.bench_chat`` drives it with
+simulated chat users.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from llm_chat.planner import SYSTEM_PROMPT as PLANNER_PROMPT
+from llm_chat.router import route_question
+from llm_chat.schema import plan_to_dict
+
+_QUESTION_RE = re.compile(r"^Question: (.*)$", re.MULTILINE)
+_WINDOW_RE = re.compile(r"^Data window: (\{.*\})$", re.MULTILINE)
+_SUMMARY_RE = re.compile(r"^Result summary: (.*)$", re.MULTILINE)
+
+
+@dataclass
+class MockConfig:
+    latency: float = 0.5           # median seconds before the first byte
+    jitter: float = 0.3            # sigma of the log-normal latency
+    error_rate: float = 0.0        # share of HTTP 500 replies
+    rate_limit_rate: float = 0.0   # share of HTTP 429 replies
+    retry_after: float = 1.0       # Retry-After sent with 429s, seconds
+    chunk_delay: float = 0.02      # seconds between streamed words
+    seed: Optional[int] = None
+    replay: list[dict] = field(default_factory=list)
+
+
+def load_replay(path: str) -> list[dict]:
+    """Read ``{"match", "content"}`` entries, one JSON object per line."""
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def _last_user(messages: list[dict]) -> str:
+    for msg in reversed(messages):
+        if msg.get("role") == "user":
+            return str(msg.get("content", ""))
+    return ""
+
+
+def _scripted(messages: list[dict]) -> str:
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    user = _last_user(messages)
+    if system == PLANNER_PROMPT:
+        # Validation retries carry no question; reuse the first user turn.
+        first_user = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+        q = _QUESTION_RE.search(first_user)
+        w = _WINDOW_RE.search(first_user)
+        meta = json.loads(w.group(1)) if w else {}
+        routed = route_question(q.group(1), meta) if q else None
+        if routed is not None and routed.plan is not None:
+            plan = plan_to_dict(routed.plan)
+        else:
+            plan = {"intent": "unsupported", "explanation_hint": "mock: question not routable"}
+        return f"```json\n{json.dumps(plan)}\n```"
+    summary = _SUMMARY_RE.search(user)
+    if summary:
+        return f"Here is what the data shows: {summary.group(1)}."
+    return "This is a mock completion."
+
+
+def completion_for(messages: list[dict], config: MockConfig) -> str:
+    """Text the stand-in answers ``messages`` with."""
+    user = _last_user(messages)
+    for entry in config.replay:
+        if entry.get("match", "") in user:
+            return str(entry.get("content", ""))
+    return _scripted(messages)
+
+
+class MockOpenRouterServer(ThreadingHTTPServer):
+    """HTTP server holding the mock's configuration and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: Optional[MockConfig] = None):
+        super().__init__(address, _Handler)
+        self.config = config or MockConfig()
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "streams": 0}
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive sockets at exit is expected here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def _draw(self) -> tuple[float, float]:
+        """``(failure draw in [0, 1), latency seconds)`` for one request."""
+        with self._lock:
+            self.counts["requests"] += 1
+            return self._rng.random(), self.config.latency * self._rng.lognormvariate(0.0, self.config.jitter)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockOpenRouterServer
+
+    def log_message(self, format, *args):  # noqa: A002 - keep benchmark output quiet
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):  # noqa: N802 - http.server naming
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+
+        config = self.server.config
+        draw, latency = self.server._draw()
+        if draw < config.rate_limit_rate:
+            self.server._count("rate_limited")
+            self._send_json(429, {"error": {"code": 429, "message": "mock rate limit"}},
+                            {"Retry-After": f"{config.retry_after:g}"})
+            return
+        time.sleep(latency)
+        if draw < config.rate_limit_rate + config.error_rate:
+            self.server._count("errors")
+            self._send_json(500, {"error": {"code": 500, "message": "mock upstream error"}})
+            return
+
+        messages = body.get("messages") or []
+        content = completion_for(messages, config)
+        model = body.get("model", "mock")
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content.split()),
+            "total_tokens": prompt_tokens + len(content.split()),
+        }
+        cid = f"mock-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            self.server._count("ok")
+            self._send_json(200, {
+                "id": cid,
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+            return
+
+        self.server._count("streams")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._write_chunk(": OPENROUTER PROCESSING\n\n")
+        for piece in re.findall(r"\S+\s*", content):
+            event = {"id": cid, "model": model, "choices": [{"index": 0, "delta": {"content": piece}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n")
+            time.sleep(config.chunk_delay)
+        final = {"id": cid, "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                 "usage": usage}
+        self._write_chunk(f"data: {json.dumps(final)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+        self.server._count("ok")
+
+
+@contextmanager
+def serve_mock_openrouter(config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+    """Run the mock server in a background thread for the ``with`` block."""
+    server = MockOpenRouterServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--replay", help="JSONL file of {match, content} completions")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        chunk_delay=args.chunk_delay, seed=args.seed,
+        replay=load_replay(args.replay) if args.replay else [],
+    )
+    server = MockOpenRouterServer((args.host, args.port), config)
+    print(f"Mock OpenRouter listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,33 @@
 """Thin OpenRouter client for the LLM chat feature.
 
-Stage 0: minimal wrapper around the OpenRouter chat-completions endpoint
-(OpenAI-compatible). No streaming, no JSON-mode, no retries beyond a single
-network timeout. The goal is to prove the API key + model slug + network path
-work end-to-end inside the Streamlit dashboard.
+Minimal wrapper around the OpenRouter chat-completions endpoint
+(OpenAI-compatible): ``chat`` returns the whole reply, ``chat_stream`` yields
+it incrementally over server-sent events, and ``achat`` is the async variant
+used for concurrent calls.
+
+All calls in the process share:
+  * a keep-alive ``requests.Session`` (no TCP+TLS setup per call),
+  * a token-bucket limiter (``OPENROUTER_RPM`` / ``OPENROUTER_BURST``) so
+    concurrent Streamlit sessions stay under the free-tier rate limit; a
+    429 with ``Retry-After`` pauses the bucket for everyone, and
+  * a bounded log of per-call latency and token usage (``get_metrics``).
 """
 
 from __future__ import annotations
 
+import json
 import logging
 import os
-from typing import Iterable, Optional
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+
+import async_http
 
 try:
     import streamlit as st
@@ -21,21 +36,179 @@ except Exception:  # pragma: no cover - allows import in non-Streamlit contexts
 
 logger = logging.getLogger(__name__)
 
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# Point at a local stand-in (see ``llm_chat.mock_openrouter``) for offline
+# development and benchmarks.
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
 
 # Default free model. Override via env var OPENROUTER_MODEL or by passing
 # `model=` to chat(). Verify the exact slug at https://openrouter.ai/models
-DEFAULT_MODEL = "nvidia/nemotron-3-super-120b-a12b:free"
+DEFAULT_MODEL = os.environ.get("OPENROUTER_MODEL", "nvidia/nemotron-3-super-120b-a12b:free")
 
 # Optional ranking headers recommended by OpenRouter for free-tier traffic.
 _APP_REFERER = os.environ.get("OPENROUTER_REFERER", "http://localhost:8501")
 _APP_TITLE = os.environ.get("OPENROUTER_TITLE", "Energy Market Analysis")
 
 
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+_MAX_RETRY_AFTER = 60.0
+
+
 class OpenRouterError(RuntimeError):
     """Raised for any failure talking to OpenRouter."""
 
 
+class _SendError(OpenRouterError):
+    """A failed send, with the attempts made and the limiter wait (for metrics)."""
+
+    def __init__(self, message: str, attempts: int, waited: float, status=None):
+        super().__init__(message)
+        self.attempts = attempts
+        self.waited = waited
+        self.status = status
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests/second, bursts of ``capacity``.
+
+    ``reserve()`` takes a token (possibly ahead of time) and returns how long
+    the caller must wait before using it, so both blocking and asyncio
+    callers can share one bucket. ``pause()`` holds every caller back, e.g.
+    for a server-provided ``Retry-After``.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; return the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+# Free-tier default is 20 requests/minute; allow small bursts.
+_RATE_LIMITER = TokenBucket(
+    rate=float(os.environ.get("OPENROUTER_RPM", "20")) / 60.0,
+    capacity=float(os.environ.get("OPENROUTER_BURST", "5")),
+)
+
+
+def set_rate_limit(rpm: float, burst: float) -> None:
+    """Replace the shared limiter (benchmarks, or a paid key with higher limits)."""
+    global _RATE_LIMITER
+    _RATE_LIMITER = TokenBucket(rate=rpm / 60.0, capacity=burst)
+
+
+_POOL_SIZE = 8
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+_METRICS: deque = deque(maxlen=500)
+_METRICS_LOCK = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Process-wide keep-alive session for OpenRouter calls."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=_POOL_SIZE))
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=_POOL_SIZE))
+            _SESSION = session
+        return _SESSION
+
+
+def _backoff(attempt: int) -> float:
+    return 1.5 * (2 ** attempt)
+
+
+def _retry_after(headers, fallback: float) -> float:
+    """Seconds to wait from a ``Retry-After`` header (seconds or HTTP date)."""
+    value = headers.get("Retry-After")
+    if not value:
+        return fallback
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return fallback
+    return min(max(seconds, 0.0), _MAX_RETRY_AFTER)
+
+
+def _record(kind: str, model: str, started: float, status, attempts: int,
+            waited: float, usage: Optional[dict] = None, ttft: Optional[float] = None) -> None:
+    usage = usage or {}
+    entry = {
+        "ts": time.time(),
+        "kind": kind,
+        "model": model,
+        "status": status,
+        "latency_s": round(time.perf_counter() - started, 4),
+        "ttft_s": round(ttft, 4) if ttft is not None else None,
+        "rate_limit_wait_s": round(waited, 4),
+        "attempts": attempts,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+    }
+    with _METRICS_LOCK:
+        _METRICS.append(entry)
+    logger.debug("OpenRouter %s %s status=%s latency=%.2fs", kind, model, status, entry["latency_s"])
+
+
+def get_metrics(last: Optional[int] = None) -> dict:
+    """Summary of recent calls plus the raw per-call records.
+
+    Latency percentiles cover successful calls; ``recent`` holds the last
+    ``last`` records (all of the bounded log by default).
+    """
+    with _METRICS_LOCK:
+        records = list(_METRICS)
+    ok = sorted(r["latency_s"] for r in records if r["status"] == 200)
+
+    def _pct(q: float) -> Optional[float]:
+        return ok[min(len(ok) - 1, int(q * len(ok)))] if ok else None
+
+    return {
+        "calls": len(records),
+        "errors": sum(1 for r in records if r["status"] != 200),
+        "retries": sum(r["attempts"] - 1 for r in records),
+        "latency_p50_s": _pct(0.5),
+        "latency_p95_s": _pct(0.95),
+        "rate_limit_wait_s": round(sum(r["rate_limit_wait_s"] for r in records), 3),
+        "prompt_tokens": sum(r["prompt_tokens"] or 0 for r in records),
+        "completion_tokens": sum(r["completion_tokens"] or 0 for r in records),
+        "recent": records[-last:] if last else records,
+    }
+
+
+def reset_metrics() -> None:
+    with _METRICS_LOCK:
+        _METRICS.clear()
+
+
 def _get_api_key() -> str | None:
     """Fetch the OpenRouter API key from Streamlit secrets or environment."""
     if st is not None:
@@ -48,33 +221,8 @@ def _get_api_key() -> str | None:
     return os.environ.get("OPENROUTER_API_KEY")
 
 
-def chat(
-    messages: Iterable[dict],
-    model: str | None = None,
-    temperature: float = 0.2,
-    max_tokens: int = 512,
-    timeout: float = 60.0,
-    json_mode: bool = False,
-    max_retries: int = 2,
-) -> str:
-    """Send a chat-completion request to OpenRouter and return the assistant text.
-
-    Parameters
-    ----------
-    messages : iterable of {"role", "content"}
-        Standard OpenAI-style chat messages.
-    model : str, optional
-        OpenRouter model slug. Defaults to ``DEFAULT_MODEL``.
-    temperature, max_tokens, timeout
-        Standard generation / network knobs.
-    json_mode : bool
-        When True, request ``response_format={"type": "json_object"}``.
-        Some free models ignore this; callers must still parse defensively.
-    max_retries : int
-        Retries on HTTP 429 / 5xx with exponential backoff. Applies per call.
-    """
-    import time as _time
-
+def _build_request(messages, model, temperature, max_tokens, json_mode):
+    """Return ``(payload, headers)`` for a chat-completion request."""
     api_key = _get_api_key()
     if not api_key:
         raise OpenRouterError(
@@ -97,47 +245,256 @@ def chat(
         "HTTP-Referer": _APP_REFERER,
         "X-Title": _APP_TITLE,
     }
+    return payload, headers
 
-    last_err: Optional[str] = None
+
+def _extract_content(data: dict, raw: str) -> str:
+    try:
+        return data["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError) as e:
+        raise OpenRouterError(f"Unexpected response shape: {raw!r}") from e
+
+
+def _send(payload: dict, headers: dict, timeout: float, max_retries: int,
+          stream: bool = False):
+    """POST with the shared session, limiter and retry policy.
+
+    Returns ``(response, attempts, waited)`` for a 200 reply; raises
+    ``OpenRouterError`` (a ``_SendError`` with the same counts) otherwise.
+    Every attempt takes a limiter token; 429 / 5xx are retried with
+    exponential backoff, and a 429's ``Retry-After`` also pauses the shared
+    limiter.
+    """
+    url = f"{OPENROUTER_BASE_URL}/chat/completions"
+    waited = 0.0
     for attempt in range(max_retries + 1):
+        waited += _RATE_LIMITER.acquire()
         try:
-            resp = requests.post(
-                f"{OPENROUTER_BASE_URL}/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=timeout,
-            )
+            resp = _get_session().post(url, json=payload, headers=headers, timeout=timeout, stream=stream)
         except requests.RequestException as e:
-            last_err = f"Network error: {e}"
             if attempt < max_retries:
-                _time.sleep(1.5 * (2 ** attempt))
+                time.sleep(_backoff(attempt))
                 continue
-            raise OpenRouterError(last_err) from e
+            raise _SendError(f"Network error: {e}", attempt + 1, waited) from e
 
         if resp.status_code == 200:
-            try:
-                data = resp.json()
-                return data["choices"][0]["message"]["content"]
-            except (KeyError, IndexError, ValueError) as e:
-                raise OpenRouterError(
-                    f"Unexpected response shape: {resp.text!r}"
-                ) from e
+            return resp, attempt + 1, waited
+
+        status = resp.status_code
+        try:
+            err_body = resp.json()
+        except Exception:
+            err_body = resp.text
+        resp.close()
 
+        delay = _retry_after(resp.headers, _backoff(attempt))
+        if status == 429:
+            _RATE_LIMITER.pause(delay)
         # Retry on rate limit / server error.
-        if resp.status_code in (429, 500, 502, 503, 504) and attempt < max_retries:
+        if status in _RETRY_STATUSES and attempt < max_retries:
             logger.warning(
-                "OpenRouter HTTP %d (attempt %d/%d), backing off",
-                resp.status_code,
+                "OpenRouter HTTP %d (attempt %d/%d), backing off %.1fs",
+                status,
                 attempt + 1,
                 max_retries + 1,
+                delay,
             )
-            _time.sleep(1.5 * (2 ** attempt))
+            time.sleep(delay)
             continue
+        raise _SendError(f"HTTP {status}: {err_body}", attempt + 1, waited, status)
+
+    raise _SendError("Unknown error", max_retries + 1, waited)  # pragma: no cover - loop returns/raises
+
+
+async def _asend(payload: dict, headers: dict, timeout: float, max_retries: int):
+    """``_send`` on the shared ``async_http`` pool, for ``achat``.
 
+    The transport does not retry (``max_retries=0``): each attempt here takes
+    its own limiter token and a 429 pauses the bucket before the next one.
+    """
+    import asyncio
+
+    url = f"{OPENROUTER_BASE_URL}/chat/completions"
+    waited = 0.0
+    for attempt in range(max_retries + 1):
+        wait = _RATE_LIMITER.reserve()
+        if wait > 0:
+            waited += wait
+            await asyncio.sleep(wait)
         try:
-            err_body = resp.json()
-        except Exception:
-            err_body = resp.text
-        raise OpenRouterError(f"HTTP {resp.status_code}: {err_body}")
+            resp = await async_http.request("POST", url, json=payload, headers=headers,
+                                            timeout=timeout, max_retries=0)
+            return resp, attempt + 1, waited
+        except async_http.AsyncHTTPError as e:
+            delay = _retry_after(e.headers, _backoff(attempt))
+            if e.status == 429:
+                _RATE_LIMITER.pause(delay)
+            # Network errors (no status) and 429 / 5xx are retried.
+            if (e.status is None or e.status in _RETRY_STATUSES) and attempt < max_retries:
+                logger.warning(
+                    "OpenRouter async attempt %d/%d failed (%s), backing off %.1fs",
+                    attempt + 1,
+                    max_retries + 1,
+                    e.status or "network error",
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                continue
+            raise _SendError(str(e), attempt + 1, waited, e.status) from e
+
+    raise _SendError("Unknown error", max_retries + 1, waited)  # pragma: no cover - loop returns/raises
+
+
+def chat(
+    messages: Iterable[dict],
+    model: str | None = None,
+    temperature: float = 0.2,
+    max_tokens: int = 512,
+    timeout: float = 60.0,
+    json_mode: bool = False,
+    max_retries: int = 2,
+) -> str:
+    """Send a chat-completion request to OpenRouter and return the assistant text.
 
-    raise OpenRouterError(last_err or "Unknown error")
+    Parameters
+    ----------
+    messages : iterable of {"role", "content"}
+        Standard OpenAI-style chat messages.
+    model : str, optional
+        OpenRouter model slug. Defaults to ``DEFAULT_MODEL``.
+    temperature, max_tokens, timeout
+        Standard generation / network knobs.
+    json_mode : bool
+        When True, request ``response_format={"type": "json_object"}``.
+        Some free models ignore this; callers must still parse defensively.
+    max_retries : int
+        Retries on HTTP 429 / 5xx with exponential backoff (or the server's
+        ``Retry-After``). Applies per call.
+    """
+    payload, headers = _build_request(messages, model, temperature, max_tokens, json_mode)
+    started = time.perf_counter()
+    try:
+        resp, attempts, waited = _send(payload, headers, timeout, max_retries)
+    except _SendError as e:
+        _record("chat", payload["model"], started, "error", e.attempts, e.waited)
+        raise
+
+    try:
+        data = resp.json()
+    except ValueError as e:
+        _record("chat", payload["model"], started, "bad_response", attempts, waited)
+        raise OpenRouterError(
+            f"Unexpected response shape: {resp.text!r}"
+        ) from e
+    _record("chat", payload["model"], started, 200, attempts, waited, usage=data.get("usage"))
+    return _extract_content(data, resp.text)
+
+
+def _iter_sse_deltas(resp, usage: Optional[dict] = None) -> Iterator[str]:
+    """Yield content deltas from an OpenAI-style SSE response body.
+
+    If the stream reports token ``usage`` (OpenRouter sends it in the last
+    chunk), it is copied into ``usage``.
+    """
+    # chunk_size=None hands over data as it arrives instead of filling 512 B.
+    for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+        # Blank keep-alives and ": OPENROUTER PROCESSING" comments.
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            logger.debug("Skipping malformed SSE line: %r", line)
+            continue
+        if "error" in chunk:
+            raise OpenRouterError(f"Stream error: {chunk['error']}")
+        if usage is not None and isinstance(chunk.get("usage"), dict):
+            usage.update(chunk["usage"])
+        try:
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+        except (KeyError, IndexError, TypeError, AttributeError):
+            continue
+        if delta:
+            yield delta
+
+
+def chat_stream(
+    messages: Iterable[dict],
+    model: str | None = None,
+    temperature: float = 0.2,
+    max_tokens: int = 512,
+    timeout: float = 60.0,
+    max_retries: int = 2,
+) -> Iterator[str]:
+    """Stream a chat completion, yielding text fragments as they arrive.
+
+    Same arguments as :func:`chat` (no JSON mode). Retries on network errors
+    and HTTP 429 / 5xx only until the stream is open; once tokens have been
+    yielded, any failure raises ``OpenRouterError`` so the caller can decide
+    what to do with the partial text.
+    """
+    payload, headers = _build_request(messages, model, temperature, max_tokens, json_mode=False)
+    payload["stream"] = True
+    headers["Accept"] = "text/event-stream"
+
+    started = time.perf_counter()
+    try:
+        resp, attempts, waited = _send(payload, headers, timeout, max_retries, stream=True)
+    except _SendError as e:
+        _record("stream", payload["model"], started, "error", e.attempts, e.waited)
+        raise
+
+    usage: dict = {}
+    ttft = None
+    status = "interrupted"
+    with resp:
+        try:
+            for delta in _iter_sse_deltas(resp, usage):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                yield delta
+            status = 200
+        except requests.RequestException as e:
+            raise OpenRouterError(f"Stream interrupted: {e}") from e
+        finally:
+            _record("stream", payload["model"], started, status, attempts, waited, usage=usage, ttft=ttft)
+
+
+async def achat(
+    messages: Iterable[dict],
+    model: str | None = None,
+    temperature: float = 0.2,
+    max_tokens: int = 512,
+    timeout: float = 60.0,
+    json_mode: bool = False,
+    max_retries: int = 2,
+    usage: Optional[dict] = None,
+) -> str:
+    """Async variant of :func:`chat` on the shared ``async_http`` pool.
+
+    Same arguments and errors as ``chat``; token ``usage`` reported by the
+    server is copied into ``usage`` when given. Requests share the process-wide
+    keep-alive pool, the ``openrouter.ai`` concurrency limit and the rate
+    limiter (every retry takes a token, as in ``chat``); they are not
+    coalesced, since completions are not idempotent.
+    Use it to run several completions concurrently (``async_http.run_all``).
+    """
+    payload, headers = _build_request(messages, model, temperature, max_tokens, json_mode)
+    started = time.perf_counter()
+    try:
+        resp, attempts, waited = await _asend(payload, headers, timeout, max_retries)
+    except _SendError as e:
+        _record("achat", payload["model"], started, e.status or "error", e.attempts, e.waited)
+        raise
+    try:
+        data = resp.json()
+    except ValueError as e:
+        _record("achat", payload["model"], started, "bad_response", attempts, waited)
+        raise OpenRouterError(f"Unexpected response shape: {resp.text!r}") from e
+    _record("achat", payload["model"], started, 200, attempts, waited, usage=data.get("usage"))
+    if usage is not None and isinstance(data.get("usage"), dict):
+        usage.update(data["usage"])
+    return _extract_content(data, resp.text)
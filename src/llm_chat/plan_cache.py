@@ -0,0 +1,267 @@
+"""Persistent cache of validated planner output.
+
+The same handful of questions ("what was the highest price?") is asked many
+times a day, and each one costs one or two OpenRouter round trips. This
+cache stores the validated ``Plan`` for a question so repeats skip the LLM.
+
+Key = (normalised question, data-window shape, recent-history digest, model):
+  * the question is lower-cased, accent-folded and stripped of punctuation
+    and politeness filler, so "What was the MAX price?" and "what was the
+    max price" collide;
+  * the window shape (country, start/end dates, granularity, columns) is
+    what the planner uses to clamp dates and pick columns;
+  * the history digest covers the last turns the planner would see, so
+    follow-ups ("and in August?") only hit when the context matches;
+  * the model the planner was asked to use, so a plan from one model is
+    not served to a request that names another.
+
+Entries expire after ``ttl_seconds`` and the least recently used are
+evicted beyond ``max_entries``. The cache is persisted as JSON (path from
+``PLAN_CACHE_PATH`` or ``data/cache/plan_cache.json``) and reloaded on first
+use. Optional fuzzy matching compares word shingles (Jaccard) among entries
+with the same window, history and model, and only when the numbers in both
+questions are identical; it is off by default.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from llm_chat.schema import Plan, PlanValidationError, plan_to_dict, validate_plan
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "cache", "plan_cache.json")
+)
+PLAN_CACHE_PATH = os.environ.get("PLAN_CACHE_PATH", _DEFAULT_PATH)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+# Keys of df_meta that shape the plan (price stats do not).
+_SHAPE_KEYS = ("country", "start", "end", "granularity_min", "columns")
+# History turns the planner sees (see planner._format_history).
+_HISTORY_TURNS = 3
+
+_FILLER = {"please", "pls", "plz", "kindly", "thanks", "thank", "por", "favor", "favour"}
+# Ignored when comparing shingles (fuzzy matching only, never for exact keys).
+_STOPWORDS = {
+    "a", "an", "the", "was", "were", "is", "are", "be", "what", "which", "how",
+    "of", "in", "on", "for", "to", "during", "did", "do", "does", "me", "show",
+    "tell", "give", "can", "you", "i", "we",
+}
+_PUNCT_RE = re.compile(r"[^\w\s.\-]")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question used as the cache key."""
+    text = unicodedata.normalize("NFKD", question)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = _PUNCT_RE.sub(" ", text)
+    # Keep decimal points and minus signs inside numbers only.
+    text = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", text)
+    text = re.sub(r"-(?!\d)", " ", text)
+    return " ".join(w for w in text.split() if w not in _FILLER)
+
+
+def window_shape(df_meta: dict) -> str:
+    """Stable string for the parts of ``df_meta`` the planner depends on."""
+    return json.dumps({k: df_meta.get(k) for k in _SHAPE_KEYS}, sort_keys=True, default=str)
+
+
+def history_digest(history: Optional[list]) -> str:
+    """Short hash of the recent turns fed to the planner ('' when none)."""
+    if not history:
+        return ""
+    recent = [
+        {"question": normalize_question(t.get("question", "")), "plan": t.get("plan_dict", {})}
+        for t in history[-_HISTORY_TURNS:]
+    ]
+    payload = json.dumps(recent, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def _shingles(normalized: str) -> set[str]:
+    words = [w for w in normalized.split() if w not in _STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class PlanCache:
+    """Thread-safe TTL + LRU cache of plans, persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = PLAN_CACHE_PATH,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 fuzzy: bool = False,
+                 fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.fuzzy = fuzzy
+        self.fuzzy_threshold = fuzzy_threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # --- persistence -----------------------------------------------------
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable plan cache %s: %s", self.path, e)
+            return
+        now = time.time()
+        for key, entry in raw:
+            if now - entry.get("created", 0) <= self.ttl_seconds:
+                self._entries[key] = entry
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(list(self._entries.items()), fh, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            # Read-only deployments keep the in-memory cache.
+            logger.warning("Plan cache write failed: %s", e)
+
+    # --- lookup ----------------------------------------------------------
+    @staticmethod
+    def make_key(question: str, df_meta: dict, history: Optional[list] = None, model: str = "") -> str:
+        return "\x1f".join((normalize_question(question), window_shape(df_meta),
+                            history_digest(history), model))
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return now - entry["created"] > self.ttl_seconds
+
+    def _fuzzy_lookup(self, normalized: str, shape: str, digest: str, model: str,
+                      now: float) -> Optional[str]:
+        target = _shingles(normalized)
+        numbers = _NUMBER_RE.findall(normalized)
+        best_key, best_score = None, self.fuzzy_threshold
+        for key, entry in self._entries.items():
+            if (entry["shape"] != shape or entry["history"] != digest
+                    or entry.get("model") != model or self._expired(entry, now)):
+                continue
+            if _NUMBER_RE.findall(entry["question"]) != numbers:
+                continue
+            score = _jaccard(target, _shingles(entry["question"]))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def get(self, question: str, df_meta: dict, history: Optional[list] = None,
+            model: str = "") -> Optional[Plan]:
+        """Return the cached ``Plan`` for this question/context/model, or None."""
+        key = self.make_key(question, df_meta, history, model)
+        now = time.time()
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                entry = None
+            if entry is None and self.fuzzy:
+                normalized, shape, digest, _ = key.split("\x1f")
+                match = self._fuzzy_lookup(normalized, shape, digest, model, now)
+                if match is not None:
+                    key, entry = match, self._entries[match]
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry["hits"] = entry.get("hits", 0) + 1
+            self.hits += 1
+            raw = entry["plan"]
+        try:
+            return validate_plan(raw)
+        except PlanValidationError as e:
+            # Schema changed since the entry was written; drop it.
+            logger.info("Discarding stale cached plan: %s", e)
+            self.invalidate(question, df_meta, history, model)
+            return None
+
+    def put(self, question: str, df_meta: dict, plan: Plan, history: Optional[list] = None,
+            model: str = "") -> None:
+        """Store a validated plan (``unsupported`` plans are never cached)."""
+        if plan.intent == "unsupported":
+            return
+        key = self.make_key(question, df_meta, history, model)
+        normalized, shape, digest, _ = key.split("\x1f")
+        with self._lock:
+            self._load()
+            self._entries[key] = {
+                "plan": plan_to_dict(plan),
+                "question": normalized,
+                "shape": shape,
+                "history": digest,
+                "model": model,
+                "created": time.time(),
+                "hits": 0,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def invalidate(self, question: str, df_meta: dict, history: Optional[list] = None,
+                   model: str = "") -> None:
+        key = self.make_key(question, df_meta, history, model)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_DEFAULT_CACHE: Optional[PlanCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache:
+    """Process-wide cache shared by all Streamlit sessions.
+
+    Fuzzy matching is enabled with ``PLAN_CACHE_FUZZY=1``.
+    """
+    global _DEFAULT_CACHE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = PlanCache(fuzzy=os.environ.get("PLAN_CACHE_FUZZY") == "1")
+        return _DEFAULT_CACHE
@@ -7,17 +7,32 @@ JSON-schema / tool-calling. Strategy:
   3. ``validate_plan`` raises a clear error on failure.
   4. On failure we retry ONCE with the validation error appended.
   5. After 2 failures, return an ``unsupported`` plan so the UI degrades gracefully.
+
+Free models have a heavy latency tail, so requests are hedged: if the
+primary model has not produced a valid plan after ``PLANNER_HEDGE_DELAY``
+seconds, the next fallback model (``PLANNER_FALLBACK_MODELS``) is raced
+against it and the first valid plan wins (the others are cancelled). Without
+fallback models there is no hedging.
+
+Validated plans are kept in ``plan_cache``, per model, so repeated questions
+skip the LLM.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import re
+import time
 from typing import Any, Optional
 
-from llm_chat.openrouter_client import OpenRouterError, chat
+import async_http
+from llm_chat.openrouter_client import DEFAULT_MODEL, OpenRouterError, achat
+from llm_chat.plan_cache import PlanCache, get_plan_cache
 from llm_chat.schema import Plan, PlanValidationError, validate_plan
+from perf import timed
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +42,9 @@ _FIRST_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
 
 SYSTEM_PROMPT = """You convert questions about an electricity day-ahead price time series into a strict JSON plan.
 
-The data is a single price series in EUR/MWh, indexed by tz-naive datetime (Europe/Madrid).
+The data is a price series in EUR/MWh, indexed by tz-naive datetime (Europe/Madrid).
+It may also carry ENTSO-E context series in MW, joined on the same index; the
+ones available are listed under "columns" in the data window.
 
 Reply with ONLY a JSON object inside a ```json ... ``` fenced block. No prose outside the fence.
 
@@ -36,14 +53,15 @@ Schema:
   "intent": "extremum" | "aggregate" | "threshold_hours" | "slice"
           | "compare" | "distribution" | "top_k" | "tariff_band"
           | "negative_prices" | "peak_offpeak" | "streak" | "arbitrage"
-          | "unsupported",
+          | "percentile" | "rolling" | "volatility" | "ramp"
+          | "multi" | "unsupported",
 
   "extremum_kind": "min" | "max",                       // required for extremum
 
   "aggregation": "mean"|"median"|"sum"|"min"|"max"|"std"|"count",
                                                         // required for aggregate and compare
   "group_by": "none"|"hour_of_day"|"day_of_week"|"month"|"date",
-                                                        // aggregate only, default "none"
+                                                        // aggregate and percentile, default "none"
 
   "conditions": [{"op": ">"|"<"|">="|"<="|"==", "value": number}],
                                                         // required for threshold_hours and streak
@@ -61,11 +79,36 @@ Schema:
   "preset": "peak_vs_offpeak"|"weekday_vs_weekend"|"summer_vs_winter",
                                                         // required for peak_offpeak
 
-  "min_length": int,                                    // streak, default 1 (samples)
+  "min_length": number,                                 // streak, minimum run duration in hours, default 0
+  "streak_mode": "longest"|"top_k"|"per_day"|"crossing_midnight"|"histogram",
+                                                        // streak, default "longest"; "top_k" uses "k"
 
   "arbitrage_direction": "best"|"worst",                // arbitrage, default "best"
   "arbitrage_k": int,                                   // arbitrage, default 5
 
+  "percentiles": [number, ...],                         // percentile, 1-5 values in 0..100,
+                                                        // default [5, 50, 95]
+
+  "window_days": int,                                   // rolling and volatility, default 30
+                                                        // (trailing calendar days, 1-366)
+  "volatility_kind": "daily_change"|"intraday",         // volatility, default "daily_change"
+
+  "ramp_hours": int,                                    // ramp, default 1 (1-24)
+  "ramp_direction": "both"|"up"|"down",                 // ramp, default "both"
+
+  "steps": [{...plan without "steps"..., "window_from": int}, ...],
+                                                        // required for multi (2-4 entries); each step
+                                                        // is a plan of any other intent. "window_from"
+                                                        // (optional) = index of an EARLIER step whose
+                                                        // answer (its day, highlighted range or slice)
+                                                        // becomes this step's time_window
+
+  "column": "price"|"load"|"load_forecast"|"wind"|"solar"
+          |"wind_forecast"|"solar_forecast"|"flow_es_pt"|"flow_es_fr",
+                                                        // optional, default "price"; only for
+                                                        // extremum, aggregate, slice, compare,
+                                                        // percentile, rolling, volatility, ramp
+
   "time_window": {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"},
                                                         // optional for most; required for slice
 
@@ -84,16 +127,40 @@ Choosing the intent:
 - "negative_prices" — questions about negative-price hours / when prices went below zero.
 - "peak_offpeak" — pre-canned comparisons: peak vs off-peak hours, weekday vs weekend, summer vs winter. Use this instead of "compare" when the user does not supply explicit dates.
 - "streak" — longest or consecutive runs of hours/days meeting a condition ("longest stretch above X", "longest run of negative prices").
+  streak_mode: "top_k" for the N longest runs, "per_day" for how many runs happen each day,
+  "crossing_midnight" for runs that continue past midnight, "histogram" for how long runs usually last.
+  "for at least N hours (in a row)" is "min_length": N, not a condition.
 - "arbitrage" — daily max-min price spread (battery arbitrage potential). "best" = biggest spreads, "worst" = smallest.
+- "percentile" — percentiles / quantiles ("95th percentile price per month", "P10 and P90").
+- "rolling" — moving statistics over time ("30-day moving average", "rolling 7-day max"); "aggregation" is one of mean, min, max, std.
+- "volatility" — how volatile prices are: "daily_change" = rolling std of day-on-day changes in the daily average, "intraday" = spread of prices within each day.
+- "ramp" — how fast prices rise or fall from one hour to the next ("intraday ramp rates", "biggest 3-hour price jump").
+- "multi" — compound questions that need two or more of the above ("compare summer vs winter, then show the top 5 days"; "find the day with the highest price and show its negative-price hours"). Use ONE multi plan instead of answering only part of the question.
 - "unsupported" — when the question cannot be expressed above.
 
 Rules:
 - Dates MUST be inside the data window provided in the user message. Clamp if needed.
-- Do NOT invent columns or metrics other than price.
+- Do NOT invent columns or metrics. Use "column" only with a series listed in the data window.
 - If the user follow-up refers to a previous question ("and what about August?"), inherit context from the recent turns shown in the user message.
 """
 
 
+_DEFAULT_HEDGE_DELAY = 5.0
+
+
+def _fallback_models() -> list[str]:
+    """Hedge targets from ``PLANNER_FALLBACK_MODELS`` (none when unset)."""
+    raw = os.environ.get("PLANNER_FALLBACK_MODELS", "")
+    return [m.strip() for m in raw.split(",") if m.strip()]
+
+
+def _hedge_delay() -> float:
+    try:
+        return float(os.environ.get("PLANNER_HEDGE_DELAY", _DEFAULT_HEDGE_DELAY))
+    except ValueError:
+        return _DEFAULT_HEDGE_DELAY
+
+
 def build_df_meta(df, country: str) -> dict[str, Any]:
     """Compact metadata sent to the planner. Never includes raw rows."""
     if df is None or df.empty:
@@ -108,6 +175,7 @@ def build_df_meta(df, country: str) -> dict[str, Any]:
         "price_min": round(float(df["price"].min()), 2),
         "price_max": round(float(df["price"].max()), 2),
         "price_mean": round(float(df["price"].mean()), 2),
+        "columns": [str(c) for c in df.columns],
     }
 
 
@@ -150,11 +218,17 @@ def _format_history(history: Optional[list]) -> str:
     return "\n".join(lines) + "\n\n"
 
 
+@timed()
 def plan_question(
     question: str,
     df_meta: dict,
     model: Optional[str] = None,
     history: Optional[list] = None,
+    cache: Optional[PlanCache] = None,
+    use_cache: bool = True,
+    fallback_models: Optional[list[str]] = None,
+    hedge_delay: Optional[float] = None,
+    trace: Optional[dict] = None,
 ) -> Plan:
     """Run the planner; return a validated ``Plan`` (possibly ``unsupported``).
 
@@ -163,7 +237,35 @@ def plan_question(
     history : list, optional
         Previous chat turns, each a dict with ``question``, ``plan_dict``, ``summary``.
         Only the last 3 are sent, to keep tokens bounded.
+    cache : PlanCache, optional
+        Plan cache to consult and fill. Defaults to the process-wide cache.
+    use_cache : bool
+        Set False to always call the LLM (the result is still not stored).
+    fallback_models : list of str, optional
+        Models to hedge to, in order. Defaults to ``PLANNER_FALLBACK_MODELS``
+        (comma-separated); none when unset. Models equal to the primary (or
+        repeated) are dropped, so a request is only hedged across different
+        models and never spends the rate limit on a duplicate.
+    hedge_delay : float, optional
+        Seconds without an answer before the next model is started.
+        Defaults to ``PLANNER_HEDGE_DELAY`` (5 s); 0 disables hedging.
+    trace : dict, optional
+        Filled with ``cached``, ``calls`` (LLM requests), ``retries``
+        (validation re-asks), ``prompt_tokens``, ``completion_tokens`` and
+        the winning ``model``; used by ``llm_chat.evaluation``.
     """
+    primary = model or DEFAULT_MODEL
+    if trace is not None:
+        trace.update(cached=False, calls=0, retries=0, prompt_tokens=0, completion_tokens=0, model=None)
+    if use_cache:
+        cache = cache or get_plan_cache()
+        cached = cache.get(question, df_meta, history, model=primary)
+        if cached is not None:
+            logger.debug("plan cache hit for %r", question)
+            if trace is not None:
+                trace["cached"] = True
+            return cached
+
     history_block = _format_history(history)
     user_msg = (
         f"Data window: {json.dumps(df_meta)}\n\n"
@@ -176,35 +278,50 @@ def plan_question(
         {"role": "user", "content": user_msg},
     ]
 
+    models = list(dict.fromkeys(
+        [primary] + list(_fallback_models() if fallback_models is None else fallback_models)
+    ))
+    delay = _hedge_delay() if hedge_delay is None else hedge_delay
+    plan = async_http.run(_ahedged_plan(messages, models, delay, trace))
+    if use_cache and plan.intent != "unsupported":
+        cache.put(question, df_meta, plan, history, model=primary)
+    return plan
+
+
+class _AttemptFailed(Exception):
+    """One model's planning attempt ended without a valid plan."""
+
+
+async def _aplan_once(messages: list[dict], model: str, trace: Optional[dict] = None) -> Plan:
+    """Planner round trip(s) against one model; raises ``_AttemptFailed``."""
+    messages = list(messages)
     last_error: Optional[str] = None
+    trace = trace if trace is not None else {}
+
+    async def ask(json_mode: bool) -> str:
+        usage: dict = {}
+        trace["calls"] = trace.get("calls", 0) + 1
+        try:
+            return await achat(messages, model=model, temperature=0.0, max_tokens=500,
+                               json_mode=json_mode, usage=usage)
+        finally:
+            for key in ("prompt_tokens", "completion_tokens"):
+                trace[key] = trace.get(key, 0) + int(usage.get(key) or 0)
+
     for attempt in range(2):
         # First attempt requests json_mode; on retry we drop it in case the
         # model rejected it (some free models return 400 on response_format).
         try:
-            raw_text = chat(
-                messages,
-                model=model,
-                temperature=0.0,
-                max_tokens=500,
-                json_mode=(attempt == 0),
-            )
+            raw_text = await ask(json_mode=(attempt == 0))
         except OpenRouterError as e:
             # If json_mode was the trigger, retry once without it.
             if attempt == 0 and "response_format" in str(e).lower():
                 try:
-                    raw_text = chat(
-                        messages,
-                        model=model,
-                        temperature=0.0,
-                        max_tokens=500,
-                        json_mode=False,
-                    )
+                    raw_text = await ask(json_mode=False)
                 except OpenRouterError as e2:
-                    logger.warning("planner LLM call failed: %s", e2)
-                    return Plan(intent="unsupported", explanation_hint=f"LLM error: {e2}")
+                    raise _AttemptFailed(f"LLM error: {e2}") from e2
             else:
-                logger.warning("planner LLM call failed: %s", e)
-                return Plan(intent="unsupported", explanation_hint=f"LLM error: {e}")
+                raise _AttemptFailed(f"LLM error: {e}") from e
 
         parsed = _extract_json(raw_text)
         if parsed is None:
@@ -217,6 +334,7 @@ def plan_question(
 
         # Retry once with the error fed back.
         if attempt == 0:
+            trace["retries"] = trace.get("retries", 0) + 1
             messages.append({"role": "assistant", "content": raw_text})
             messages.append(
                 {
@@ -228,9 +346,54 @@ def plan_question(
                     ),
                 }
             )
+    raise _AttemptFailed(f"could not parse plan: {last_error}")
 
-    logger.info("planner gave up after retry; last_error=%s", last_error)
-    return Plan(
-        intent="unsupported",
-        explanation_hint=f"could not parse plan: {last_error}",
-    )
+
+async def _ahedged_plan(messages: list[dict], models: list[str], hedge_delay: float,
+                        trace: Optional[dict] = None) -> Plan:
+    """First valid plan from a staggered race over ``models``.
+
+    ``models[0]`` starts immediately. Whenever no attempt has finished
+    within ``hedge_delay`` seconds, the next model is started alongside the
+    ones still running; a failed attempt starts the next model at once. The
+    first plan that passes ``validate_plan`` wins and the other requests are
+    cancelled. ``hedge_delay <= 0`` disables hedging (fallbacks are then only
+    tried after a failure).
+    """
+    started = time.perf_counter()
+    running: dict[asyncio.Task, str] = {}
+    queue = list(models)
+    last_error = "no model configured"
+
+    def launch() -> None:
+        model = queue.pop(0)
+        running[asyncio.ensure_future(_aplan_once(messages, model, trace))] = model
+
+    launch()
+    try:
+        while running:
+            timeout = hedge_delay if hedge_delay > 0 and queue else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info("planner hedging to %s after %.1fs", queue[0], time.perf_counter() - started)
+                launch()
+                continue
+            for task in done:
+                model = running.pop(task)
+                try:
+                    plan = task.result()
+                except _AttemptFailed as e:
+                    last_error = str(e)
+                    logger.warning("planner attempt with %s failed: %s", model, e)
+                    continue
+                logger.debug("planner answered by %s in %.2fs", model, time.perf_counter() - started)
+                if trace is not None:
+                    trace["model"] = model
+                return plan
+            if not running and queue:
+                launch()
+    finally:
+        for task in running:
+            task.cancel()
+    logger.info("planner gave up; last_error=%s", last_error)
+    return Plan(intent="unsupported", explanation_hint=last_error)
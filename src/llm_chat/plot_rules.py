@@ -2,17 +2,26 @@
 
 The plot kind is decided by the executor (deterministic), so the LLM never
 chooses chart types.
+
+Figures stay small whatever the range: time-series lines longer than
+``MAX_LINE_POINTS`` are reduced to a min/max envelope (every bucket keeps
+its lowest and highest sample, so spikes survive), traces above
+``WEBGL_POINTS`` points use ``Scattergl``, and highlights with more than
+``MAX_MARKERS`` matching samples are drawn as at most ``MAX_SPANS`` shaded
+spans instead of one marker per sample.
 """
 
 from __future__ import annotations
 
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
 from llm_chat.schema import Result
+from perf import timed
 
 
 _DOW_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
@@ -22,6 +31,73 @@ _MONTH_LABELS = [
 ]
 
 
+MAX_LINE_POINTS = 4000
+WEBGL_POINTS = 1500
+MAX_MARKERS = 500
+MAX_SPANS = 60
+
+
+def _envelope_positions(values: np.ndarray, max_points: int = MAX_LINE_POINTS) -> Optional[np.ndarray]:
+    """Positions of the per-bucket min and max samples, in time order.
+
+    ``None`` when the series is short enough to draw as is. NaN samples are
+    only kept for buckets that hold nothing else, so gaps still show.
+    """
+    n = len(values)
+    if n <= max_points:
+        return None
+    buckets = max(1, max_points // 2)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    padded = padded.reshape(buckets, size)
+    nan = np.isnan(padded)
+    lo = np.where(nan, np.inf, padded).argmin(axis=1)
+    hi = np.where(nan, -np.inf, padded).argmax(axis=1)
+    base = np.arange(buckets) * size
+    pos = np.unique(np.concatenate([base + lo, base + hi]))
+    return pos[pos < n]
+
+
+def _line_trace(x, y, name: str, **kwargs) -> go.Scatter:
+    """Line trace, WebGL-rendered when it is long."""
+    cls = go.Scattergl if len(y) > WEBGL_POINTS else go.Scatter
+    return cls(x=x, y=y, mode="lines", name=name, **kwargs)
+
+
+def _series_line(df: pd.DataFrame, col: str, name: Optional[str] = None) -> go.Figure:
+    """Figure with ``df[col]`` over time, envelope-downsampled when long."""
+    values = df[col].to_numpy(dtype=float)
+    index = df.index
+    pos = _envelope_positions(values)
+    if pos is not None:
+        values, index = values[pos], index[pos]
+        name = f"{name or col} (min/max envelope)"
+    fig = go.Figure(_line_trace(index, values, name or col, showlegend=name is not None))
+    return fig
+
+
+def _mask_runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) positions of the True runs in ``mask``."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _merge_runs(starts: np.ndarray, ends: np.ndarray, max_spans: int = MAX_SPANS) -> tuple[np.ndarray, np.ndarray]:
+    """Join the runs separated by the smallest gaps until ``max_spans`` remain."""
+    if len(starts) <= max_spans:
+        return starts, ends
+    gaps = starts[1:] - ends[:-1]
+    # Keep the (max_spans - 1) widest gaps as boundaries; ties merge as well.
+    cut = np.partition(gaps, len(gaps) - (max_spans - 1))[len(gaps) - (max_spans - 1)]
+    keep = np.flatnonzero(gaps > cut) if max_spans > 1 else np.array([], dtype=int)
+    return np.concatenate([starts[:1], starts[keep + 1]]), np.concatenate([ends[keep], ends[-1:]])
+
+
+def _y_title(column: str) -> str:
+    return "Price (€/MWh)" if column == "price" else f"{column} (MW)"
+
+
 def build_figure(result: Result) -> Optional[go.Figure]:
     """Return a Plotly figure for the result, or None when unplottable."""
     kind = result.plot_kind
@@ -37,27 +113,50 @@ def build_figure(result: Result) -> Optional[go.Figure]:
         return _plot_hline(result)
     if kind == "highlight":
         return _plot_highlight(result)
+    if kind == "percentile":
+        return _plot_percentile(result)
+    if kind == "rolling":
+        return _plot_rolling(result)
+    if kind == "volatility":
+        return _plot_volatility(result)
+    if kind == "ramp":
+        return _plot_ramp(result)
+    if kind == "multi":
+        figs = build_figures(result)
+        return figs[0] if figs else None
     return None
 
 
+@timed()
+def build_figures(result: Result) -> list[go.Figure]:
+    """All figures for a result: one per plottable step of a ``multi`` plan."""
+    if result.plot_kind == "multi":
+        figs = [build_figure(step) for step in result.extra.get("steps", [])]
+        return [f for f in figs if f is not None]
+    fig = build_figure(result)
+    return [fig] if fig is not None else []
+
+
 def _plot_day(r: Result) -> Optional[go.Figure]:
     df = r.slice_df
     if df is None or df.empty:
         return None
-    fig = px.line(df, x=df.index, y="price")
+    col = r.extra.get("column", "price")
+    unit = "€/MWh" if col == "price" else "MW"
+    fig = px.line(df, x=df.index, y=col)
     if r.timestamp is not None and r.value is not None:
         fig.add_scatter(
             x=[r.timestamp],
             y=[r.value],
             mode="markers",
             marker=dict(size=12, color="red", symbol="star"),
-            name=f"{r.value:.2f} €/MWh",
-            hovertemplate=f"{r.timestamp}<br>%{{y:.2f}} €/MWh<extra></extra>",
+            name=f"{r.value:.2f} {unit}",
+            hovertemplate=f"{r.timestamp}<br>%{{y:.2f}} {unit}<extra></extra>",
         )
     fig.update_layout(
         title=f"Day containing the answer ({df.index.min().date()})",
         xaxis_title="Time",
-        yaxis_title="Price (€/MWh)",
+        yaxis_title=_y_title(col),
     )
     return fig
 
@@ -66,11 +165,13 @@ def _plot_slice(r: Result) -> Optional[go.Figure]:
     df = r.slice_df
     if df is None or df.empty:
         return None
-    fig = px.line(df, x=df.index, y="price")
+    col = r.extra.get("column", "price")
+    fig = _series_line(df, col)
+    label = "Prices" if col == "price" else col
     fig.update_layout(
-        title=f"Prices {df.index.min().date()} → {df.index.max().date()}",
+        title=f"{label} {df.index.min().date()} → {df.index.max().date()}",
         xaxis_title="Time",
-        yaxis_title="Price (€/MWh)",
+        yaxis_title=_y_title(col),
     )
     return fig
 
@@ -79,22 +180,36 @@ def _plot_hline(r: Result) -> Optional[go.Figure]:
     df = r.slice_df
     if df is None or df.empty or r.value is None:
         return None
-    fig = px.line(df, x=df.index, y="price")
+    col = r.extra.get("column", "price")
+    unit = "€/MWh" if col == "price" else "MW"
+    fig = _series_line(df, col)
     fig.add_hline(
         y=r.value,
         line_dash="dash",
         line_color="red",
-        annotation_text=f"{r.value:.2f} €/MWh",
+        annotation_text=f"{r.value:.2f} {unit}",
         annotation_position="top right",
     )
+    label = "Prices" if col == "price" else col
     fig.update_layout(
-        title=f"Prices with reference line ({df.index.min().date()} → {df.index.max().date()})",
+        title=f"{label} with reference line ({df.index.min().date()} → {df.index.max().date()})",
         xaxis_title="Time",
-        yaxis_title="Price (€/MWh)",
+        yaxis_title=_y_title(col),
     )
     return fig
 
 
+def _group_labels(values: pd.Series, name: str) -> pd.Series:
+    """Pretty labels for known groupings (weekday and month names, ISO dates)."""
+    if name == "day_of_week":
+        return values.map(lambda i: _DOW_LABELS[int(i)] if 0 <= int(i) < 7 else str(i))
+    if name == "month":
+        return values.map(lambda i: _MONTH_LABELS[int(i) - 1] if 1 <= int(i) <= 12 else str(i))
+    if name == "date":
+        return values.astype(str)
+    return values
+
+
 def _plot_bar(r: Result) -> Optional[go.Figure]:
     s = r.series
     if s is None or s.empty:
@@ -102,20 +217,15 @@ def _plot_bar(r: Result) -> Optional[go.Figure]:
     name = s.index.name or "group"
     df = s.reset_index()
     df.columns = [name, "price"]
+    df[name] = _group_labels(df[name], name)
 
-    # Pretty labels for known groupings.
-    if name == "day_of_week":
-        df[name] = df[name].map(lambda i: _DOW_LABELS[int(i)] if 0 <= int(i) < 7 else str(i))
-    elif name == "month":
-        df[name] = df[name].map(lambda i: _MONTH_LABELS[int(i) - 1] if 1 <= int(i) <= 12 else str(i))
-    elif name == "date":
-        df[name] = df[name].astype(str)
-
+    col = r.extra.get("column", "price")
+    y_label = r.extra.get("y_label")
     fig = px.bar(df, x=name, y="price")
     fig.update_layout(
-        title=f"Price by {name}",
+        title=f"{y_label or ('Price' if col == 'price' else col)} by {name}",
         xaxis_title=name,
-        yaxis_title="Price (€/MWh)",
+        yaxis_title=y_label or _y_title(col),
     )
     return fig
 
@@ -125,22 +235,135 @@ def _plot_highlight(r: Result) -> Optional[go.Figure]:
     mask = r.mask
     if df is None or df.empty or mask is None:
         return None
-    fig = px.line(df, x=df.index, y="price")
-    fig.update_traces(name="All prices", showlegend=True)
-    matching = df.loc[mask.reindex(df.index, fill_value=False)]
-    if not matching.empty:
-        fig.add_scatter(
+    fig = _series_line(df, "price", name="All prices")
+    hit = mask.reindex(df.index, fill_value=False).to_numpy(dtype=bool)
+    n_hit = int(hit.sum())
+    if 0 < n_hit <= MAX_MARKERS:
+        matching = df.loc[hit]
+        fig.add_trace(go.Scatter(
             x=matching.index,
             y=matching["price"],
             mode="markers",
             marker=dict(size=5, color="red"),
             name="Matching",
             hovertemplate="%{x}<br>%{y:.2f} €/MWh<extra></extra>",
-        )
+        ))
+    elif n_hit:
+        starts, ends = _merge_runs(*_mask_runs(hit))
+        index = df.index
+        # A span covers its samples up to the next one (the last sample has none).
+        stops = index[np.minimum(ends, len(index) - 1)]
+        fig.update_layout(shapes=[
+            dict(type="rect", xref="x", yref="paper", x0=x0, x1=x1, y0=0, y1=1,
+                 fillcolor="red", opacity=0.2, line_width=0, layer="below")
+            for x0, x1 in zip(index[starts], stops)
+        ])
+        fig.add_trace(go.Scatter(
+            x=[None], y=[None], mode="markers",
+            marker=dict(size=10, symbol="square", color="red", opacity=0.3),
+            name=f"Matching ({n_hit} samples in {len(starts)} spans)",
+        ))
     cond = r.extra.get("conditions_label", "condition")
     fig.update_layout(
         title=f"Prices with hours matching {cond} highlighted",
         xaxis_title="Time",
         yaxis_title="Price (€/MWh)",
+        showlegend=True,
+    )
+    return fig
+
+
+def _plot_percentile(r: Result) -> Optional[go.Figure]:
+    col = r.extra.get("column", "price")
+    label = "Price" if col == "price" else col
+    table = r.extra.get("table")
+    if table is not None:
+        if table.empty:
+            return None
+        name = table.index.name or "group"
+        df = table.reset_index()
+        df[name] = _group_labels(df[name], name)
+        fig = px.line(df, x=name, y=list(table.columns), markers=name != "date")
+        fig.update_layout(
+            title=f"{label} percentiles by {name}",
+            xaxis_title=name,
+            yaxis_title=_y_title(col),
+            legend_title="Percentile",
+        )
+        return fig
+    df = r.slice_df
+    values = r.extra.get("values") or {}
+    if df is None or df.empty or not values:
+        return None
+    fig = _series_line(df, col)
+    for name, value in values.items():
+        fig.add_hline(y=value, line_dash="dash", line_color="red",
+                      annotation_text=f"{name}: {value:.2f}", annotation_position="top right")
+    fig.update_layout(
+        title=f"{label} percentiles ({df.index.min().date()} → {df.index.max().date()})",
+        xaxis_title="Time",
+        yaxis_title=_y_title(col),
+    )
+    return fig
+
+
+def _plot_rolling(r: Result) -> Optional[go.Figure]:
+    s = r.series
+    if s is None or s.empty:
+        return None
+    col = r.extra.get("column", "price")
+    label = "price" if col == "price" else col
+    fig = px.line(x=s.index, y=s.to_numpy())
+    fig.update_layout(
+        title=f"Rolling {r.extra.get('window_days')}-day {r.extra.get('aggregation')} of {label}",
+        xaxis_title="Date",
+        yaxis_title=_y_title(col),
+    )
+    return fig
+
+
+def _plot_volatility(r: Result) -> Optional[go.Figure]:
+    s = r.series
+    if s is None or s.empty:
+        return None
+    col = r.extra.get("column", "price")
+    label = "price" if col == "price" else col
+    unit = "€/MWh" if col == "price" else "MW"
+    w = r.extra.get("window_days")
+    fig = go.Figure()
+    if r.extra.get("kind") == "intraday":
+        fig.add_scatter(x=s.index, y=s.to_numpy(), mode="lines", name="Daily std",
+                        line=dict(width=1), opacity=0.6)
+        smoothed = r.extra.get("smoothed")
+        if smoothed is not None and not smoothed.empty:
+            fig.add_scatter(x=smoothed.index, y=smoothed.to_numpy(), mode="lines",
+                            name=f"{w}-day mean", line=dict(color="red"))
+        title = f"Intraday volatility of {label} (std within each day)"
+    else:
+        fig.add_scatter(x=s.index, y=s.to_numpy(), mode="lines", name=f"{w}-day std")
+        title = f"Rolling {w}-day volatility of {label} (std of day-on-day changes)"
+    fig.update_layout(title=title, xaxis_title="Date", yaxis_title=f"Std ({unit})")
+    return fig
+
+
+def _plot_ramp(r: Result) -> Optional[go.Figure]:
+    s = r.series
+    if s is None or s.empty:
+        return None
+    col = r.extra.get("column", "price")
+    unit = "€/MWh" if col == "price" else "MW"
+    h = r.extra.get("ramp_hours", 1)
+    colors = ["#2ca02c" if v >= 0 else "#d62728" for v in s.to_numpy()]
+    fig = go.Figure(go.Bar(
+        x=s.index.to_numpy(),
+        y=s.to_numpy(),
+        marker_color=colors,
+        hovertemplate=f"%{{x}}h<br>%{{y:.2f}} {unit}<extra></extra>",
+    ))
+    label = "price" if col == "price" else col
+    fig.update_layout(
+        title=f"Mean {h} h {label} ramp by starting hour ({r.extra.get('direction', 'both')})",
+        xaxis_title="hour_of_day",
+        yaxis_title=f"Change over {h} h ({unit})",
     )
     return fig
@@ -0,0 +1,219 @@
+"""In-memory cache of executor results.
+
+Rephrased questions often map to the same ``Plan``, and a rerun after a
+Plotly interaction asks for the same answer again. ``cached_execute`` keys
+each ``Result`` on a canonical plan hash plus a cheap dataset fingerprint
+(source, range, row count, CRC32 of index and values) and returns the cached
+answer when both match.
+
+Results are stored compactly: whenever ``slice_df`` is a contiguous piece of
+the dataset it is kept as a ``(start, stop)`` row range, and highlight masks
+are kept as the positions of their True rows. Both are rebuilt against the
+caller's frame on a hit, so no entry holds a copy of the full data. Entries
+are evicted least-recently-used once their estimated size exceeds
+``max_bytes`` (``RESULT_CACHE_MAX_MB``, default 64).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from calendar_features import dataset_fingerprint
+from llm_chat.executor import execute
+from llm_chat.schema import Plan, Result, plan_to_dict
+from perf import timed
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+# Rough fixed cost of a Result (summary, extra dict, dataclass) in bytes.
+_ENTRY_OVERHEAD = 2048
+
+
+def plan_hash(plan: Plan) -> str:
+    """Stable hash of everything in the plan that affects the result."""
+    raw = plan_to_dict(plan)
+    raw.pop("explanation_hint", None)
+    for step in raw.get("steps", []):
+        step.pop("explanation_hint", None)
+    payload = json.dumps(raw, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def dataset_key(df: pd.DataFrame) -> str:
+    """Cheap identity of a loaded dataset, values included.
+
+    The index CRC alone is not enough: the ES and PT zones share timestamps.
+    """
+    crc = zlib.crc32(",".join(map(str, df.columns)).encode("utf-8"))
+    for col in df.columns:
+        values = np.ascontiguousarray(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+        crc = zlib.crc32(values.tobytes(), crc)
+    return "|".join((
+        str(df.attrs.get("source", "")),
+        str(df.index[0]),
+        str(df.index[-1]),
+        str(len(df)),
+        dataset_fingerprint(df),
+        f"{crc:08x}",
+    ))
+
+
+def _row_range(df: pd.DataFrame, part: pd.DataFrame) -> Optional[tuple[int, int]]:
+    """``(start, stop)`` if ``part`` is a contiguous row slice of ``df``."""
+    if part.empty or list(part.columns) != list(df.columns):
+        return None
+    start = int(df.index.searchsorted(part.index[0], side="left"))
+    stop = start + len(part)
+    if stop > len(df) or df.index[start] != part.index[0] or df.index[stop - 1] != part.index[-1]:
+        return None
+    return start, stop
+
+
+def _compact(result: Result, df: pd.DataFrame) -> tuple[dict, int]:
+    """Split a Result into a df-free entry; returns ``(entry, size_bytes)``."""
+    entry: dict = {"slice": None, "slice_df": None, "mask": None, "steps": None}
+    size = _ENTRY_OVERHEAD
+    if result.slice_df is not None:
+        rows = _row_range(df, result.slice_df)
+        if rows is not None:
+            entry["slice"] = rows
+        else:
+            entry["slice_df"] = result.slice_df
+            size += int(result.slice_df.memory_usage(deep=True).sum())
+    if result.mask is not None:
+        positions = np.flatnonzero(result.mask.to_numpy()).astype(np.int32)
+        entry["mask"] = positions
+        size += positions.nbytes
+    if result.series is not None:
+        size += int(result.series.memory_usage(deep=True))
+    extra = result.extra
+    if "steps" in extra:
+        steps = [_compact(step, df) for step in extra["steps"]]
+        entry["steps"] = [s for s, _ in steps]
+        size += sum(n for _, n in steps)
+        extra = {k: v for k, v in extra.items() if k != "steps"}
+    entry["result"] = replace(result, slice_df=None, mask=None, extra=extra)
+    return entry, size
+
+
+def _expand(entry: dict, df: pd.DataFrame) -> Result:
+    """Rebuild a full Result from a compact entry against ``df``."""
+    result: Result = entry["result"]
+    slice_df = entry["slice_df"]
+    if entry["slice"] is not None:
+        start, stop = entry["slice"]
+        slice_df = df.iloc[start:stop]
+    mask = None
+    if entry["mask"] is not None:
+        flags = np.zeros(len(df), dtype=bool)
+        flags[entry["mask"]] = True
+        mask = pd.Series(flags, index=df.index)
+    extra = dict(result.extra)
+    if entry["steps"] is not None:
+        extra["steps"] = [_expand(step, df) for step in entry["steps"]]
+    return replace(result, slice_df=slice_df, mask=mask, extra=extra)
+
+
+class ResultCache:
+    """Thread-safe LRU of compact results, bounded by estimated bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[str, tuple[dict, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(plan: Plan, df: pd.DataFrame, data_key: Optional[str] = None) -> str:
+        """Cache key; pass ``data_key`` (``dataset_key(df)``) to skip rehashing the data."""
+        return f"{plan_hash(plan)}\x1f{data_key or dataset_key(df)}"
+
+    def get(self, plan: Plan, df: pd.DataFrame, key: Optional[str] = None) -> Optional[Result]:
+        return self.get_key(key or self.make_key(plan, df), df)
+
+    def get_key(self, key: str, df: pd.DataFrame) -> Optional[Result]:
+        """Look up by a key from ``make_key``; ``df`` must be the keyed dataset."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _expand(item[0], df)
+
+    def put(self, plan: Plan, df: pd.DataFrame, result: Result, key: Optional[str] = None) -> None:
+        """Store a result (``unsupported`` answers are never cached)."""
+        if result.intent == "unsupported":
+            return
+        key = key or self.make_key(plan, df)
+        entry, size = _compact(result, df)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_DEFAULT_CACHE: Optional[ResultCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide cache shared by all Streamlit sessions."""
+    global _DEFAULT_CACHE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = ResultCache()
+        return _DEFAULT_CACHE
+
+
+def key_dataset(key: str) -> str:
+    """The ``dataset_key`` part of a result-cache key."""
+    return key.split("\x1f", 1)[-1]
+
+
+@timed()
+def cached_execute(plan: Plan, df: pd.DataFrame, cache: Optional[ResultCache] = None,
+                   key: Optional[str] = None) -> Result:
+    """``execute`` with a result cache in front of it (``key`` from ``make_key``)."""
+    if df is None or df.empty:
+        return execute(plan, df)
+    cache = cache or get_result_cache()
+    key = key or cache.make_key(plan, df)
+    result = cache.get(plan, df, key=key)
+    if result is None:
+        result = execute(plan, df)
+        cache.put(plan, df, result, key=key)
+    return result
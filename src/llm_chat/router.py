@@ -0,0 +1,533 @@
+"""Deterministic fast-path router ahead of the LLM planner.
+
+Many questions map unambiguously onto one intent ("max price", "hours below
+0", "top 5 days", "average by month"). ``route_question`` matches them with
+a small set of regex rules and returns a validated ``Plan`` in well under a
+millisecond, together with a confidence score. The chat tab uses the plan
+only when the router is confident and falls back to ``plan_question``
+otherwise, so anything the rules do not fully understand still reaches
+the LLM.
+
+Confidence = rule confidence × coverage, where coverage is the share of
+the question's informative (non-stopword) words that the matched rule
+actually used: its own keywords, the numbers that ended up in the plan and
+the month of the time window. A question like "max price on windy days"
+matches the extremum rule but leaves "windy" unexplained, and "top 5 days
+with negative prices" would leave "negative" unused by the top-k rule, so
+both fall below ``CONFIDENCE_THRESHOLD`` and go to the LLM. Qualifiers no
+rule can express (weekends, seasons, times of day outside the canned
+comparisons) and questions with more than one comparison are deferred
+outright.
+
+Run ``python -m llm_chat.router`` (from ``src/``) to benchmark the rules
+against the labelled questions in ``data/chat_questions.jsonl``.
+"""
+
+from __future__ import annotations
+
+import calendar
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional
+
+from llm_chat.plan_cache import normalize_question
+from llm_chat.schema import Plan, PlanValidationError, plan_to_dict, validate_plan
+from perf import timed
+
+CONFIDENCE_THRESHOLD = 0.85
+
+QUESTIONS_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "chat_questions.jsonl")
+)
+# Data window assumed for labelled questions without their own ``df_meta``.
+DEFAULT_META = {"country": "Spain", "start": "2024-01-01", "end": "2024-12-31",
+                "granularity_min": 60, "columns": ["price"]}
+
+# Symbols are stripped by normalize_question, so spell them out first.
+_SYMBOLS = [(">=", " at least "), ("<=", " at most "), (">", " above "), ("<", " below "),
+            ("€", " eur ")]
+
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+
+# Words that mean the question needs context the rules do not model
+# (other series, relative dates, explicit comparisons, follow-ups).
+_DEFER = re.compile(
+    r"\b(wind|solar|load|demand|flow|flows|forecast|france|vs|versus|compare|compared|"
+    r"between|from|since|until|last|this|next|yesterday|today|weeks|quarter|q[1-4]|"
+    r"why|explain|what about|and in|same|previous|then|"
+    # Intents without local rules; keep them from matching "aggregate".
+    r"rolling|moving|percentiles?|quantiles?|p\d{1,2}|\d{1,2}(st|nd|rd|th)|volatility|volatile|ramps?)\b"
+)
+
+# Qualifiers that restrict the samples in a way only the peak/off-peak
+# presets and the group-bys express; anywhere else they defer.
+_QUALIFIERS = re.compile(
+    r"\b(weekdays?|weekends?|working days?|business days?|workdays?|holidays?|"
+    r"summer|winter|spring|autumn|fall|seasons?|seasonal|"
+    r"mornings?|afternoons?|evenings?|nights?|nighttime|daytime)\b"
+)
+
+_STOPWORDS = {
+    "a", "an", "the", "was", "were", "is", "are", "be", "been", "what", "which", "when",
+    "how", "of", "in", "on", "for", "to", "during", "did", "do", "does", "me", "show",
+    "tell", "give", "list", "find", "can", "you", "i", "we", "there", "it", "its",
+    "and", "with", "at", "by", "per", "each", "all", "my", "data", "period", "overall",
+    "price", "prices", "pricing", "electricity", "power", "energy", "market", "spot",
+    "day-ahead", "dayahead", "eur", "euro", "euros", "mwh", "value", "values", "level",
+    "hour", "hours", "day", "days", "many", "number", "count", "times", "time",
+    "had", "have", "has", "where", "went", "go", "got", "occur", "occurred",
+}
+
+_MAX_WORDS = {"max", "maximum", "highest", "peak", "most", "expensive", "top", "biggest", "largest", "best"}
+_MIN_WORDS = {"min", "minimum", "lowest", "cheapest", "least", "smallest", "worst"}
+
+_OPS = [
+    (re.compile(r"\b(at least|no less than|greater than or equal to)\b"), ">="),
+    (re.compile(r"\b(at most|no more than|less than or equal to)\b"), "<="),
+    (re.compile(r"\b(above|over|greater than|more than|higher than|exceed|exceeds|exceeded|exceeding)\b"), ">"),
+    (re.compile(r"\b(below|under|less than|lower than|beneath)\b"), "<"),
+    (re.compile(r"\b(equal to|exactly)\b"), "=="),
+]
+_OP_WORDS = {"at", "least", "most", "no", "less", "than", "greater", "or", "equal", "above", "over",
+             "more", "higher", "exceed", "exceeds", "exceeded", "exceeding", "below", "under",
+             "lower", "beneath", "exactly"}
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+
+_AGGREGATIONS = [
+    (re.compile(r"\b(average|avg|mean)\b"), "mean"),
+    (re.compile(r"\bmedian\b"), "median"),
+    (re.compile(r"\b(std|standard deviation|volatility)\b"), "std"),
+    (re.compile(r"\b(total|sum)\b"), "sum"),
+]
+_GROUP_BYS = [
+    (re.compile(r"\b(by|per|each|every) (hour of (the )?day|hour)\b|\bhourly profile\b"), "hour_of_day"),
+    (re.compile(r"\b(by|per|each|every) (day of (the )?week|weekday)\b"), "day_of_week"),
+    (re.compile(r"\b(by|per|each|every) month\b|\bmonthly\b"), "month"),
+    (re.compile(r"\b(by|per|each|every) (day|date)\b|\bdaily\b"), "date"),
+]
+_GROUP_WORDS = {"monthly", "daily", "weekday", "weekdays", "week", "month", "date", "profile", "hourly"}
+
+_AGG_WORDS = {"average", "avg", "mean", "median", "std", "standard", "deviation", "total", "sum"}
+
+# Words each rule consumes, for coverage. Stopwords, the numbers that end up
+# in the plan and the month of the time window are counted for every rule.
+_RULE_WORDS = {
+    "peak_offpeak": {"peak", "off", "offpeak", "weekday", "weekdays", "weekend", "weekends",
+                     "summer", "winter", "or", "vs", "versus", "against", "effect", "seasonal",
+                     "difference", "more", "cheaper", "pricier"} | _AGG_WORDS | _MAX_WORDS | _MIN_WORDS,
+    "tariff_band": {"tariff", "tariffs", "band", "bands", "vazio", "cheia", "ponta", "super"} | _AGG_WORDS,
+    "streak": _OP_WORDS | {"negative", "zero", "longest", "streak", "streaks", "run", "runs",
+                           "stretch", "stretches", "consecutive", "row", "top", "midnight",
+                           "overnight", "crossing", "cross", "that", "histogram", "distribution",
+                           "length", "lengths", "long", "daily", "every", "minimum"},
+    "arbitrage": {"arbitrage", "spread", "spreads", "battery", "opportunities", "opportunity",
+                  "potential", "daily", "top", "best", "worst", "biggest", "largest", "highest",
+                  "smallest", "lowest", "least"},
+    "top_k": _MAX_WORDS | _MIN_WORDS | {"top", "priciest"},
+    "negative_prices": {"negative", "below", "zero", "often"},
+    "threshold_hours": _OP_WORDS | {"negative", "zero", "often"},
+    "distribution": {"distribution", "histogram", "distributed", "bin", "bins", "width", "wide"},
+    "aggregate": _AGG_WORDS | _GROUP_WORDS | {"every", "week"},
+    "extremum": _MAX_WORDS | _MIN_WORDS,
+}
+
+# "for at least 3 hours (in a row)": the streak's minimum duration, not a
+# price comparison.
+_MIN_LENGTH = re.compile(
+    r"\b(?:for\s+)?(?:at least|minimum of|min|no less than)\s+" r"(\d+(?:\.\d+)?)"
+    r"\s+(?:consecutive\s+)?hours?\b"
+)
+
+
+@dataclass
+class RouteResult:
+    """Router output; ``plan`` is None when no rule matched."""
+
+    plan: Optional[Plan]
+    confidence: float
+    rule: str = ""
+
+    @property
+    def confident(self) -> bool:
+        return self.plan is not None and self.confidence >= CONFIDENCE_THRESHOLD
+
+
+# --- helpers --------------------------------------------------------------
+def _prepare(question: str) -> str:
+    text = question.lower()
+    for symbol, words in _SYMBOLS:
+        text = text.replace(symbol, words)
+    return normalize_question(text)
+
+
+def _plan_numbers(raw: dict) -> set[float]:
+    """Numbers the plan took from the question (values, k, min_length, window years)."""
+    numbers = {float(c["value"]) for c in raw.get("conditions", [])}
+    for key in ("k", "arbitrage_k", "min_length", "bin_width"):
+        if key in raw:
+            numbers.add(float(raw[key]))
+    window = raw.get("time_window")
+    if window:
+        numbers.update(float(window[b][:4]) for b in ("start", "end"))
+    return numbers
+
+
+def _coverage(text: str, rule: str, raw: dict) -> float:
+    """Share of the informative words of ``text`` the rule used for ``raw``."""
+    words = [w for w in text.split() if w not in _STOPWORDS]
+    if not words:
+        return 1.0
+    vocab = _RULE_WORDS[rule] | (set(_MONTHS) if "time_window" in raw else set())
+    numbers = _plan_numbers(raw)
+    used = sum(
+        1 for w in words
+        if w in vocab or (re.fullmatch(_NUMBER, w) and float(w) in numbers)
+    )
+    return used / len(words)
+
+
+def _comparisons(text: str) -> list[dict]:
+    """Every "<op> <number>" comparison, in order (one per number)."""
+    found = {}
+    for pattern, op in _OPS:
+        for m in re.finditer(pattern.pattern + r"\s+" + _NUMBER, text):
+            # "no less than 5" also contains "less than 5"; the first (more
+            # specific) operator wins for a given number.
+            found.setdefault(m.start(m.lastindex), {"op": op, "value": float(m.group(m.lastindex))})
+    return [found[pos] for pos in sorted(found)]
+
+
+def _condition(text: str) -> Optional[dict]:
+    comparisons = _comparisons(text)
+    if comparisons:
+        return comparisons[0]
+    if re.search(r"\bnegative\b|\bbelow zero\b", text):
+        return {"op": "<", "value": 0.0}
+    return None
+
+
+def _min_length(text: str) -> tuple[Optional[float], str]:
+    """``(hours, text without the phrase)`` for "for at least N hours"."""
+    m = _MIN_LENGTH.search(text)
+    if not m:
+        return None, text
+    return float(m.group(1)), f"{text[:m.start()]} {text[m.end():]}".strip()
+
+
+def _time_window(text: str, df_meta: dict) -> tuple[Optional[dict], float]:
+    """Resolve "in <month> [<year>]" / "in <year>" to a window.
+
+    Returns ``(time_window, penalty)``; the penalty lowers confidence when a
+    month without a year is ambiguous within the loaded window.
+    """
+    years = [int(y) for y in re.findall(r"\b(20\d{2})\b", text)]
+    month = next((_MONTHS[w] for w in text.split() if w in _MONTHS and w != "may"), None)
+    if month is None and re.search(r"\bin may\b", text):
+        month = 5
+    if month is None and not years:
+        return None, 0.0
+
+    start_meta = df_meta.get("start")
+    end_meta = df_meta.get("end")
+    if month is not None:
+        if years:
+            year = years[0]
+        elif start_meta and end_meta and start_meta[:4] == end_meta[:4]:
+            year = int(start_meta[:4])
+        else:
+            return None, 1.0  # month of which year? let the LLM ask/decide
+        last = calendar.monthrange(year, month)[1]
+        start, end = date(year, month, 1), date(year, month, last)
+    else:
+        if len(years) > 1:
+            return None, 1.0
+        start, end = date(years[0], 1, 1), date(years[0], 12, 31)
+
+    if start_meta and end_meta:
+        lo, hi = date.fromisoformat(start_meta), date.fromisoformat(end_meta)
+        start, end = max(start, lo), min(end, hi)
+        if start > end:
+            return None, 1.0
+    return {"start": start.isoformat(), "end": end.isoformat()}, 0.0
+
+
+def _direction(text: str, ignore: frozenset = frozenset()) -> Optional[str]:
+    words = set(text.split()) - ignore
+    has_max = bool(words & _MAX_WORDS)
+    has_min = bool(words & _MIN_WORDS)
+    if has_max == has_min:
+        return None
+    return "max" if has_max else "min"
+
+
+def _int_after(pattern: str, text: str) -> Optional[int]:
+    m = re.search(pattern, text)
+    return int(m.group(1)) if m else None
+
+
+# --- rules ----------------------------------------------------------------
+# Each rule returns (raw_plan, rule_confidence) or None. Order matters: the
+# more specific patterns come first.
+_PRESETS = [
+    (re.compile(r"\bweekdays? (and|or|vs|versus|against) weekends?\b|\bweekend effect\b"), "weekday_vs_weekend"),
+    (re.compile(r"\bsummer (and|or|vs|versus|against) winter\b|\bseasonal difference\b"), "summer_vs_winter"),
+    (re.compile(r"\bpeak (and|or|vs|versus|against) off ?-?peak\b|\boff ?-?peak\b"), "peak_vs_offpeak"),
+]
+
+
+def _rule_peak_offpeak(text: str) -> Optional[tuple[dict, float]]:
+    for pattern, preset in _PRESETS:
+        if pattern.search(text):
+            return {"intent": "peak_offpeak", "preset": preset}, 0.95
+    return None
+
+
+def _rule_tariff(text: str) -> Optional[tuple[dict, float]]:
+    if re.search(r"\b(tariff|vazio|cheia|ponta|super vazio)\b", text):
+        return {"intent": "tariff_band"}, 0.9
+    return None
+
+
+def _rule_streak(text: str) -> Optional[tuple[dict, float]]:
+    if not re.search(r"\b(longest|streaks?|consecutive|in a row|stretch(es)?|runs?)\b", text):
+        return None
+    cond = _condition(text)
+    if cond is None:
+        return None
+    raw = {"intent": "streak", "conditions": [cond]}
+    k = _int_after(r"\btop\s+(\d+)\b", text) or _int_after(r"\b(\d+)\s+longest\b", text)
+    if re.search(r"\b(midnight|overnight)\b", text):
+        raw["streak_mode"] = "crossing_midnight"
+    elif re.search(r"\b(histogram|distribution)\b", text):
+        raw["streak_mode"] = "histogram"
+    elif re.search(r"\b(per|each|every) day\b|\bdaily\b", text):
+        raw["streak_mode"] = "per_day"
+    elif k:
+        raw.update(streak_mode="top_k", k=k)
+    return raw, 0.95
+
+
+def _rule_arbitrage(text: str) -> Optional[tuple[dict, float]]:
+    if not re.search(r"\b(arbitrage|spreads?)\b", text):
+        return None
+    k = _int_after(r"\b(?:top|best|worst)\s+(\d+)\b", text) or _int_after(r"\b(\d+)\s+(?:best|worst)?\s*days\b", text) or 5
+    direction = "worst" if re.search(r"\b(worst|smallest|lowest|least)\b", text) else "best"
+    return {"intent": "arbitrage", "arbitrage_direction": direction, "arbitrage_k": k}, 0.95
+
+
+def _rule_top_k(text: str) -> Optional[tuple[dict, float]]:
+    # "top 5 days with negative prices" filters before ranking; top_k can't.
+    if _condition(text) is not None:
+        return None
+    m = re.search(r"\btop\s+(\d+)\b|\b(\d+)\s+(?:most expensive|cheapest|highest|lowest|priciest|best|worst)\b", text)
+    if not m:
+        return None
+    k = int(m.group(1) or m.group(2))
+    unit = "day" if re.search(r"\bdays?\b", text) else "hour"
+    # "top" picks the k, not the direction ("top 3 cheapest hours").
+    direction = _direction(text, ignore=frozenset({"top"}))
+    if direction is None and set(text.split()) & (_MAX_WORDS | _MIN_WORDS) - {"top"}:
+        return None  # "least expensive", "best and worst": let the LLM decide
+    direction = "lowest" if direction == "min" else "highest"
+    return {"intent": "top_k", "k": k, "top_k_unit": unit, "top_k_direction": direction}, 0.95
+
+
+def _rule_negative(text: str) -> Optional[tuple[dict, float]]:
+    if not re.search(r"\bnegative\b|\bbelow zero\b", text):
+        return None
+    if re.search(r"\b(how many|number of|count)\b", text) and re.search(r"\bhours?\b", text):
+        return {"intent": "threshold_hours", "conditions": [{"op": "<", "value": 0.0}]}, 0.9
+    return {"intent": "negative_prices"}, 0.9
+
+
+def _rule_threshold(text: str) -> Optional[tuple[dict, float]]:
+    cond = _condition(text)
+    if cond is None or not re.search(r"\bhours?\b|\bhow many\b|\bhow often\b", text):
+        return None
+    # threshold_hours counts hours; "how many days above 100" is not that.
+    if re.search(r"\b(days?|weeks?|months?)\b", text):
+        return None
+    return {"intent": "threshold_hours", "conditions": [cond]}, 0.95
+
+
+def _rule_distribution(text: str) -> Optional[tuple[dict, float]]:
+    if not re.search(r"\b(distribution|histogram|distributed)\b", text):
+        return None
+    raw: dict[str, Any] = {"intent": "distribution"}
+    bw = re.search(r"\b" + _NUMBER + r"\s*(?:eur\s*)?(?:mwh\s*)?(?:bins?|wide|width)\b", text) or \
+        re.search(r"\bbins? (?:of|width)\s+" + _NUMBER, text)
+    if bw:
+        raw["bin_width"] = float(bw.group(1))
+    return raw, 0.95
+
+
+def _rule_aggregate(text: str) -> Optional[tuple[dict, float]]:
+    agg = next((a for pattern, a in _AGGREGATIONS if pattern.search(text)), None)
+    if agg is None:
+        return None
+    group_by = next((g for pattern, g in _GROUP_BYS if pattern.search(text)), "none")
+    return {"intent": "aggregate", "aggregation": agg, "group_by": group_by}, 0.95
+
+
+def _rule_extremum(text: str) -> Optional[tuple[dict, float]]:
+    kind = _direction(text)
+    if kind is None or re.search(r"\d", re.sub(r"\b20\d{2}\b", "", text)):
+        return None
+    if next((g for pattern, g in _GROUP_BYS if pattern.search(text)), None):
+        return None
+    return {"intent": "extremum", "extremum_kind": kind}, 0.95
+
+
+_RULES = [
+    ("peak_offpeak", _rule_peak_offpeak),
+    ("tariff_band", _rule_tariff),
+    ("streak", _rule_streak),
+    ("arbitrage", _rule_arbitrage),
+    ("top_k", _rule_top_k),
+    ("negative_prices", _rule_negative),
+    ("threshold_hours", _rule_threshold),
+    ("distribution", _rule_distribution),
+    ("aggregate", _rule_aggregate),
+    ("extremum", _rule_extremum),
+]
+
+
+@timed()
+def route_question(question: str, df_meta: Optional[dict] = None,
+                   history: Optional[list] = None) -> RouteResult:
+    """Try to build a ``Plan`` locally; see module docstring for confidence."""
+    df_meta = df_meta or {}
+    text = _prepare(question)
+    if not text:
+        return RouteResult(None, 0.0)
+    # Follow-ups and anything with context we do not model go to the LLM.
+    # The canned peak/off-peak comparisons are the one "vs" we handle locally.
+    unpreset = text
+    for pattern, _ in _PRESETS:
+        unpreset = pattern.sub(" ", unpreset)
+    if _DEFER.search(unpreset) or (history and re.match(r"(and|but|what about|how about)\b", text)):
+        return RouteResult(None, 0.0, "defer")
+    # Weekday/weekend/season/time-of-day filters only exist as presets and
+    # group-bys; AND-ed comparisons are left to the planner too.
+    for pattern, _ in _GROUP_BYS:
+        unpreset = pattern.sub(" ", unpreset)
+    min_length, rest = _min_length(text)
+    if _QUALIFIERS.search(unpreset) or len(_comparisons(rest)) > 1:
+        return RouteResult(None, 0.0, "defer")
+
+    for name, rule in _RULES:
+        matched = rule(rest)
+        if matched is None:
+            continue
+        raw, rule_conf = matched
+        if min_length is not None:
+            if name != "streak":
+                return RouteResult(None, 0.0, "defer")
+            raw["min_length"] = min_length
+        window, penalty = _time_window(text, df_meta)
+        if window is not None:
+            raw["time_window"] = window
+        try:
+            plan = validate_plan(raw)
+        except PlanValidationError:
+            return RouteResult(None, 0.0, name)
+        confidence = rule_conf * _coverage(text, name, raw) * (1.0 - penalty)
+        return RouteResult(plan, round(confidence, 3), name)
+    return RouteResult(None, 0.0)
+
+
+# --- benchmark ------------------------------------------------------------
+def _comparable(plan: Plan) -> dict:
+    raw = plan_to_dict(plan)
+    raw.pop("explanation_hint", None)
+    return raw
+
+
+def load_labelled_questions(path: str = QUESTIONS_PATH) -> list[dict]:
+    """Read the labelled set: one ``{"question", "df_meta"?, "expected"}`` per line.
+
+    ``expected`` is a raw plan dict, or null when the question should be
+    left to the LLM. An optional ``planner`` dict holds the plan fields the
+    LLM planner should produce for such questions (``llm_chat.evaluation``).
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def benchmark_router(path: str = QUESTIONS_PATH, default_meta: Optional[dict] = None,
+                     repeat: int = 20) -> dict:
+    """Score the router on the labelled set and time it.
+
+    Returns ``coverage`` (share of questions routed confidently),
+    ``precision`` (share of routed questions whose plan equals the label),
+    ``negatives_routed`` (questions labelled for the LLM that were routed
+    anyway), the mismatches, and per-question latency percentiles in
+    microseconds.
+    """
+    default_meta = default_meta or DEFAULT_META
+    items = load_labelled_questions(path)
+    routed = correct = negatives_routed = 0
+    errors = []
+    latencies = []
+    for item in items:
+        meta = item.get("df_meta") or default_meta
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = route_question(item["question"], meta)
+        latencies.append((time.perf_counter() - start) / repeat * 1e6)
+
+        expected = item.get("expected")
+        if not result.confident:
+            continue
+        routed += 1
+        negatives_routed += expected is None
+        if expected is not None and _comparable(result.plan) == _comparable(validate_plan(expected)):
+            correct += 1
+        else:
+            errors.append({"question": item["question"], "rule": result.rule,
+                           "confidence": result.confidence, "got": _comparable(result.plan),
+                           "expected": expected})
+
+    latencies.sort()
+
+    def _pct(q: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1) if latencies else 0.0
+
+    return {
+        "n": len(items),
+        "routable": sum(1 for i in items if i.get("expected") is not None),
+        "routed": routed,
+        "coverage": round(routed / len(items), 3) if items else 0.0,
+        "precision": round(correct / routed, 3) if routed else 1.0,
+        "negatives": sum(1 for i in items if i.get("expected") is None),
+        "negatives_routed": negatives_routed,
+        "latency_us_p50": _pct(0.5),
+        "latency_us_p99": _pct(0.99),
+        "errors": errors,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the chat fast-path router")
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    report = benchmark_router(args.questions, repeat=args.repeat)
+    errors = report.pop("errors")
+    print(json.dumps(report, indent=2))
+    if args.show_errors:
+        for e in errors:
+            print(json.dumps(e, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ Keeping this hand-rolled (no pydantic) avoids adding a dependency.
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from datetime import date as date_cls
 from typing import Any, Optional
 
@@ -31,6 +31,11 @@ INTENTS = {
     "peak_offpeak",
     "streak",
     "arbitrage",
+    "percentile",
+    "rolling",
+    "volatility",
+    "ramp",
+    "multi",
     "unsupported",
 }
 AGGREGATIONS = {"mean", "median", "sum", "min", "max", "std", "count"}
@@ -45,6 +50,42 @@ PEAK_OFFPEAK_PRESETS = {
     "summer_vs_winter",
 }
 ARBITRAGE_DIRECTIONS = {"best", "worst"}
+STREAK_MODES = {
+    "longest",            # longest runs first (default)
+    "top_k",              # k longest runs by duration-weighted hours
+    "per_day",            # number of runs starting on each day
+    "crossing_midnight",  # runs that span a day boundary
+    "histogram",          # distribution of run durations
+}
+MAX_PERCENTILES = 5
+DEFAULT_PERCENTILES = [5.0, 50.0, 95.0]
+ROLLING_AGGREGATIONS = {"mean", "min", "max", "std"}
+VOLATILITY_KINDS = {
+    "daily_change",  # rolling std of day-on-day changes of the daily mean
+    "intraday",      # std of the samples within each day
+}
+RAMP_DIRECTIONS = {"both", "up", "down"}
+MAX_WINDOW_DAYS = 366
+# Series the executor can read. Everything but ``price`` comes from the ENTSO-E
+# context datasets joined onto the price index (see data_loader.join_context).
+SERIES_COLUMNS = {
+    "price",
+    "load",
+    "load_forecast",
+    "wind",
+    "solar",
+    "wind_forecast",
+    "solar_forecast",
+    "flow_es_pt",
+    "flow_es_fr",
+}
+# Intents that honour ``Plan.column``; the rest always work on price.
+COLUMN_INTENTS = {
+    "extremum", "aggregate", "slice", "compare",
+    "percentile", "rolling", "volatility", "ramp",
+}
+# A "multi" plan holds 2..MAX_STEPS single-intent steps.
+MAX_STEPS = 4
 
 
 @dataclass
@@ -88,12 +129,27 @@ class Plan:
     tipo_ciclo: Optional[str] = None
     # peak_offpeak
     preset: Optional[str] = None
-    # streak — uses `conditions` above; plus:
-    min_length: int = 1
+    # streak — uses `conditions` above (and `k` for streak_mode="top_k"); plus:
+    min_length: float = 0.0         # minimum run duration, hours
+    streak_mode: str = "longest"
     # arbitrage
     arbitrage_direction: str = "best"   # "best" | "worst"
     arbitrage_k: int = 5
+    # percentile — uses `group_by` above
+    percentiles: list[float] = field(default_factory=list)
+    # rolling / volatility — trailing window in calendar days; rolling uses
+    # `aggregation` (one of ROLLING_AGGREGATIONS)
+    window_days: int = 30
+    volatility_kind: str = "daily_change"
+    # ramp — change over `ramp_hours`, profiled by hour of day
+    ramp_hours: int = 1
+    ramp_direction: str = "both"
+    # multi — ordered steps; a step may take its time window from the result
+    # of an earlier step (index into ``steps``).
+    steps: list["Plan"] = field(default_factory=list)
+    window_from: Optional[int] = None
     # shared
+    column: str = "price"  # one of SERIES_COLUMNS; only used by COLUMN_INTENTS
     time_window: TimeWindow = field(default_factory=TimeWindow)
     # planner's free-form hint, used by the explainer prompt
     explanation_hint: str = ""
@@ -102,7 +158,8 @@ class Plan:
 @dataclass
 class Result:
     intent: str
-    plot_kind: str  # "day" | "slice" | "bar" | "hline" | "highlight" | "none"
+    plot_kind: str  # "day" | "slice" | "bar" | "hline" | "highlight" | "percentile"
+    #                 | "rolling" | "volatility" | "ramp" | "multi" | "none"
     summary_for_llm: str
     # Optional payloads (any subset may be set depending on plot_kind)
     value: Optional[float] = None
@@ -155,6 +212,17 @@ def validate_plan(raw: dict) -> Plan:
         explanation_hint=str(raw.get("explanation_hint", "")),
     )
 
+    column = raw.get("column", "price") or "price"
+    if column not in SERIES_COLUMNS:
+        raise PlanValidationError(
+            f"column must be one of {sorted(SERIES_COLUMNS)}, got {column!r}"
+        )
+    if column != "price" and intent not in COLUMN_INTENTS:
+        raise PlanValidationError(
+            f"column {column!r} is only supported for intents {sorted(COLUMN_INTENTS)}"
+        )
+    plan.column = column
+
     if intent == "extremum":
         kind = raw.get("extremum_kind")
         if kind not in EXTREMUM_KINDS:
@@ -303,12 +371,26 @@ def validate_plan(raw: dict) -> Plan:
                 )
             plan.conditions.append(Condition(op=op, value=value))
         try:
-            ml = int(raw.get("min_length", 1))
+            ml = float(raw.get("min_length") or 0.0)
         except (TypeError, ValueError):
-            raise PlanValidationError("min_length must be an integer.")
-        if ml < 1:
-            raise PlanValidationError("min_length must be >= 1.")
+            raise PlanValidationError("min_length must be a number of hours.")
+        if not ml >= 0:
+            raise PlanValidationError("min_length must be >= 0 hours.")
         plan.min_length = ml
+        mode = raw.get("streak_mode", "longest") or "longest"
+        if mode not in STREAK_MODES:
+            raise PlanValidationError(
+                f"streak_mode must be one of {sorted(STREAK_MODES)}, got {mode!r}"
+            )
+        plan.streak_mode = mode
+        if mode == "top_k":
+            try:
+                k = int(raw.get("k", 5))
+            except (TypeError, ValueError):
+                raise PlanValidationError(f"k must be an integer, got {raw.get('k')!r}")
+            if k <= 0 or k > 100:
+                raise PlanValidationError("k must be between 1 and 100.")
+            plan.k = k
 
     elif intent == "arbitrage":
         direction = raw.get("arbitrage_direction") or raw.get("direction") or "best"
@@ -325,5 +407,134 @@ def validate_plan(raw: dict) -> Plan:
             raise PlanValidationError("arbitrage_k must be between 1 and 100.")
         plan.arbitrage_k = k
 
+    elif intent == "percentile":
+        ps_raw = raw.get("percentiles")
+        if ps_raw is None and raw.get("percentile") is not None:
+            ps_raw = [raw.get("percentile")]
+        if ps_raw is None:
+            ps_raw = DEFAULT_PERCENTILES
+        if not isinstance(ps_raw, list) or not 1 <= len(ps_raw) <= MAX_PERCENTILES:
+            raise PlanValidationError(
+                f"percentiles must be a list of 1 to {MAX_PERCENTILES} numbers."
+            )
+        try:
+            ps = sorted({float(p) for p in ps_raw})
+        except (TypeError, ValueError):
+            raise PlanValidationError(f"percentiles must be numbers, got {ps_raw!r}")
+        if ps[0] < 0 or ps[-1] > 100:
+            raise PlanValidationError("percentiles must be between 0 and 100.")
+        gb = raw.get("group_by", "none") or "none"
+        if gb not in GROUP_BYS:
+            raise PlanValidationError(
+                f"group_by must be one of {sorted(GROUP_BYS)}, got {gb!r}"
+            )
+        plan.percentiles = ps
+        plan.group_by = gb
+
+    elif intent in ("rolling", "volatility"):
+        try:
+            wd = int(raw.get("window_days", 30))
+        except (TypeError, ValueError):
+            raise PlanValidationError(
+                f"window_days must be an integer, got {raw.get('window_days')!r}"
+            )
+        if not 1 <= wd <= MAX_WINDOW_DAYS:
+            raise PlanValidationError(f"window_days must be between 1 and {MAX_WINDOW_DAYS}.")
+        plan.window_days = wd
+        if intent == "rolling":
+            agg = raw.get("aggregation", "mean") or "mean"
+            if agg not in ROLLING_AGGREGATIONS:
+                raise PlanValidationError(
+                    f"aggregation must be one of {sorted(ROLLING_AGGREGATIONS)} for rolling, got {agg!r}"
+                )
+            plan.aggregation = agg
+        else:
+            kind = raw.get("volatility_kind", "daily_change") or "daily_change"
+            if kind not in VOLATILITY_KINDS:
+                raise PlanValidationError(
+                    f"volatility_kind must be one of {sorted(VOLATILITY_KINDS)}, got {kind!r}"
+                )
+            if kind == "daily_change" and wd < 2:
+                raise PlanValidationError("window_days must be >= 2 for daily_change volatility.")
+            plan.volatility_kind = kind
+
+    elif intent == "ramp":
+        try:
+            rh = int(raw.get("ramp_hours", 1))
+        except (TypeError, ValueError):
+            raise PlanValidationError(
+                f"ramp_hours must be an integer, got {raw.get('ramp_hours')!r}"
+            )
+        if not 1 <= rh <= 24:
+            raise PlanValidationError("ramp_hours must be between 1 and 24.")
+        direction = raw.get("ramp_direction") or raw.get("direction") or "both"
+        if direction not in RAMP_DIRECTIONS:
+            raise PlanValidationError(
+                f"ramp_direction must be one of {sorted(RAMP_DIRECTIONS)}, got {direction!r}"
+            )
+        plan.ramp_hours = rh
+        plan.ramp_direction = direction
+
+    elif intent == "multi":
+        steps_raw = raw.get("steps") or []
+        if not isinstance(steps_raw, list) or not 2 <= len(steps_raw) <= MAX_STEPS:
+            raise PlanValidationError(
+                f"multi requires 2 to {MAX_STEPS} entries in 'steps'."
+            )
+        for i, step_raw in enumerate(steps_raw):
+            if not isinstance(step_raw, dict):
+                raise PlanValidationError(f"steps[{i}] must be an object.")
+            if step_raw.get("intent") in ("multi", "unsupported"):
+                raise PlanValidationError(
+                    f"steps[{i}].intent cannot be {step_raw.get('intent')!r}."
+                )
+            dep = step_raw.get("window_from")
+            if dep is not None:
+                try:
+                    dep = int(dep)
+                except (TypeError, ValueError):
+                    raise PlanValidationError(f"steps[{i}].window_from must be an integer.")
+                # Only backward references, so the steps always form a DAG.
+                if not 0 <= dep < i:
+                    raise PlanValidationError(
+                        f"steps[{i}].window_from must reference an earlier step (0..{i - 1})."
+                    )
+                # The window is only known at run time; validate the rest
+                # against a stand-in so window-requiring intents still pass.
+                step_raw = {**step_raw, "time_window": {"start": "2000-01-01", "end": "2000-01-01"}}
+            try:
+                step = validate_plan(step_raw)
+            except PlanValidationError as e:
+                raise PlanValidationError(f"steps[{i}]: {e}")
+            if dep is not None:
+                step.window_from = dep
+                step.time_window = TimeWindow()
+            elif step.time_window.start is None and step.time_window.end is None:
+                # Steps without their own window inherit the plan's.
+                step.time_window = TimeWindow(start=tw.start, end=tw.end)
+            plan.steps.append(step)
+
     # "unsupported" needs nothing else.
     return plan
+
+
+def plan_to_dict(plan: Plan) -> dict:
+    """Serialise a ``Plan`` back into the raw JSON form ``validate_plan`` accepts.
+
+    Dates become ISO strings; round-tripping through ``validate_plan`` yields
+    an equal ``Plan``. Used for caching and for the planner history block.
+    """
+    def _iso(d: Optional[date_cls]) -> Optional[str]:
+        return d.isoformat() if d is not None else None
+
+    raw = asdict(plan)
+    raw["time_window"] = {
+        "start": _iso(plan.time_window.start),
+        "end": _iso(plan.time_window.end),
+    }
+    raw["periods"] = [
+        {"label": p.label, "start": _iso(p.start), "end": _iso(p.end)}
+        for p in plan.periods
+    ]
+    raw["steps"] = [plan_to_dict(s) for s in plan.steps]
+    return raw
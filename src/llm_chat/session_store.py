@@ -0,0 +1,174 @@
+"""Persistent, bounded chat history per user.
+
+Each turn is stored compactly as plain JSON:
+
+``turn``        running turn number within the session
+``question``    the user's question (already capped by the chat tab)
+``answer``      the rendered answer, truncated to ``MAX_ANSWER_CHARS``
+``plan_dict``   the validated plan (``schema.plan_to_dict``)
+``summary``     the executor's ``summary_for_llm``
+``result_key``  the ``result_cache`` key the answer was computed under
+``ts``          wall-clock time of the turn
+
+No DataFrames, Series or figures are kept. The chat tab rebuilds figures
+from the result cache (recomputing on a miss) and passes the turns to the
+planner as ``history``, which already reads ``question``, ``plan_dict``
+and ``summary``.
+
+Sessions are one JSON file per session id in ``CHAT_SESSION_DIR``
+(default ``data/cache/chat_sessions``). Bounds: the last ``max_turns`` turns
+per session, sessions untouched for ``ttl_seconds`` are dropped, and at most
+``max_sessions`` files are kept (oldest removed first). Read-only
+deployments fall back to memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "cache", "chat_sessions")
+)
+CHAT_SESSION_DIR = os.environ.get("CHAT_SESSION_DIR", _DEFAULT_DIR)
+
+DEFAULT_MAX_TURNS = 20
+DEFAULT_MAX_SESSIONS = 200
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+MAX_ANSWER_CHARS = 4000
+
+
+def _file_name(session_id: str) -> str:
+    # Session ids carry user e-mails or cookie values; never use them as paths directly.
+    return hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:24] + ".json"
+
+
+class SessionStore:
+    """Thread-safe store of chat turns keyed by session id."""
+
+    def __init__(self, directory: Optional[str] = CHAT_SESSION_DIR,
+                 max_turns: int = DEFAULT_MAX_TURNS,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.directory = directory
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # Recently used sessions stay in memory (the only copy without a directory).
+        self._sessions: "OrderedDict[str, list[dict]]" = OrderedDict()
+        # Last disk reload or append per cached session (not every read, like
+        # the file's mtime), for ``ttl_seconds`` in memory.
+        self._touched: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # --- persistence -----------------------------------------------------
+    def _path(self, session_id: str) -> Optional[str]:
+        return os.path.join(self.directory, _file_name(session_id)) if self.directory else None
+
+    def _read(self, session_id: str) -> list[dict]:
+        path = self._path(session_id)
+        if not path or not os.path.exists(path):
+            return []
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return []
+            with open(path, "r", encoding="utf-8") as fh:
+                turns = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning("Chat session unreadable, starting fresh: %s", e)
+            return []
+        return turns[-self.max_turns:] if isinstance(turns, list) else []
+
+    def _write(self, session_id: str, turns: list[dict]) -> None:
+        path = self._path(session_id)
+        if not path:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(turns, fh, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._prune_files()
+        except OSError as e:
+            logger.warning("Chat session write failed: %s", e)
+
+    def _prune_files(self) -> None:
+        names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        if len(names) <= self.max_sessions:
+            return
+        paths = sorted((os.path.join(self.directory, n) for n in names), key=os.path.getmtime)
+        for path in paths[: len(paths) - self.max_sessions]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _cached(self, session_id: str) -> list[dict]:
+        now = time.time()
+        turns = self._sessions.get(session_id)
+        if turns is not None and now - self._touched.get(session_id, now) > self.ttl_seconds:
+            # Expired in memory as on disk; ``_read`` removes the stale file.
+            turns = None
+        if turns is None:
+            turns = self._read(session_id)
+            self._sessions[session_id] = turns
+            self._touched[session_id] = now
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            evicted, _ = self._sessions.popitem(last=False)
+            self._touched.pop(evicted, None)
+        return turns
+
+    # --- public API ------------------------------------------------------
+    def load(self, session_id: str) -> list[dict]:
+        """Turns of a session, oldest first (a copy)."""
+        with self._lock:
+            return [dict(t) for t in self._cached(session_id)]
+
+    def append(self, session_id: str, turn: dict) -> dict:
+        """Add a turn (numbered, timestamped, answer truncated); returns it."""
+        with self._lock:
+            turns = self._cached(session_id)
+            entry = dict(turn)
+            entry["turn"] = (turns[-1]["turn"] + 1) if turns else 1
+            entry["answer"] = str(entry.get("answer", ""))[:MAX_ANSWER_CHARS]
+            entry.setdefault("ts", time.time())
+            turns.append(entry)
+            del turns[: -self.max_turns]
+            self._touched[session_id] = time.time()
+            self._write(session_id, turns)
+            return dict(entry)
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._touched.pop(session_id, None)
+            path = self._path(session_id)
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning("Chat session delete failed: %s", e)
+
+
+_DEFAULT_STORE: Optional[SessionStore] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Process-wide store shared by all Streamlit sessions."""
+    global _DEFAULT_STORE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_STORE is None:
+            _DEFAULT_STORE = SessionStore()
+        return _DEFAULT_STORE
@@ -0,0 +1,426 @@
+"""Local answer rendering: per-intent templates in English, Portuguese and Spanish.
+
+The executor already produces every number the answer needs, so for the
+common intents a template writes the same 1-3 sentences the explainer LLM
+would, without a second OpenRouter round trip. ``render_answer`` returns
+None when no template fits (uncommon streak modes, empty results, ...); the
+caller then falls back to the LLM explainer.
+
+The answer language follows the question: ``detect_language`` scores
+function words and diacritics typical of each language.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from llm_chat.schema import Plan, Result
+
+LANGUAGES = ("en", "pt", "es")
+
+_HINT_WORDS = {
+    "en": {
+        "the", "what", "was", "were", "how", "many", "which", "when", "did", "is",
+        "show", "highest", "lowest", "average", "hours", "days", "price", "prices",
+        "above", "below", "of", "in", "and", "longest", "cheapest",
+    },
+    "pt": {
+        "qual", "quais", "foi", "foram", "quantas", "quantos", "quando", "preco",
+        "precos", "mais", "media", "horas", "dia", "dias", "acima", "abaixo",
+        "mostra", "mostrar", "do", "da", "no", "na", "os", "as", "em", "e", "nao",
+        "barato", "baratos", "caro", "caros", "mes", "semana", "maior", "menor",
+    },
+    "es": {
+        "cual", "cuales", "fue", "fueron", "cuantas", "cuantos", "cuando", "precio",
+        "precios", "mas", "media", "promedio", "horas", "dia", "dias", "encima",
+        "debajo", "muestra", "mostrar", "del", "el", "la", "los", "las", "en", "y",
+        "barato", "baratos", "caro", "caros", "mes", "semana", "mayor", "menor",
+    },
+}
+_HINT_CHARS = {"pt": "ãõçê", "es": "ñ¿¡"}
+
+
+def detect_language(text: str) -> str:
+    """Best guess among ``LANGUAGES`` for ``text``; English when unsure."""
+    lowered = text.lower()
+    folded = "".join(
+        ch for ch in unicodedata.normalize("NFKD", lowered) if not unicodedata.combining(ch)
+    )
+    words = re.findall(r"[a-z]+", folded)
+    scores = {lang: sum(w in hints for w in words) for lang, hints in _HINT_WORDS.items()}
+    for lang, chars in _HINT_CHARS.items():
+        scores[lang] += 2 * sum(lowered.count(ch) for ch in chars)
+    best = max(LANGUAGES, key=lambda lang: scores[lang])
+    return best if scores[best] > scores["en"] else "en"
+
+
+# --- vocabulary -----------------------------------------------------------
+_WORDS = {
+    "en": {
+        "max": "Maximum", "min": "Minimum", "mean": "Average", "median": "Median",
+        "sum": "Total", "std": "Standard deviation", "count": "Number of samples",
+        "price": "price", "and": "and", "from": "from", "to": "to",
+        "hour_of_day": "hour of day", "day_of_week": "day of week", "month": "month",
+        "date": "date",
+    },
+    "pt": {
+        "max": "Máximo", "min": "Mínimo", "mean": "Média", "median": "Mediana",
+        "sum": "Soma", "std": "Desvio-padrão", "count": "Número de amostras",
+        "price": "preço", "and": "e", "from": "de", "to": "a",
+        "hour_of_day": "hora do dia", "day_of_week": "dia da semana", "month": "mês",
+        "date": "dia",
+    },
+    "es": {
+        "max": "Máximo", "min": "Mínimo", "mean": "Media", "median": "Mediana",
+        "sum": "Suma", "std": "Desviación estándar", "count": "Número de muestras",
+        "price": "precio", "and": "y", "from": "del", "to": "al",
+        "hour_of_day": "hora del día", "day_of_week": "día de la semana", "month": "mes",
+        "date": "día",
+    },
+}
+_OPS = {
+    "en": {">": "above", "<": "below", ">=": "at or above", "<=": "at or below", "==": "exactly"},
+    "pt": {">": "acima de", "<": "abaixo de", ">=": "iguais ou acima de", "<=": "iguais ou abaixo de", "==": "exatamente"},
+    "es": {">": "por encima de", "<": "por debajo de", ">=": "iguales o superiores a", "<=": "iguales o inferiores a", "==": "exactamente"},
+}
+_WEEKDAYS = {
+    "en": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+    "pt": ["segunda-feira", "terça-feira", "quarta-feira", "quinta-feira", "sexta-feira", "sábado", "domingo"],
+    "es": ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"],
+}
+_MONTHS = {
+    "en": ["January", "February", "March", "April", "May", "June", "July",
+           "August", "September", "October", "November", "December"],
+    "pt": ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho",
+           "agosto", "setembro", "outubro", "novembro", "dezembro"],
+    "es": ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+           "agosto", "septiembre", "octubre", "noviembre", "diciembre"],
+}
+# Group labels produced by the peak_offpeak executor.
+_GROUP_LABELS = {
+    "pt": {"Peak (18-22h)": "Ponta (18-22h)", "Off-peak (0-6h)": "Vazio (0-6h)",
+           "Weekday": "Dias úteis", "Weekend": "Fim de semana",
+           "Summer (Jun-Sep)": "Verão (jun-set)", "Winter (Dec-Feb)": "Inverno (dez-fev)"},
+    "es": {"Peak (18-22h)": "Punta (18-22h)", "Off-peak (0-6h)": "Valle (0-6h)",
+           "Weekday": "Laborables", "Weekend": "Fin de semana",
+           "Summer (Jun-Sep)": "Verano (jun-sep)", "Winter (Dec-Feb)": "Invierno (dic-feb)"},
+}
+
+
+def _num(x: float, lang: str, digits: int = 2) -> str:
+    text = f"{x:,.{digits}f}"
+    if lang == "en":
+        return text
+    # 1,234.56 -> 1.234,56
+    return text.replace(",", "\x00").replace(".", ",").replace("\x00", ".")
+
+
+def _unit(column: str) -> str:
+    return "€/MWh" if column == "price" else "MW"
+
+
+def _col(column: str, lang: str) -> str:
+    return _WORDS[lang]["price"] if column == "price" else column
+
+
+def _when(ts) -> str:
+    return pd.Timestamp(ts).strftime("%Y-%m-%d %H:%M")
+
+
+def _conditions(plan: Plan, lang: str) -> str:
+    parts = [f"{_OPS[lang][c.op]} {_num(c.value, lang, 0 if float(c.value).is_integer() else 2)} €/MWh"
+             for c in plan.conditions]
+    return f" {_WORDS[lang]['and']} ".join(parts)
+
+
+def _group_label(key, group_by: str, lang: str) -> str:
+    if group_by == "day_of_week" and 0 <= int(key) < 7:
+        return _WEEKDAYS[lang][int(key)]
+    if group_by == "month" and 1 <= int(key) <= 12:
+        return _MONTHS[lang][int(key) - 1]
+    if group_by == "hour_of_day":
+        return f"{int(key)}h"
+    return str(key)
+
+
+def _pairs(series: pd.Series, lang: str, limit: int = 10) -> str:
+    return ", ".join(f"{k} ({_num(v, lang)})" for k, v in series.head(limit).items())
+
+
+# --- per-intent templates -------------------------------------------------
+def _extremum(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    col = r.extra.get("column", "price")
+    head = _WORDS[lang][plan.extremum_kind]
+    at = {"en": "on", "pt": "em", "es": "el"}[lang]
+    of = {"en": "", "pt": " de", "es": " de"}[lang]
+    return f"{head}{of} {_col(col, lang)}: {_num(r.value, lang)} {_unit(col)}, {at} {_when(r.timestamp)}."
+
+
+def _aggregate(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    col = r.extra.get("column", "price")
+    agg = _WORDS[lang][plan.aggregation]
+    unit = "" if plan.aggregation == "count" else f" {_unit(col)}"
+    if plan.group_by == "none":
+        idx = r.slice_df.index
+        w = _WORDS[lang]
+        return (
+            f"{agg} ({_col(col, lang)}) {w['from']} {idx.min().date()} {w['to']} "
+            f"{idx.max().date()}: {_num(r.value, lang)}{unit}."
+        )
+    s = r.series.dropna()
+    if s.empty:
+        return None
+    top, bot = s.idxmax(), s.idxmin()
+    by = {"en": "by", "pt": "por", "es": "por"}[lang]
+    high, low = {"en": ("highest", "lowest"), "pt": ("mais alto", "mais baixo"),
+                 "es": ("más alto", "más bajo")}[lang]
+    return (
+        f"{agg} ({_col(col, lang)}) {by} {_WORDS[lang][plan.group_by]}: "
+        f"{high} {_group_label(top, plan.group_by, lang)} ({_num(s[top], lang)}{unit}), "
+        f"{low} {_group_label(bot, plan.group_by, lang)} ({_num(s[bot], lang)}{unit})."
+    )
+
+
+def _threshold(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    e = r.extra
+    hours, total, pct = (_num(e["matching_hours"], lang, 1), _num(e["total_hours"], lang, 0),
+                         _num(e["pct"], lang, 1))
+    cond = _conditions(plan, lang)
+    return {
+        "en": f"Prices were {cond} for {hours} h out of {total} h ({pct}%).",
+        "pt": f"Os preços estiveram {cond} durante {hours} h de {total} h ({pct}%).",
+        "es": f"Los precios estuvieron {cond} durante {hours} h de {total} h ({pct}%).",
+    }[lang]
+
+
+def _slice(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    col = r.extra.get("column", "price")
+    values = r.slice_df[col]
+    idx = r.slice_df.index
+    stats = {"en": ("average", "minimum", "maximum"), "pt": ("média", "mínimo", "máximo"),
+             "es": ("media", "mínimo", "máximo")}[lang]
+    w = _WORDS[lang]
+    head = {"en": "Showing", "pt": "A mostrar", "es": "Mostrando"}[lang]
+    return (
+        f"{head} {_col(col, lang)} {w['from']} {idx.min().date()} {w['to']} {idx.max().date()}: "
+        f"{stats[0]} {_num(values.mean(), lang)}, {stats[1]} {_num(values.min(), lang)}, "
+        f"{stats[2]} {_num(values.max(), lang)} {_unit(col)}."
+    )
+
+
+def _compare(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    col = r.extra.get("column", "price")
+    s = r.series.dropna()
+    if s.empty:
+        return None
+    agg = _WORDS[lang][plan.aggregation]
+    high = {"en": "Highest", "pt": "Mais alto", "es": "Más alto"}[lang]
+    return f"{agg} ({_col(col, lang)}): {_pairs(s, lang)} {_unit(col)}. {high}: {s.idxmax()}."
+
+
+def _distribution(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    s = r.series
+    if s is None or s.empty:
+        return None
+    top = s.idxmax()
+    label = str(top).replace(" to ", "–")
+    return {
+        "en": f"The most frequent price range was {label} €/MWh, with {_num(s[top], lang, 1)} h.",
+        "pt": f"O intervalo de preços mais frequente foi {label} €/MWh, com {_num(s[top], lang, 1)} h.",
+        "es": f"El rango de precios más frecuente fue {label} €/MWh, con {_num(s[top], lang, 1)} h.",
+    }[lang]
+
+
+_TOP_K_LEADS = {
+    ("en", "hour"): ("The {n} highest hours", "The {n} lowest hours"),
+    ("en", "day"): ("The {n} highest days by average price", "The {n} lowest days by average price"),
+    ("pt", "hour"): ("As {n} horas mais caras", "As {n} horas mais baratas"),
+    ("pt", "day"): ("Os {n} dias mais caros (preço médio)", "Os {n} dias mais baratos (preço médio)"),
+    ("es", "hour"): ("Las {n} horas más caras", "Las {n} horas más baratas"),
+    ("es", "day"): ("Los {n} días más caros (precio medio)", "Los {n} días más baratos (precio medio)"),
+}
+
+
+def _top_k(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    highest, lowest = _TOP_K_LEADS[(lang, plan.top_k_unit)]
+    lead = (highest if plan.top_k_direction == "highest" else lowest).format(n=len(r.series))
+    return f"{lead}: {_pairs(r.series, lang)} €/MWh."
+
+
+def _tariff(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    head = {"en": "Average price by tariff band", "pt": "Preço médio por período tarifário",
+            "es": "Precio medio por periodo tarifario"}[lang]
+    return f"{head} ({r.extra.get('tipo_ciclo')}): {_pairs(r.series, lang)} €/MWh."
+
+
+def _negative(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    e = r.extra
+    hours, pct, low = _num(e["negative_hours"], lang, 1), _num(e["pct"], lang, 1), _num(e["min_price"], lang)
+    days, when = e.get("negative_days"), _when(e["min_timestamp"])
+    return {
+        "en": f"Prices were negative for {hours} h ({pct}% of the period) on {days} days. "
+              f"The lowest was {low} €/MWh on {when}.",
+        "pt": f"Os preços foram negativos durante {hours} h ({pct}% do período) em {days} dias. "
+              f"O mínimo foi {low} €/MWh em {when}.",
+        "es": f"Los precios fueron negativos durante {hours} h ({pct}% del periodo) en {days} días. "
+              f"El mínimo fue {low} €/MWh el {when}.",
+    }[lang]
+
+
+def _peak_offpeak(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    s = r.series
+    if s.isna().any():
+        return None
+    (a_label, a), (b_label, b) = list(s.items())
+    names = _GROUP_LABELS.get(lang, {})
+    diff = {"en": "difference", "pt": "diferença", "es": "diferencia"}[lang]
+    sign = "+" if a - b >= 0 else "-"
+    return (
+        f"{names.get(a_label, a_label)}: {_num(a, lang)} €/MWh; "
+        f"{names.get(b_label, b_label)}: {_num(b, lang)} €/MWh "
+        f"({diff} {sign}{_num(abs(a - b), lang)} €/MWh)."
+    )
+
+
+def _streak(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    if plan.streak_mode != "longest" or r.mask is None:
+        return None
+    hits = np.flatnonzero(r.mask.to_numpy())
+    if hits.size == 0:
+        return None
+    start, end = _when(r.mask.index[hits[0]]), _when(r.mask.index[hits[-1]])
+    n, hours, cond = r.extra["num_streaks"], _num(r.extra["longest_hours"], lang, 1), _conditions(plan, lang)
+    return {
+        "en": f"There were {n} streaks with prices {cond}; the longest lasted {hours} h ({start} → {end}).",
+        "pt": f"Houve {n} sequências com preços {cond}; a mais longa durou {hours} h ({start} → {end}).",
+        "es": f"Hubo {n} rachas con precios {cond}; la más larga duró {hours} h ({start} → {end}).",
+    }[lang]
+
+
+def _arbitrage(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    e = r.extra
+    avg, best, worst = _num(e["avg_spread"], lang), _num(e["best_spread"], lang), _num(e["worst_spread"], lang)
+    return {
+        "en": f"The average daily spread over {e['total_days']} days was {avg} €/MWh. "
+              f"Best day: {e['best_day']} ({best} €/MWh); worst: {e['worst_day']} ({worst} €/MWh).",
+        "pt": f"O spread diário médio em {e['total_days']} dias foi {avg} €/MWh. "
+              f"Melhor dia: {e['best_day']} ({best} €/MWh); pior: {e['worst_day']} ({worst} €/MWh).",
+        "es": f"El diferencial diario medio en {e['total_days']} días fue {avg} €/MWh. "
+              f"Mejor día: {e['best_day']} ({best} €/MWh); peor: {e['worst_day']} ({worst} €/MWh).",
+    }[lang]
+
+
+def _percentile(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    col, unit = r.extra.get("column", "price"), _unit(r.extra.get("column", "price"))
+    lead = {"en": "Percentiles of", "pt": "Percentis do", "es": "Percentiles del"}[lang]
+    if plan.group_by == "none":
+        values = ", ".join(f"{k.upper()} {_num(v, lang)}" for k, v in r.extra["values"].items())
+        return f"{lead} {_col(col, lang)}: {values} {unit}."
+    table = r.extra["table"]
+    if len(table.columns) != 1:
+        return None
+    s = table.iloc[:, 0]
+    p = s.name.upper()
+    by = {"en": "by", "pt": "por", "es": "por"}[lang]
+    high, low = {"en": ("highest", "lowest"), "pt": ("mais alto", "mais baixo"),
+                 "es": ("más alto", "más bajo")}[lang]
+    return (
+        f"{p} ({_col(col, lang)}) {by} {_WORDS[lang][plan.group_by]}: "
+        f"{high} {_group_label(s.idxmax(), plan.group_by, lang)} ({_num(s.max(), lang)} {unit}), "
+        f"{low} {_group_label(s.idxmin(), plan.group_by, lang)} ({_num(s.min(), lang)} {unit})."
+    )
+
+
+def _rolling(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    e = r.extra
+    col, unit, w = e["column"], _unit(e["column"]), e["window_days"]
+    agg = _WORDS[lang][e["aggregation"]].lower()
+    latest, high, low = _num(e["latest"], lang), _num(e["max"], lang), _num(e["min"], lang)
+    return {
+        "en": f"The {w}-day rolling {agg} of {_col(col, lang)} was {latest} {unit} on {e['latest_day']}; "
+              f"it peaked at {high} {unit} on {e['max_day']} and bottomed at {low} {unit} on {e['min_day']}.",
+        "pt": f"A {agg} móvel de {w} dias do {_col(col, lang)} era {latest} {unit} em {e['latest_day']}; "
+              f"o máximo foi {high} {unit} em {e['max_day']} e o mínimo {low} {unit} em {e['min_day']}.",
+        "es": f"La {agg} móvil de {w} días del {_col(col, lang)} era {latest} {unit} el {e['latest_day']}; "
+              f"el máximo fue {high} {unit} el {e['max_day']} y el mínimo {low} {unit} el {e['min_day']}.",
+    }[lang]
+
+
+def _volatility(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    e = r.extra
+    unit, w = _unit(e["column"]), e["window_days"]
+    mean, high = _num(e["mean"], lang), _num(e["max"], lang)
+    if e["kind"] == "intraday":
+        what = {"en": "Intraday volatility (standard deviation within each day)",
+                "pt": "A volatilidade intradiária (desvio-padrão dentro de cada dia)",
+                "es": "La volatilidad intradía (desviación estándar dentro de cada día)"}[lang]
+    else:
+        what = {"en": f"The {w}-day volatility of day-on-day changes",
+                "pt": f"A volatilidade a {w} dias das variações diárias",
+                "es": f"La volatilidad a {w} días de las variaciones diarias"}[lang]
+    return {
+        "en": f"{what} averaged {mean} {unit}, highest {high} {unit} on {e['max_day']}.",
+        "pt": f"{what} foi em média {mean} {unit}, com máximo de {high} {unit} em {e['max_day']}.",
+        "es": f"{what} fue de media {mean} {unit}, con un máximo de {high} {unit} el {e['max_day']}.",
+    }[lang]
+
+
+def _ramp(plan: Plan, r: Result, lang: str) -> Optional[str]:
+    e = r.extra
+    unit, h = _unit(e["column"]), e["ramp_hours"]
+    parts = []
+    if "max_up" in e:
+        parts.append({"en": "largest rise", "pt": "maior subida", "es": "mayor subida"}[lang]
+                     + f" {_num(e['max_up'], lang)} {unit} ({_when(e['max_up_at'])})")
+    if "max_down" in e:
+        parts.append({"en": "largest drop", "pt": "maior descida", "es": "mayor bajada"}[lang]
+                     + f" {_num(e['max_down'], lang)} {unit} ({_when(e['max_down_at'])})")
+    lead = {"en": f"Over {h} h windows", "pt": f"Em janelas de {h} h", "es": f"En ventanas de {h} h"}[lang]
+    typical = {"en": "typical |change|", "pt": "variação típica", "es": "variación típica"}[lang]
+    return f"{lead}: " + "; ".join(parts) + f"; {typical} {_num(e['mean_abs'], lang)} {unit}."
+
+
+_TEMPLATES: dict[str, Callable[[Plan, Result, str], Optional[str]]] = {
+    "extremum": _extremum,
+    "aggregate": _aggregate,
+    "threshold_hours": _threshold,
+    "slice": _slice,
+    "compare": _compare,
+    "distribution": _distribution,
+    "top_k": _top_k,
+    "tariff_band": _tariff,
+    "negative_prices": _negative,
+    "peak_offpeak": _peak_offpeak,
+    "streak": _streak,
+    "arbitrage": _arbitrage,
+    "percentile": _percentile,
+    "rolling": _rolling,
+    "volatility": _volatility,
+    "ramp": _ramp,
+}
+
+
+def _render(plan: Plan, result: Result, lang: str) -> Optional[str]:
+    if result.plot_kind == "none":
+        return None
+    if plan.intent == "multi":
+        parts = [_render(step, r, lang) for step, r in zip(plan.steps, result.extra.get("steps", []))]
+        return " ".join(parts) if parts and all(parts) else None
+    template = _TEMPLATES.get(plan.intent)
+    if template is None:
+        return None
+    try:
+        return template(plan, result, lang)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        # A result shape the template does not expect; let the LLM word it.
+        return None
+
+
+def render_answer(question: str, plan: Plan, result: Result) -> Optional[str]:
+    """Template answer in the question's language, or None if none fits."""
+    return _render(plan, result, detect_language(question))
@@ -3,8 +3,10 @@ from datetime import datetime, date, timedelta
 
 # Import modules individually to catch any issues
 try:
+    from perf import span
     from config import configure_page
-    from ui_components import render_header, render_date_selection, render_country_selection, render_load_data_button
+    from ui_components import (render_header, render_date_selection, render_country_selection,
+                               render_load_data_button, render_perf_panel)
     from data_loader import load_mibel_data
     from mibel_tab import render_mibel_tab
     from arbitrage_tab import render_arbitrage_tab
@@ -17,30 +19,35 @@ def main():
     # Configure page
     configure_page()
     
-    # Render header
-    render_header()
+    # One trace per rerun; every instrumented stage below nests under it.
+    with span("app.rerun") as rerun:
+        # Render header
+        render_header()
+        
+        # Initialize session state
+        initialize_session_state()
+        
+        # Date range selection
+        start_date, end_date = render_date_selection()
+        
+        # Country selection
+        country = render_country_selection()
+        
+        # Load data button and status
+        render_load_data_button(start_date, end_date, country)
+        
+        # Create tabs
+        tab1, tab2 = st.tabs(["⚡ Spot Market", "🔋 BESS Arbitrage"])
+        
+        # Render tabs
+        with tab1:
+            render_mibel_tab()
+        
+        with tab2:
+            render_arbitrage_tab()
     
-    # Initialize session state
-    initialize_session_state()
-    
-    # Date range selection
-    start_date, end_date = render_date_selection()
-    
-    # Country selection
-    country = render_country_selection()
-    
-    # Load data button and status
-    render_load_data_button(start_date, end_date, country)
-    
-    # Create tabs
-    tab1, tab2 = st.tabs(["⚡ Spot Market", "🔋 BESS Arbitrage"])
-    
-    # Render tabs
-    with tab1:
-        render_mibel_tab()
-    
-    with tab2:
-        render_arbitrage_tab()
+    # Developer timing panel (off unless ?perf=1 or PERF_PANEL=1)
+    render_perf_panel(rerun.trace)
     
     # Footer
     render_footer()
@@ -1,26 +1,46 @@
 import streamlit as st
-from data_loader import load_mibel_data
+from data_loader import (
+    MULTI_ZONE,
+    SERIES_LABELS,
+    join_context,
+    load_context_series,
+    load_mibel_data,
+    load_mibel_zones,
+    load_reserve_prices,
+    zone_frame,
+)
 from plotting_utils import (
     create_price_plot,
     create_average_day_plot,
     create_arbitrage_plot,
     create_price_histogram_plot,
+    create_context_plot,
+    create_reserve_plot,
+    create_zone_price_plot,
+    create_zone_average_day_plot,
+    create_spread_plot,
+    create_zone_histogram_plot,
 )
-from statistics_utils import display_key_stats
+from statistics_utils import display_key_stats, display_zone_stats
 from forecast_utils import generate_hourly_forecast, calculate_forecast_hours
 from tariff_utils import get_tipo_ciclo_options, compute_band_averages
 from price_distribution import (
     compute_price_histogram,
+    compute_price_histograms,
     count_hours_matching_conditions,
     infer_step_hours,
 )
 from llm_chat import render_chat_tab
+from perf import span, timed
 
+@timed()
 def render_mibel_tab():
     """Render the MIBEL Market analysis tab"""
     st.subheader("⚡ MIBEL Spot Market Analysis")
     
-    if st.session_state.data_submitted:
+    if st.session_state.data_submitted and st.session_state.submitted_country == MULTI_ZONE:
+        render_zone_comparison()
+    elif st.session_state.data_submitted:
         # Load MIBEL data with submitted parameters
         with st.spinner(f"Loading {st.session_state.submitted_country} market data..."):
             mibel_data = load_mibel_data(
@@ -45,7 +65,8 @@ def render_mibel_tab():
             # For "hourly" we resample to 1H mean and pass "none" downstream
             # so the plotting utilities render the time series as-is.
             if aggregation == "hourly":
-                plot_data = mibel_data.resample("1h").mean().dropna()
+                with span("mibel.resample_hourly"):
+                    plot_data = mibel_data.resample("1h").mean().dropna()
                 plot_data.attrs["source"] = mibel_data.attrs.get("source", "n/a")
                 downstream_agg = "none"
             else:
@@ -70,7 +91,8 @@ def render_mibel_tab():
             if aggregation in ("none", "hourly"):
                 forecast_hours = calculate_forecast_hours(
                     st.session_state.submitted_start_date, st.session_state.submitted_end_date)
-                hourly_for_forecast = mibel_data.resample("1h").mean().dropna()
+                with span("mibel.resample_hourly"):
+                    hourly_for_forecast = mibel_data.resample("1h").mean().dropna()
                 forecast_data = generate_hourly_forecast(hourly_for_forecast, forecast_hours=forecast_hours)
 
             # Price plot (with forecast overlay if time-series)
@@ -81,7 +103,8 @@ def render_mibel_tab():
                 forecast_data=forecast_data
             )
             if price_fig:
-                st.plotly_chart(price_fig, use_container_width=True)
+                with span("mibel.draw_price_plot"):
+                    st.plotly_chart(price_fig, use_container_width=True)
                 _render_source_caption(mibel_data)
 
             col1, col2 = st.columns(2)
@@ -100,6 +123,53 @@ def render_mibel_tab():
                     st.plotly_chart(arbitrage_fig, use_container_width=True)
                     _render_source_caption(mibel_data)
 
+            # Load / renewables / cross-border flow context (opt-in: extra ENTSO-E series)
+            chat_data = mibel_data
+            if st.checkbox("Show load, renewables and cross-border flows", key="mibel_show_context"):
+                with st.spinner("Loading ENTSO-E context series..."):
+                    context = load_context_series(
+                        st.session_state.submitted_start_date,
+                        st.session_state.submitted_end_date,
+                        st.session_state.submitted_country
+                    )
+                if context is not None:
+                    chat_data = join_context(mibel_data, context)
+                    available = [c for c in SERIES_LABELS if c in context.columns]
+                    selected = st.multiselect(
+                        "Context series",
+                        available,
+                        default=[c for c in ("load", "wind", "solar") if c in available],
+                        format_func=lambda c: SERIES_LABELS.get(c, c),
+                        key="mibel_context_series"
+                    )
+                    context_fig = create_context_plot(
+                        chat_data,
+                        f"MIBEL {st.session_state.submitted_country}",
+                        selected,
+                        labels=SERIES_LABELS
+                    )
+                    if context_fig:
+                        st.plotly_chart(context_fig, use_container_width=True)
+                        _render_source_caption(mibel_data)
+                else:
+                    st.info("No context series available for the selected range.")
+
+            # Ancillary services (REN, Portuguese control area) next to spot
+            if st.checkbox("Show aFRR / mFRR reserve prices (REN)", key="mibel_show_reserves"):
+                with st.spinner("Loading REN reserve prices..."):
+                    reserves = load_reserve_prices(
+                        st.session_state.submitted_start_date,
+                        st.session_state.submitted_end_date
+                    )
+                reserve_fig = create_reserve_plot(
+                    mibel_data, reserves, f"MIBEL {st.session_state.submitted_country}"
+                )
+                if reserve_fig:
+                    st.plotly_chart(reserve_fig, use_container_width=True)
+                    st.caption("Reserve prices: REN (Portuguese control area), €/MW/h.")
+                else:
+                    st.info("No reserve prices available for the selected range.")
+
             # Price distribution & query (computed on native-resolution data)
             st.divider()
             st.markdown("### 📊 Price Distribution & Query")
@@ -207,7 +277,7 @@ def render_mibel_tab():
             else:
                 st.info("No tariff band data available for the selected cycle.")
             st.divider()
-            render_chat_tab(mibel_data, st.session_state.submitted_country)
+            render_chat_tab(chat_data, st.session_state.submitted_country)
 
             # (smoke-test expander removed)
 
@@ -215,6 +285,71 @@ def render_mibel_tab():
             st.error("⚠️ Unable to load MIBEL data. Please check the data source connection.")
     else:
         st.info("🔄 Please select your date range and country, then click 'Load Data' to view market analysis.")
+
+
+@timed()
+def render_zone_comparison():
+    """Render the ES vs PT comparison (market coupling/decoupling) view"""
+    with st.spinner("Loading Spain and Portugal market data..."):
+        wide = load_mibel_zones(
+            st.session_state.submitted_start_date,
+            st.session_state.submitted_end_date
+        )
+
+    if wide is None or wide.empty:
+        st.error("⚠️ Unable to load MIBEL data. Please check the data source connection.")
+        return
+
+    display_zone_stats(wide)
+
+    aggregation = st.selectbox(
+        "Data Aggregation Level",
+        ["none", "daily", "monthly", "yearly"],
+        key="mibel_zone_agg"
+    )
+
+    st.download_button(
+        label="📥 Export Prices to CSV",
+        data=wide.to_csv(),
+        file_name=f"ES_PT_prices_{st.session_state.submitted_start_date}_{st.session_state.submitted_end_date}.csv",
+        mime="text/csv",
+        key="export_mibel_zones_csv"
+    )
+
+    price_fig = create_zone_price_plot(wide, "MIBEL ES vs PT Market Prices", aggregation)
+    if price_fig:
+        st.plotly_chart(price_fig, use_container_width=True)
+        _render_source_caption(wide)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        avg_day_fig = create_zone_average_day_plot(wide, "MIBEL ES vs PT")
+        if avg_day_fig:
+            st.plotly_chart(avg_day_fig, use_container_width=True)
+            _render_source_caption(wide)
+    with col2:
+        spread_fig = create_spread_plot(wide, "MIBEL")
+        if spread_fig:
+            st.plotly_chart(spread_fig, use_container_width=True)
+            _render_source_caption(wide)
+
+    st.divider()
+    st.markdown("### 📊 Price Distribution")
+    zones = [z for z in ("ES", "PT") if z in wide.columns]
+    bin_edges, hours_df, _ = compute_price_histograms(wide, zones, bin_width=5.0)
+    hist_fig = create_zone_histogram_plot(
+        bin_edges, hours_df, "MIBEL ES vs PT - Hours per Price Bin", bin_width=5.0
+    )
+    if hist_fig:
+        st.plotly_chart(hist_fig, use_container_width=True)
+        _render_source_caption(wide)
+    else:
+        st.info("Not enough data to build price histogram.")
+
+    st.divider()
+    chat_zone = st.selectbox("Zone for chat questions", ["Spain", "Portugal"], key="mibel_chat_zone")
+    render_chat_tab(zone_frame(wide, chat_zone), chat_zone)
+
 def _render_source_caption(df):
     """Render a very small caption under a plot indicating the data provider."""
     source = df.attrs.get("source", "n/a") if df is not None else "n/a"
@@ -0,0 +1,242 @@
+"""Lightweight per-stage timing: nested spans, a collector and a JSONL exporter.
+
+Pure Python (no Streamlit). Wrap a stage in ``span`` or decorate it with
+``timed``::
+
+    with perf.span("mibel.histogram", rows=len(df)):
+        ...
+
+    @perf.timed("arbitrage.calculate")
+    def calculate_arbitrage_benefits(...): ...
+
+Spans opened inside another span become its children. A span opened with
+no parent is the root of a new *trace* (the app opens one per Streamlit
+rerun in ``main``). When the root closes, the trace goes to the process-wide
+``Collector``, which keeps the last ``PERF_MAX_TRACES`` and hands each one
+to its exporters. With ``PERF_EXPORT_PATH`` set, a ``JsonlExporter`` writes
+one JSON line per trace::
+
+    {"trace": "9f2c...", "name": "app.rerun", "start": 1760000000.12,
+     "duration_ms": 812.4, "spans": [{"id": 0, "parent": null, "name": "app.rerun",
+     "offset_ms": 0.0, "duration_ms": 812.4, "thread": "ScriptRunner", "attrs": {}}, ...]}
+
+The current span is tracked in a ``contextvars`` variable, so each
+Streamlit session's script thread has its own trace. Worker threads do not
+inherit it: submit ``perf.wrap(fn)`` instead of ``fn`` to keep their spans
+in the caller's trace. ``PERF_ENABLED=0`` turns spans into no-ops.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PERF_ENABLED = os.environ.get("PERF_ENABLED", "1") != "0"
+PERF_EXPORT_PATH = os.environ.get("PERF_EXPORT_PATH")
+PERF_MAX_TRACES = int(os.environ.get("PERF_MAX_TRACES", "50"))
+
+
+class Trace:
+    """One root span and everything opened under it."""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: list[dict] = []
+        self.duration_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _add(self, record: dict) -> int:
+        with self._lock:
+            record["id"] = len(self.spans)
+            self.spans.append(record)
+            return record["id"]
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = [dict(s) for s in self.spans]
+        return {
+            "trace": self.id,
+            "name": self.name,
+            "start": round(self.start, 3),
+            "duration_ms": self.duration_ms,
+            "spans": spans,
+        }
+
+    def tree(self) -> list[dict]:
+        """Spans as nested ``{"span": record, "children": [...]}`` nodes, in start order."""
+        with self._lock:
+            spans = [dict(s) for s in self.spans]
+        nodes = {s["id"]: {"span": s, "children": []} for s in spans}
+        roots = []
+        for s in sorted(spans, key=lambda s: s["offset_ms"]):
+            parent = nodes.get(s["parent"]) if s["parent"] is not None else None
+            (parent["children"] if parent else roots).append(nodes[s["id"]])
+        return roots
+
+
+class Span:
+    """Handle yielded by ``span``; ``set`` attaches attributes."""
+
+    __slots__ = ("trace", "record")
+
+    def __init__(self, trace: Optional[Trace], record: dict):
+        self.trace = trace
+        self.record = record
+
+    def set(self, **attrs) -> None:
+        self.record["attrs"].update(attrs)
+
+
+# (trace, id of the innermost open span) of the running context.
+_CURRENT: contextvars.ContextVar[Optional[tuple[Trace, int]]] = contextvars.ContextVar(
+    "perf_current", default=None
+)
+_NOOP = Span(None, {"attrs": {}})
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the ``with`` block as a child of the open span (or a new trace)."""
+    if not PERF_ENABLED:
+        yield _NOOP
+        return
+    current = _CURRENT.get()
+    if current is None:
+        trace, parent = Trace(name), None
+    else:
+        trace, parent = current
+    t = time.perf_counter()
+    record = {
+        "parent": parent,
+        "name": name,
+        "offset_ms": round((t - trace._t0) * 1000.0, 3),
+        "duration_ms": None,
+        "thread": threading.current_thread().name,
+        "attrs": dict(attrs),
+    }
+    span_id = trace._add(record)
+    token = _CURRENT.set((trace, span_id))
+    try:
+        yield Span(trace, record)
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - t) * 1000.0, 3)
+        _CURRENT.reset(token)
+        if parent is None:
+            trace.duration_ms = record["duration_ms"]
+            get_collector().add(trace)
+
+
+def timed(name: Optional[str] = None):
+    """Decorator form of ``span``; defaults to ``module.function``."""
+    def decorate(fn: Callable) -> Callable:
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        # Stacked on ``st.cache_data`` the wrapped object is a cached function;
+        # keep its ``clear`` reachable.
+        if callable(getattr(fn, "clear", None)):
+            wrapper.clear = fn.clear
+        return wrapper
+    return decorate
+
+
+def wrap(fn: Callable) -> Callable:
+    """Bind ``fn`` to the caller's open span, for running in another thread."""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+def current_trace() -> Optional[Trace]:
+    current = _CURRENT.get()
+    return current[0] if current else None
+
+
+class JsonlExporter:
+    """Append each finished trace as one JSON line to ``path``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, trace: Trace) -> None:
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+            except OSError as e:
+                logger.warning("Perf export failed: %s", e)
+
+
+class Collector:
+    """Thread-safe ring of recent traces, fanned out to exporters."""
+
+    def __init__(self, max_traces: int = PERF_MAX_TRACES):
+        self._traces: deque[Trace] = deque(maxlen=max_traces)
+        self._exporters: list[Callable[[Trace], None]] = []
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+            exporters = list(self._exporters)
+        for export in exporters:
+            try:
+                export(trace)
+            except Exception:  # noqa: BLE001 - instrumentation must never break a page
+                logger.exception("Perf exporter %r failed", export)
+
+    def add_exporter(self, exporter: Callable[[Trace], None]) -> None:
+        with self._lock:
+            self._exporters.append(exporter)
+
+    def recent(self, name: Optional[str] = None, limit: Optional[int] = None) -> list[Trace]:
+        """Finished traces, newest first, optionally only those named ``name``."""
+        with self._lock:
+            traces = [t for t in reversed(self._traces) if name is None or t.name == name]
+        return traces[:limit] if limit else traces
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+_COLLECTOR: Optional[Collector] = None
+_COLLECTOR_LOCK = threading.Lock()
+
+
+def get_collector() -> Collector:
+    """Process-wide collector (with the JSONL exporter when configured)."""
+    global _COLLECTOR
+    with _COLLECTOR_LOCK:
+        if _COLLECTOR is None:
+            _COLLECTOR = Collector()
+            if PERF_EXPORT_PATH:
+                _COLLECTOR.add_exporter(JsonlExporter(PERF_EXPORT_PATH))
+        return _COLLECTOR
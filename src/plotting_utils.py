@@ -1,6 +1,11 @@
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
+from perf import timed
+
+@timed()
 def create_price_plot(data, title, aggregation="none", forecast_data=None):
     """Create interactive price plot with optional forecast overlay for future timestamps (hourly view only)"""
     if data is None or data.empty:
@@ -45,6 +50,7 @@ def create_price_plot(data, title, aggregation="none", forecast_data=None):
     
     return fig
 
+@timed()
 def create_average_day_plot(data, title):
     """Create average day profile plot"""
     if data is None or data.empty:
@@ -69,6 +75,7 @@ def create_average_day_plot(data, title):
     
     return fig
 
+@timed()
 def create_price_histogram_plot(bin_edges, hours, title, bin_width=5.0):
     """Create a bar chart of hours spent per price bin.
 
@@ -110,6 +117,7 @@ def create_price_histogram_plot(bin_edges, hours, title, bin_width=5.0):
     return fig
 
 
+@timed()
 def create_arbitrage_plot(data, title):
     """Create daily arbitrage potential plot"""
     if data is None or data.empty:
@@ -131,6 +139,158 @@ def create_arbitrage_plot(data, title):
     
     return fig
 
+@timed()
+def create_zone_price_plot(wide, title, aggregation="none", zones=("ES", "PT")):
+    """Create one price plot with a line per zone (aggregated column-wise)"""
+    if wide is None or wide.empty:
+        return None
+
+    zones = [z for z in zones if z in wide.columns]
+    prices = wide[zones]
+    if aggregation == "daily":
+        df_agg = prices.resample("D").mean().dropna(how="all")
+        suffix = "Daily Average"
+    elif aggregation == "monthly":
+        df_agg = prices.resample("MS").mean().dropna(how="all")
+        suffix = "Monthly Average"
+    elif aggregation == "yearly":
+        df_agg = prices.resample("YS").mean().dropna(how="all")
+        suffix = "Yearly Average"
+    else:
+        df_agg = prices
+        suffix = "Price Evolution"
+
+    fig = px.line(df_agg, x=df_agg.index, y=zones, title=f"{title} - {suffix}")
+    fig.update_layout(
+        xaxis_title="Date/Time",
+        yaxis_title="Price (€/MWh)",
+        legend_title_text="Zone",
+        hovermode='x unified'
+    )
+    return fig
+
+@timed()
+def create_spread_plot(wide, title):
+    """Create daily ES−PT spread plot (mean and absolute mean per day)"""
+    if wide is None or wide.empty or 'spread' not in wide.columns:
+        return None
+
+    spread = wide['spread'].dropna()
+    daily = pd.DataFrame({
+        'mean_spread': spread.resample("D").mean(),
+        'mean_abs_spread': spread.abs().resample("D").mean(),
+    }).dropna(how="all")
+
+    fig = px.bar(daily, x=daily.index, y='mean_spread', title=f"{title} - Daily ES−PT Spread",
+                 hover_data=['mean_abs_spread'])
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="ES − PT (€/MWh)",
+        hovermode='x unified'
+    )
+    return fig
+
+@timed()
+def create_zone_average_day_plot(wide, title, zones=("ES", "PT")):
+    """Create average daily profile with one line per zone"""
+    if wide is None or wide.empty:
+        return None
+
+    zones = [z for z in zones if z in wide.columns]
+    avg_day = wide[zones].groupby(wide.index.hour).mean()
+    avg_day.index.name = 'hour'
+
+    fig = px.line(avg_day, x=avg_day.index, y=zones, title=f"{title} - Average Daily Pattern")
+    fig.update_layout(
+        xaxis_title="Hour of Day",
+        yaxis_title="Average Price (€/MWh)",
+        legend_title_text="Zone",
+        xaxis=dict(tickmode='linear', tick0=0, dtick=2),
+        hovermode='x unified'
+    )
+    return fig
+
+@timed()
+def create_zone_histogram_plot(bin_edges, hours_df, title, bin_width=5.0):
+    """Create overlaid hours-per-price-bin bars, one trace per zone"""
+    if bin_edges is None or len(bin_edges) < 2 or hours_df is None or hours_df.empty:
+        return None
+
+    centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+    df_hist = hours_df.copy()
+    df_hist['center'] = centers
+    df_long = df_hist.melt(id_vars='center', var_name='zone', value_name='hours')
+
+    fig = px.bar(df_long, x='center', y='hours', color='zone', barmode='overlay', title=title,
+                 opacity=0.6)
+    fig.update_traces(
+        width=bin_width * 0.95,
+        hovertemplate="Price bin center: %{x:g} €/MWh<br>Hours: %{y:.2f}<extra></extra>",
+    )
+    fig.update_layout(
+        xaxis_title="Price Bin (€/MWh)",
+        yaxis_title="Hours",
+        legend_title_text="Zone",
+        bargap=0.05,
+    )
+    return fig
+
+@timed()
+def create_context_plot(joined, title, columns, labels=None):
+    """Create price (left axis) vs context series in MW (right axis) plot.
+
+    ``joined`` is the price frame with context columns aligned on its index
+    (see ``data_loader.join_context``).
+    """
+    if joined is None or joined.empty:
+        return None
+    columns = [c for c in columns if c in joined.columns and c != 'price']
+    labels = labels or {}
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(
+        go.Scatter(x=joined.index, y=joined['price'], name=labels.get('price', 'Price (€/MWh)'),
+                   line=dict(width=1.5)),
+        secondary_y=False,
+    )
+    for col in columns:
+        fig.add_trace(
+            go.Scatter(x=joined.index, y=joined[col], name=labels.get(col, col),
+                       line=dict(width=1)),
+            secondary_y=True,
+        )
+    fig.update_layout(
+        title=f"{title} - Price vs Load, Renewables & Flows",
+        xaxis_title="Date/Time",
+        hovermode='x unified'
+    )
+    fig.update_yaxes(title_text="Price (€/MWh)", secondary_y=False)
+    fig.update_yaxes(title_text="MW", secondary_y=True)
+    return fig
+
+@timed()
+def create_reserve_plot(spot, reserves, title):
+    """Create hourly spot price vs aFRR/mFRR reserve price plot"""
+    if spot is None or spot.empty or reserves is None or reserves.empty:
+        return None
+
+    hourly = reserves.resample("1h").mean()
+    hourly['spot'] = spot['price'].resample("1h").mean()
+    hourly = hourly.dropna(how="all")
+    columns = [c for c in ('spot', 'afrr', 'mfrr') if c in hourly.columns]
+    names = {'spot': 'Spot (€/MWh)', 'afrr': 'aFRR (€/MW/h)', 'mfrr': 'mFRR (€/MW/h)'}
+
+    fig = px.line(hourly, x=hourly.index, y=columns, title=f"{title} - Spot vs Reserve Prices")
+    fig.for_each_trace(lambda t: t.update(name=names.get(t.name, t.name)))
+    fig.update_layout(
+        xaxis_title="Date/Time",
+        yaxis_title="Price",
+        legend_title_text="Market",
+        hovermode='x unified'
+    )
+    return fig
+
+@timed()
 def create_daily_benefits_chart(daily_stats, analysis_type, battery_capacity_mwh):
     """Create a chart showing daily benefits with degradation"""
     hover_data_cols = ['remaining_capacity']
@@ -153,6 +313,7 @@ def create_daily_benefits_chart(daily_stats, analysis_type, battery_capacity_mwh
     
     return fig_daily
 
+@timed()
 def create_degradation_plot(daily_stats):
     """Create battery capacity degradation visualization"""
     fig_degradation = px.line(daily_stats, x='date', y='remaining_capacity', 
@@ -163,4 +324,22 @@ def create_degradation_plot(daily_stats):
         hovermode='x unified'
     )
     
-    return fig_degradation
\ No newline at end of file
+    return fig_degradation
+@timed()
+def create_stacked_revenue_chart(daily_stats, battery_capacity_mwh):
+    """Create a stacked bar chart of daily spot, aFRR and mFRR revenue"""
+    names = {'spot_revenue': 'Spot arbitrage', 'afrr_revenue': 'aFRR capacity', 'mfrr_revenue': 'mFRR capacity'}
+    fig = px.bar(daily_stats, x='date', y=list(names),
+                 title=f"Daily Stacked Revenue - {battery_capacity_mwh} MWh Battery")
+    fig.for_each_trace(lambda t: t.update(name=names.get(t.name, t.name)))
+    fig.add_trace(go.Scatter(x=daily_stats['date'], y=daily_stats['spot_only_revenue'],
+                             mode='lines', name='Spot-only dispatch',
+                             line=dict(color='white', width=1, dash='dot')))
+    fig.update_layout(
+        barmode='relative',
+        xaxis_title="Date",
+        yaxis_title="Daily Revenue (€)",
+        legend_title_text="Revenue stream",
+        hovermode='x unified'
+    )
+    return fig
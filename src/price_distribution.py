@@ -13,6 +13,8 @@ from typing import Tuple
 import numpy as np
 import pandas as pd
 
+from perf import timed
+
 
 def infer_step_hours(df: pd.DataFrame) -> float:
     """Return median spacing between consecutive index entries, in hours.
@@ -34,6 +36,7 @@ def infer_step_hours(df: pd.DataFrame) -> float:
         return 1.0
 
 
+@timed()
 def compute_price_histogram(
     df: pd.DataFrame, bin_width: float = 5.0
 ) -> Tuple[np.ndarray, np.ndarray, float]:
@@ -63,6 +66,43 @@ def compute_price_histogram(
     return edges, hours, step_hours
 
 
+@timed()
+def compute_price_histograms(
+    df: pd.DataFrame, columns=None, bin_width: float = 5.0
+) -> Tuple[np.ndarray, pd.DataFrame, float]:
+    """Column-wise variant of :func:`compute_price_histogram`.
+
+    All ``columns`` share one set of bin edges so zones can be overlaid, and
+    the counts for every column come out of a single ``np.bincount`` pass.
+    Returns ``(bin_edges, hours_df, step_hours)`` where ``hours_df`` has one
+    row per bin and one column per input column. NaNs are ignored.
+    """
+    if df is None or df.empty:
+        return np.array([]), pd.DataFrame(), 1.0
+    columns = list(columns) if columns is not None else list(df.columns)
+    values = df[columns].to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.array([]), pd.DataFrame(columns=columns), 1.0
+
+    step_hours = infer_step_hours(df)
+
+    lo = math.floor(values[valid].min() / bin_width) * bin_width
+    hi = math.ceil(values[valid].max() / bin_width) * bin_width
+    if hi <= lo:
+        hi = lo + bin_width
+    edges = np.arange(lo, hi + bin_width / 2, bin_width)
+    n_bins = len(edges) - 1
+
+    # Same convention as np.histogram: half-open bins, last bin closed.
+    bins = np.floor((values - lo) / bin_width)
+    bins = np.clip(np.nan_to_num(bins, nan=0.0), 0, n_bins - 1).astype(np.int64)
+    flat = (bins + np.arange(len(columns)) * n_bins)[valid]
+    counts = np.bincount(flat, minlength=n_bins * len(columns))
+    hours = counts.reshape(len(columns), n_bins).T.astype(float) * step_hours
+    return edges, pd.DataFrame(hours, columns=columns), step_hours
+
+
 _OPERATORS = {
     ">": lambda s, v: s > v,
     "<": lambda s, v: s < v,
@@ -77,6 +117,7 @@ def count_hours_matching(df: pd.DataFrame, operator: str, threshold: float) -> T
     return count_hours_matching_conditions(df, [(operator, threshold)])
 
 
+@timed()
 def count_hours_matching_conditions(df: pd.DataFrame, conditions) -> Tuple[float, float]:
     """Return ``(matching_hours, total_hours)`` for an AND of conditions.
 
@@ -1,233 +1,341 @@
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
-import json
-from typing import Optional, Dict, Any
+"""REN (Redes Energéticas Nacionais) ancillary-services ingestion.
+
+Fetches aFRR (``GetSecResPrice``) and mFRR (``GetmFRRPrices``) prices from
+the REN market API and persists them into the local store next to spot
+prices. Requests go through the process-wide pool in ``async_http`` (retries
+with exponential backoff, per-host limit, coalescing of identical in-flight
+requests); long ranges are split into chunks fetched concurrently. Both
+endpoints go through a single vectorized parser.
+
+For offline development point ``base_url`` (or ``REN_API_BASE_URL``) at the
+stand-in server in ``ren_mock_server``.
+"""
+import asyncio
 import logging
-import numpy as np
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+import async_http
+from data_store import get_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = os.environ.get("REN_API_BASE_URL", "https://www.mercado.ren.pt/api")
+
+# REN publishes in Portuguese local time; the app works in naive Europe/Madrid.
+_REN_TZ = "Europe/Lisbon"
+_LOCAL_TZ = "Europe/Madrid"
+
+# Store key for all REN series (Portuguese control area).
+STORE_ZONE = "PT"
+
+# Product -> endpoint, the value-column aliases seen in its payloads and the
+# number of the first delivery period of a day (REN numbers hourly periods
+# 1-24, 23 or 25 on DST days).
+PRODUCTS = {
+    "afrr": {
+        "endpoint": "GetSecResPrice",
+        "aliases": ("price", "afrr_price", "secondary_reserve_price", "preco", "value"),
+        "first_period": 1,
+    },
+    "mfrr": {
+        "endpoint": "GetmFRRPrices",
+        "aliases": ("price", "mfrr_price", "manual_frr_price", "preco", "value"),
+        "first_period": 1,
+    },
+}
+
+_TIMESTAMP_ALIASES = ("timestamp", "datetime", "datahora")
+_DATE_ALIASES = ("date", "data", "day")
+_HOUR_ALIASES = ("hour", "hora", "period", "periodo")
+
+
+class RENAPIError(RuntimeError):
+    """Raised when a REN request fails after retries or returns bad data."""
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame(columns=["price"], index=pd.DatetimeIndex([], name="datetime", tz="UTC"))
+
+
+def _to_local(df: pd.DataFrame) -> pd.DataFrame:
+    """UTC-indexed frame -> naive Europe/Madrid, the app's convention."""
+    return df.tz_convert(_LOCAL_TZ).tz_localize(None)
+
+
+def _parse_utc(data: Any, aliases: Iterable[str], first_period: int) -> pd.DataFrame:
+    """``parse_ren_payload`` on a UTC index (what the store keeps)."""
+    if isinstance(data, dict):
+        records = data.get("data", data.get("Data", [data]))
+    else:
+        records = data
+    df = pd.DataFrame(records)
+    if df.empty:
+        return _empty_frame()
+    df.columns = [str(c).lower() for c in df.columns]
+
+    ts_col = next((c for c in _TIMESTAMP_ALIASES if c in df.columns), None)
+    date_col = next((c for c in _DATE_ALIASES if c in df.columns), None)
+    hour_col = next((c for c in _HOUR_ALIASES if c in df.columns), None)
+    if ts_col is not None:
+        index = pd.DatetimeIndex(pd.to_datetime(df[ts_col]))
+        if index.tz is None:
+            # Wall-clock Lisbon time: the repeated autumn hour cannot be told
+            # apart, so it is dropped rather than guessed.
+            index = index.tz_localize(_REN_TZ, ambiguous="NaT", nonexistent="shift_forward")
+        index = index.tz_convert("UTC")
+    elif date_col is not None and hour_col is not None:
+        # Period p of a day starts (p - first_period) elapsed hours after
+        # Lisbon midnight, which keeps 23- and 25-period DST days exact.
+        periods = pd.to_numeric(df[hour_col], errors="coerce") - first_period
+        midnight = pd.DatetimeIndex(pd.to_datetime(df[date_col])).normalize()
+        index = (midnight.tz_localize(_REN_TZ).tz_convert("UTC")
+                 + pd.to_timedelta(periods.to_numpy(), unit="h"))
+    else:
+        raise RENAPIError(f"No timestamp columns in REN payload: {list(df.columns)}")
+
+    price_col = next((c for c in aliases if c in df.columns), None)
+    if price_col is None:
+        raise RENAPIError(f"No price column in REN payload: {list(df.columns)}")
+
+    out = pd.DataFrame(
+        {"price": pd.to_numeric(df[price_col], errors="coerce").to_numpy()},
+        index=pd.DatetimeIndex(index, name="datetime"),
+    )
+    out = out[out.index.notna()].dropna().sort_index()
+    return out[~out.index.duplicated(keep="last")]
+
+
+def parse_ren_payload(data: Any, aliases: Iterable[str], first_period: int = 1) -> pd.DataFrame:
+    """Turn a REN JSON payload into a frame indexed by naive Europe/Madrid time.
+
+    Accepts a list of records, ``{"data": [...]}`` or a single record. The
+    timestamp comes from a timestamp column (naive values are Lisbon wall
+    clock) or a date + delivery-period pair, periods numbered from
+    ``first_period`` as in ``PRODUCTS``. The first value column matching
+    ``aliases`` becomes ``price``. All steps are column-wise (no row loops).
+    """
+    return _to_local(_parse_utc(data, aliases, first_period))
+
+
+def _chunk_dates(start: date, end: date, days: int) -> list[tuple[date, date]]:
+    chunks = []
+    cursor = start
+    while cursor <= end:
+        chunk_end = min(end, cursor + timedelta(days=days - 1))
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end + timedelta(days=1)
+    return chunks
+
 
 class RENAPIClient:
     """
     Client for REN (Redes Energéticas Nacionais) API
     Handles aFRR (GetSecResPrice) and mFRR (GetmFRRPrices) data retrieval
     """
-    
-    def __init__(self, base_url: str = "https://www.mercado.ren.pt/api", use_mock_data: bool = False):
+
+    def __init__(self, base_url: Optional[str] = None, max_retries: int = 3,
+                 backoff_factor: float = 0.5, timeout: float = 30.0,
+                 chunk_days: int = 7, max_workers: int = 4):
         """
         Initialize REN API client
-        
+
         Args:
-            base_url: Base URL for REN API endpoints
-            use_mock_data: If True, use mock data for development (default: True)
+            base_url: Base URL for REN API endpoints (defaults to ``REN_API_BASE_URL``)
+            max_retries: Retries on connection errors and 429/5xx responses
+            backoff_factor: Exponential backoff base in seconds (honours Retry-After)
+            timeout: Per-request timeout in seconds
+            chunk_days: Days per request when fetching long ranges
+            max_workers: Concurrent chunk requests per fetch (the host-wide
+                limit in ``async_http.HOST_LIMITS`` still applies)
         """
-        self.base_url = base_url
-        self.use_mock_data = use_mock_data
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.chunk_days = chunk_days
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.headers = {
             'User-Agent': 'Energy-Markets-Dashboard/1.0',
             'Accept': 'application/json',
-            'Content-Type': 'application/json'
-        })
-        
-        # Setup logging
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
-    
-    def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict]:
+        }
+
+    async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Any:
         """
-        Make HTTP request to REN API
-        
-        Args:
-            endpoint: API endpoint
-            params: Request parameters
-            
-        Returns:
-            JSON response data or None if error
+        GET a REN endpoint and return the decoded JSON.
+
+        Raises:
+            RENAPIError: on network failure, non-2xx status after retries, or invalid JSON
         """
+        url = f"{self.base_url}/{endpoint}"
+        logger.debug("REN request %s params=%s", url, params)
         try:
-            url = f"{self.base_url}/{endpoint}"
-            self.logger.info(f"Making request to: {url}")
-            self.logger.info(f"Parameters: {params}")
-            
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"API request failed: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Failed to decode JSON response: {e}")
-            return None
-    
+            return await async_http.get_json(
+                url, params=params, headers=self.headers, timeout=self.timeout,
+                max_retries=self.max_retries, backoff_factor=self.backoff_factor,
+            )
+        except async_http.AsyncHTTPError as e:
+            raise RENAPIError(f"REN request to {endpoint} failed: {e}") from e
+
+    async def _fetch_chunk(self, product: str, start: date, end: date) -> pd.DataFrame:
+        spec = PRODUCTS[product]
+        params = {
+            'startDate': start.strftime('%Y-%m-%d'),
+            'endDate': end.strftime('%Y-%m-%d'),
+            'format': 'json'
+        }
+        data = await self._make_request(spec["endpoint"], params)
+        return _parse_utc(data, spec["aliases"], spec["first_period"])
+
+    async def afetch_product(self, product: str, start_date, end_date) -> pd.DataFrame:
+        """Coroutine behind ``fetch_product`` for callers already on the event loop."""
+        return _to_local(await self.afetch_product_utc(product, start_date, end_date))
+
+    async def afetch_product_utc(self, product: str, start_date, end_date) -> pd.DataFrame:
+        """``afetch_product`` on a UTC index, as the local store keeps it.
+
+        Unlike the naive Madrid index, UTC keeps the repeated autumn hour
+        distinct, so frames of different products can be aligned safely.
+        """
+        start = pd.Timestamp(start_date).date()
+        end = pd.Timestamp(end_date).date()
+        limit = asyncio.Semaphore(max(1, self.max_workers))
+
+        async def _bounded(chunk):
+            async with limit:
+                return await self._fetch_chunk(product, *chunk)
+
+        frames = await asyncio.gather(*(_bounded(c) for c in _chunk_dates(start, end, self.chunk_days)))
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return _empty_frame()
+        df = pd.concat(frames).sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        logger.info("Retrieved %d %s price records", len(df), product)
+        return df
+
+    def fetch_product(self, product: str, start_date, end_date) -> pd.DataFrame:
+        """
+        Fetch one product over ``[start_date, end_date]`` (inclusive days).
+
+        The range is split into ``chunk_days`` chunks fetched concurrently over
+        the shared pool. Raises ``RENAPIError`` if any chunk fails.
+        """
+        return async_http.run(self.afetch_product(product, start_date, end_date))
+
     def get_secondary_reserve_prices(self, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
         """
         Get aFRR secondary reserve prices using GetSecResPrice endpoint
-        
-        Args:
-            start_date: Start date for data retrieval
-            end_date: End date for data retrieval
-            
+
         Returns:
             DataFrame with aFRR price data or None if error
         """
         try:
-            # Format dates for API (assuming ISO format)
-            params = {
-                'startDate': start_date.strftime('%Y-%m-%d'),
-                'endDate': end_date.strftime('%Y-%m-%d'),
-                'format': 'json'
-            }
-            
-            # Call GetSecResPrice endpoint
-            data = self._make_request('GetSecResPrice', params)
-            
-            if not data:
-                return None
-            
-            # Convert to DataFrame (structure will depend on actual API response)
-            # This is a template that may need adjustment based on actual API response
-            if isinstance(data, list):
-                df = pd.DataFrame(data)
-            elif isinstance(data, dict) and 'data' in data:
-                df = pd.DataFrame(data['data'])
-            else:
-                df = pd.DataFrame([data])
-            
-            # Process datetime column (adjust column names based on actual API)
-            if 'timestamp' in df.columns:
-                df['datetime'] = pd.to_datetime(df['timestamp'])
-            elif 'date' in df.columns and 'hour' in df.columns:
-                df['datetime'] = pd.to_datetime(df['date']) + pd.to_timedelta(df['hour'], unit='h')
-            
-            # Ensure we have a price column (adjust based on actual API response)
-            price_columns = ['price', 'afrr_price', 'secondary_reserve_price', 'value']
-            price_col = None
-            for col in price_columns:
-                if col in df.columns:
-                    price_col = col
-                    break
-            
-            if price_col:
-                df = df.rename(columns={price_col: 'price'})
-            
-            # Set datetime as index if available
-            if 'datetime' in df.columns:
-                df.set_index('datetime', inplace=True)
-                df.sort_index(inplace=True)
-            
-            self.logger.info(f"Retrieved {len(df)} aFRR price records")
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"Error processing aFRR data: {e}")
+            return self.fetch_product("afrr", start_date, end_date)
+        except RENAPIError as e:
+            logger.error("Error retrieving aFRR data: %s", e)
             return None
-    
+
     def get_mfrr_prices(self, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
         """
         Get mFRR prices using GetmFRRPrices endpoint
-        
-        Args:
-            start_date: Start date for data retrieval
-            end_date: End date for data retrieval
-            
+
         Returns:
             DataFrame with mFRR price data or None if error
         """
         try:
-            # Format dates for API
-            params = {
-                'startDate': start_date.strftime('%Y-%m-%d'),
-                'endDate': end_date.strftime('%Y-%m-%d'),
-                'format': 'json'
-            }
-            
-            # Call GetmFRRPrices endpoint
-            data = self._make_request('GetmFRRPrices', params)
-            
-            if not data:
-                return None
-            
-            # Convert to DataFrame (similar processing as aFRR)
-            if isinstance(data, list):
-                df = pd.DataFrame(data)
-            elif isinstance(data, dict) and 'data' in data:
-                df = pd.DataFrame(data['data'])
-            else:
-                df = pd.DataFrame([data])
-            
-            # Process datetime column
-            if 'timestamp' in df.columns:
-                df['datetime'] = pd.to_datetime(df['timestamp'])
-            elif 'date' in df.columns and 'hour' in df.columns:
-                df['datetime'] = pd.to_datetime(df['date']) + pd.to_timedelta(df['hour'], unit='h')
-            
-            # Ensure we have a price column
-            price_columns = ['price', 'mfrr_price', 'manual_frr_price', 'value']
-            price_col = None
-            for col in price_columns:
-                if col in df.columns:
-                    price_col = col
-                    break
-            
-            if price_col:
-                df = df.rename(columns={price_col: 'price'})
-            
-            # Set datetime as index if available
-            if 'datetime' in df.columns:
-                df.set_index('datetime', inplace=True)
-                df.sort_index(inplace=True)
-            
-            self.logger.info(f"Retrieved {len(df)} mFRR price records")
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"Error processing mFRR data: {e}")
+            return self.fetch_product("mfrr", start_date, end_date)
+        except RENAPIError as e:
+            logger.error("Error retrieving mFRR data: %s", e)
             return None
-    
+
     def test_connection(self) -> bool:
         """
         Test connection to REN API
-        
+
         Returns:
             True if connection successful, False otherwise
         """
+        test_date = (datetime.now() - timedelta(days=1)).date()
         try:
-            # Try a simple request to test connectivity
-            test_date = datetime.now() - timedelta(days=1)
-            params = {
-                'startDate': test_date.strftime('%Y-%m-%d'),
-                'endDate': test_date.strftime('%Y-%m-%d'),
-                'format': 'json'
-            }
-            
-            response = self._make_request('GetSecResPrice', params)
-            return response is not None
-            
-        except Exception as e:
-            self.logger.error(f"Connection test failed: {e}")
+            async_http.run(self._fetch_chunk("afrr", test_date, test_date))
+            return True
+        except RENAPIError as e:
+            logger.error("Connection test failed: %s", e)
             return False
 
 
+def ingest_reserve_prices(start_date, end_date, products=("afrr", "mfrr"),
+                          client: Optional[RENAPIClient] = None, store=None):
+    """Incrementally ingest REN reserve prices into the local store.
+
+    Only day ranges missing from the store's coverage manifest are fetched,
+    all products and ranges concurrently.
+    Returns ``(wide, failed)``: a frame indexed by naive Europe/Madrid time
+    with one column per product (€/MW/h), or None, and the products whose
+    fetch failed (served from whatever was already stored).
+    """
+    client = client or RENAPIClient()
+    store = store or get_store()
+
+    tasks = [
+        (product, lo, hi)
+        for product in products
+        for lo, hi in store.missing_ranges(product, STORE_ZONE, start_date, end_date)
+    ]
+    fetched = async_http.run_all(
+        [client.afetch_product_utc(product, lo, hi) for product, lo, hi in tasks],
+        return_exceptions=True,
+    )
+
+    failed = []
+    for (product, lo, hi), df in zip(tasks, fetched):
+        if isinstance(df, BaseException):
+            logger.warning("REN %s ingestion %s→%s failed: %s", product, lo, hi, df)
+            if product not in failed:
+                failed.append(product)
+            continue
+        try:
+            store.write(product, STORE_ZONE, df)
+            store.mark_covered(product, STORE_ZONE, lo, hi)
+        except OSError as e:
+            logger.warning("Local store write failed for %s: %s", product, e)
+
+    window_start = pd.Timestamp(start_date).tz_localize(_LOCAL_TZ)
+    window_end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).tz_localize(_LOCAL_TZ)
+    columns = []
+    for product in products:
+        stored = store.read(product, STORE_ZONE, window_start, window_end)
+        if stored is not None:
+            columns.append(stored["price"].rename(product))
+    if not columns:
+        return None, failed
+    # Align on UTC, where the repeated autumn hour is not a duplicate label,
+    # and go to local time once.
+    return _to_local(pd.concat(columns, axis=1).sort_index()), failed
+
+
 # Example usage and testing functions
-def test_ren_api():
-    """Test function for REN API client"""
-    client = RENAPIClient()
-    
+def test_ren_api(base_url: Optional[str] = None):
+    """Smoke-test the client (pass the mock server's ``base_url`` to run offline)"""
+    client = RENAPIClient(base_url=base_url)
+
     # Test connection
     if client.test_connection():
         print("✅ REN API connection successful")
     else:
         print("❌ REN API connection failed")
         return
-    
+
     # Test data retrieval
     end_date = datetime.now()
     start_date = end_date - timedelta(days=7)  # Last week
-    
+
     print(f"Testing data retrieval from {start_date.date()} to {end_date.date()}")
-    
+
     # Test aFRR data
     afrr_data = client.get_secondary_reserve_prices(start_date, end_date)
     if afrr_data is not None:
@@ -235,7 +343,7 @@ def test_ren_api():
         print(afrr_data.head())
     else:
         print("❌ aFRR data retrieval failed")
-    
+
     # Test mFRR data
     mfrr_data = client.get_mfrr_prices(start_date, end_date)
     if mfrr_data is not None:
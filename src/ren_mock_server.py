@@ -0,0 +1,152 @@
+"""Local stand-in for the REN market API.
+
+Serves deterministic synthetic aFRR / mFRR prices on the same endpoints as
+the real API so ``ren_api`` can be developed and exercised offline. Failure
+injection (``fail_first``) returns HTTP 503 for the first N requests, which
+exercises the client's retry/backoff path.
+
+Usage::
+
+    with serve_mock_ren() as server:
+        client = RENAPIClient(base_url=server.base_url)
+        df = client.fetch_product("afrr", "2024-01-01", "2024-01-31")
+
+The context manager works as-is inside a pytest fixture (``yield`` from
+within the ``with`` block). Run ``python ren_mock_server.py --port 8765``
+to start it standalone and set ``REN_API_BASE_URL=http://127.0.0.1:8765``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+# Endpoint -> (base level €/MW/h, daily amplitude, seed offset)
+_ENDPOINTS = {
+    "GetSecResPrice": (12.0, 6.0, 1),
+    "GetmFRRPrices": (8.0, 4.0, 2),
+}
+
+
+def synthetic_records(endpoint: str, start, end) -> list[dict]:
+    """Deterministic hourly records (``date``, ``hour`` 1-24, ``price``)."""
+    base, amplitude, offset = _ENDPOINTS[endpoint]
+    days = pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq="D")
+    records = []
+    for day in days:
+        rng = np.random.default_rng(int(day.strftime("%Y%m%d")) * 10 + offset)
+        hours = np.arange(24)
+        prices = base + amplitude * np.sin((hours - 6) / 24 * 2 * np.pi) + rng.normal(0, 1.5, 24)
+        day_str = day.strftime("%Y-%m-%d")
+        records.extend(
+            {"date": day_str, "hour": int(h) + 1, "price": round(float(p), 2)}
+            for h, p in zip(hours, np.maximum(prices, 0.0))
+        )
+    return records
+
+
+class MockRENServer(ThreadingHTTPServer):
+    """HTTP server holding the mock's configuration and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, fail_first: int = 0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _next_request(self) -> int:
+        with self._lock:
+            self.request_count += 1
+            return self.request_count
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockRENServer
+
+    def log_message(self, format, *args):  # noqa: A002 - keep test output quiet
+        pass
+
+    def _send_json(self, status: int, body) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):  # noqa: N802 - http.server naming
+        n = self.server._next_request()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if n <= self.server.fail_first:
+            self._send_json(503, {"error": "injected failure"})
+            return
+
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        if endpoint not in _ENDPOINTS:
+            self._send_json(404, {"error": f"unknown endpoint {endpoint}"})
+            return
+        query = parse_qs(url.query)
+        try:
+            start = pd.Timestamp(query["startDate"][0])
+            end = pd.Timestamp(query["endDate"][0])
+        except (KeyError, ValueError):
+            self._send_json(400, {"error": "startDate and endDate are required"})
+            return
+        if end < start or end - start > timedelta(days=366):
+            self._send_json(400, {"error": "invalid date range"})
+            return
+        self._send_json(200, {"data": synthetic_records(endpoint, start, end)})
+
+
+@contextmanager
+def serve_mock_ren(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, fail_first: int = 0):
+    """Run the mock server in a background thread for the ``with`` block."""
+    server = MockRENServer((host, port), latency=latency, fail_first=fail_first)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the REN market API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with 503")
+    args = parser.parse_args()
+
+    server = MockRENServer((args.host, args.port), latency=args.latency, fail_first=args.fail_first)
+    print(f"Mock REN API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
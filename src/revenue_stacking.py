@@ -0,0 +1,219 @@
+"""Revenue stacking: spot arbitrage co-optimised with aFRR / mFRR capacity.
+
+Pure functions (no Streamlit). Each day is solved as an independent
+dynamic programme over a discretised state of charge (SoC) that starts and
+ends at the same level. Every hour the battery picks a SoC move (charging or
+discharging on the day-ahead market) and offers the power it is not using
+as reserve capacity, subject to the energy it would need to sustain the
+offer. All days are solved at once: the DP runs over arrays shaped
+``(days, soc_levels, moves)``, so a year of hourly data takes milliseconds.
+
+Modelling assumptions (kept deliberately simple):
+  * Hourly resolution; spot revenue is price × energy exchanged with the grid.
+  * Round-trip efficiency is split evenly between charging and discharging.
+  * Reserve revenue is capacity payment only (€/MW/h × MW offered);
+    activation energy and its settlement are ignored.
+  * aFRR is symmetric (needs headroom up and down for ``afrr_duration_h``);
+    mFRR is upward only (needs stored energy for ``mfrr_duration_h``).
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from perf import timed
+
+HOURS_PER_DAY = 24
+
+
+def to_daily_matrix(series: pd.Series, days: Optional[pd.DatetimeIndex] = None):
+    """Reshape an hourly series into a ``(days, 24)`` matrix.
+
+    DST days are normalised to 24 hours: the repeated autumn hour is averaged
+    and the missing spring hour is forward-filled. Hours absent from the data
+    become 0 (no revenue). Returns ``(days_index, matrix)``.
+    """
+    hourly = series.groupby([series.index.normalize(), series.index.hour]).mean()
+    table = hourly.unstack(level=1).reindex(columns=range(HOURS_PER_DAY))
+    if days is not None:
+        table = table.reindex(days)
+    table = table.ffill(axis=1).bfill(axis=1).fillna(0.0)
+    return pd.DatetimeIndex(table.index), table.to_numpy(dtype=float)
+
+
+def _reserve_allocation(headroom_mw, energy_mwh, capacity_mwh, eta_one_way,
+                        afrr_price, mfrr_price, afrr_duration_h, mfrr_duration_h):
+    """Split unused power between aFRR and mFRR for given end-of-hour energy.
+
+    Capacity goes to the better-paid product first and the remainder to the
+    other, with both sharing the upward energy budget. Returns
+    ``(afrr_mw, mfrr_mw)`` broadcast to the inputs' shape.
+    """
+    up_energy = energy_mwh * eta_one_way
+    down_energy = (capacity_mwh - energy_mwh) / eta_one_way
+
+    afrr_cap = np.minimum(
+        headroom_mw,
+        np.minimum(up_energy, down_energy) / afrr_duration_h,
+    )
+    mfrr_cap = np.minimum(headroom_mw, up_energy / mfrr_duration_h)
+
+    afrr_first = afrr_price >= mfrr_price
+    # aFRR first, then mFRR with what is left of power and upward energy.
+    a1 = np.where(afrr_price > 0, afrr_cap, 0.0)
+    m1 = np.minimum(headroom_mw - a1, np.maximum(up_energy - a1 * afrr_duration_h, 0.0) / mfrr_duration_h)
+    m1 = np.where(mfrr_price > 0, m1, 0.0)
+    # mFRR first, then aFRR.
+    m2 = np.where(mfrr_price > 0, mfrr_cap, 0.0)
+    a2 = np.minimum(
+        headroom_mw - m2,
+        np.minimum(np.maximum(up_energy - m2 * mfrr_duration_h, 0.0), down_energy) / afrr_duration_h,
+    )
+    a2 = np.where(afrr_price > 0, a2, 0.0)
+
+    afrr_mw = np.where(afrr_first, a1, a2)
+    mfrr_mw = np.where(afrr_first, m1, m2)
+    return np.maximum(afrr_mw, 0.0), np.maximum(mfrr_mw, 0.0)
+
+
+def optimize_stacked_dispatch(spot, afrr, mfrr, capacity_mwh, power_mw=None, efficiency=0.85,
+                              soc_levels=8, initial_soc=0.5,
+                              afrr_duration_h=1.0, mfrr_duration_h=1.0):
+    """Co-optimise hourly spot arbitrage and reserve offers for every day.
+
+    ``spot`` (€/MWh), ``afrr`` and ``mfrr`` (€/MW/h) are ``(days, 24)``
+    matrices. ``soc_levels`` is the number of SoC steps between empty and
+    full; SoC moves per hour are limited by ``power_mw`` (defaults to a 1C
+    battery). Each day starts and ends at ``initial_soc``.
+
+    Returns a dict of ``(days, 24)`` arrays: ``soc`` (MWh at end of hour),
+    ``grid_mwh`` (+ import / − export), ``afrr_mw``, ``mfrr_mw``,
+    ``spot_revenue``, ``afrr_revenue``, ``mfrr_revenue``.
+    """
+    spot = np.asarray(spot, dtype=float)
+    afrr = np.asarray(afrr, dtype=float)
+    mfrr = np.asarray(mfrr, dtype=float)
+    n_days = spot.shape[0]
+    power_mw = capacity_mwh if power_mw is None else power_mw
+    eta = np.sqrt(efficiency)
+
+    step = capacity_mwh / soc_levels
+    max_move = max(1, int(np.floor(power_mw / step + 1e-9)))
+    moves = np.arange(-max_move, max_move + 1)                     # (A,)
+    states = np.arange(soc_levels + 1)                              # (S,)
+    start = int(round(initial_soc * soc_levels))
+
+    next_state = states[:, None] + moves[None, :]                   # (S, A)
+    feasible = (next_state >= 0) & (next_state <= soc_levels)
+    next_clipped = np.clip(next_state, 0, soc_levels)
+
+    delta_e = moves * step                                          # battery-side MWh
+    grid = np.where(delta_e > 0, delta_e / eta, delta_e * eta)      # + buy / − sell
+    headroom = np.maximum(power_mw - np.abs(delta_e), 0.0)          # (A,)
+    energy_next = next_clipped * step                               # (S, A)
+
+    # Backward induction over (days, S, A); the terminal value forces each
+    # day to end at `start`. Only the argmax policy is kept per hour.
+    value = np.full((n_days, soc_levels + 1), -np.inf)
+    value[:, start] = 0.0
+    policy = np.empty((HOURS_PER_DAY, n_days, soc_levels + 1), dtype=np.int64)
+    for h in range(HOURS_PER_DAY - 1, -1, -1):
+        p_a = afrr[:, h][:, None, None]
+        p_m = mfrr[:, h][:, None, None]
+        a_mw, m_mw = _reserve_allocation(
+            headroom[None, None, :], energy_next[None, :, :], capacity_mwh, eta,
+            p_a, p_m, afrr_duration_h, mfrr_duration_h,
+        )
+        total = (
+            p_a * a_mw + p_m * m_mw
+            - spot[:, h][:, None, None] * grid[None, None, :]
+            + value[:, next_clipped]
+        )
+        total = np.where(feasible[None, :, :], total, -np.inf)
+        policy[h] = np.argmax(total, axis=2)
+        value = np.take_along_axis(total, policy[h][:, :, None], axis=2)[:, :, 0]
+
+    # Forward pass to recover the schedule from the start state.
+    day_idx = np.arange(n_days)
+    state = np.full(n_days, start)
+    out = {name: np.empty((n_days, HOURS_PER_DAY)) for name in
+           ("soc", "grid_mwh", "afrr_mw", "mfrr_mw")}
+    for h in range(HOURS_PER_DAY):
+        action = policy[h][day_idx, state]
+        state = next_clipped[state, action]
+        energy = state * step
+        a_mw, m_mw = _reserve_allocation(
+            headroom[action], energy, capacity_mwh, eta,
+            afrr[:, h], mfrr[:, h], afrr_duration_h, mfrr_duration_h,
+        )
+        out["grid_mwh"][:, h] = grid[action]
+        out["afrr_mw"][:, h] = a_mw
+        out["mfrr_mw"][:, h] = m_mw
+        out["soc"][:, h] = energy
+    out["spot_revenue"] = -spot * out["grid_mwh"]
+    out["afrr_revenue"] = afrr * out["afrr_mw"]
+    out["mfrr_revenue"] = mfrr * out["mfrr_mw"]
+    return out
+
+
+@timed()
+def calculate_stacked_revenue(mibel_hourly, reserves, battery_capacity_mwh, efficiency,
+                              battery_cost_per_mwh, power_mw=None, soc_levels=8,
+                              initial_soc=0.5, afrr_duration_h=1.0, mfrr_duration_h=1.0):
+    """Run the stacked dispatch over a period and summarise it per day.
+
+    ``mibel_hourly`` has an hourly ``price`` column; ``reserves`` has
+    ``afrr`` / ``mfrr`` columns (€/MW/h) and may be None (spot only).
+    Returns ``(daily_stats, summary)`` where ``summary`` includes the uplift
+    over a spot-only dispatch solved with the same engine.
+    """
+    days, spot = to_daily_matrix(mibel_hourly['price'])
+    zeros = np.zeros_like(spot)
+    afrr = zeros
+    mfrr = zeros
+    if reserves is not None and not reserves.empty:
+        if 'afrr' in reserves.columns:
+            afrr = to_daily_matrix(reserves['afrr'].dropna(), days)[1]
+        if 'mfrr' in reserves.columns:
+            mfrr = to_daily_matrix(reserves['mfrr'].dropna(), days)[1]
+
+    kwargs = dict(capacity_mwh=battery_capacity_mwh, power_mw=power_mw, efficiency=efficiency,
+                  soc_levels=soc_levels, initial_soc=initial_soc,
+                  afrr_duration_h=afrr_duration_h, mfrr_duration_h=mfrr_duration_h)
+    stacked = optimize_stacked_dispatch(spot, afrr, mfrr, **kwargs)
+    spot_only = optimize_stacked_dispatch(spot, zeros, zeros, **kwargs)
+
+    discharged = np.clip(-stacked['grid_mwh'], 0, None).sum(axis=1) / np.sqrt(efficiency)
+    daily_stats = pd.DataFrame({
+        'date': days.date,
+        'spot_revenue': stacked['spot_revenue'].sum(axis=1),
+        'afrr_revenue': stacked['afrr_revenue'].sum(axis=1),
+        'mfrr_revenue': stacked['mfrr_revenue'].sum(axis=1),
+        'spot_only_revenue': spot_only['spot_revenue'].sum(axis=1),
+        'equivalent_cycles': discharged / battery_capacity_mwh,
+        'avg_afrr_mw': stacked['afrr_mw'].mean(axis=1),
+        'avg_mfrr_mw': stacked['mfrr_mw'].mean(axis=1),
+    })
+    daily_stats['total_revenue'] = daily_stats[['spot_revenue', 'afrr_revenue', 'mfrr_revenue']].sum(axis=1)
+
+    total = float(daily_stats['total_revenue'].sum())
+    spot_only_total = float(daily_stats['spot_only_revenue'].sum())
+    n_days = len(daily_stats)
+    yearly_benefit = total / n_days * 365 if n_days else 0.0
+    total_investment = battery_capacity_mwh * battery_cost_per_mwh
+    summary = {
+        'total_revenue': total,
+        'spot_revenue': float(daily_stats['spot_revenue'].sum()),
+        'afrr_revenue': float(daily_stats['afrr_revenue'].sum()),
+        'mfrr_revenue': float(daily_stats['mfrr_revenue'].sum()),
+        'spot_only_revenue': spot_only_total,
+        'uplift_pct': ((total - spot_only_total) / abs(spot_only_total) * 100) if spot_only_total else float('nan'),
+        'avg_daily_revenue': total / n_days if n_days else 0.0,
+        'yearly_benefit': yearly_benefit,
+        'total_investment': total_investment,
+        'payback_years': (total_investment / yearly_benefit) if yearly_benefit > 0 else float('inf'),
+        'total_days': n_days,
+    }
+    return daily_stats, summary
@@ -1,47 +1,50 @@
 import streamlit as st
-import pandas as pd
 from config import get_summary_stats_html
+from core.stats import (  # noqa: F401 - re-exported
+    COUPLING_TOLERANCE,
+    calculate_summary_statistics,
+    compute_key_stats,
+    compute_zone_stats,
+)
+from perf import timed
 
+@timed()
 def display_key_stats(data, show_arbitrage=True):
     """Display key statistics and return arbitrage value"""
-    if data is None or data.empty:
+    stats = compute_key_stats(data, show_arbitrage)
+    if stats is None:
         return None
     
-    # Calculate statistics
-    avg_price = data['price'].mean()
-    max_price = data['price'].max()
-    min_price = data['price'].min()
-    
-    # Calculate arbitrage value
-    avg_daily_max = None
-    avg_daily_min = None
-    if show_arbitrage:
-        df = data.copy()
-        df['date'] = pd.to_datetime(df.index).date
-        daily_stats = df.groupby('date')['price'].agg(['min', 'max'])
-        daily_stats['arbitrage'] = daily_stats['max'] - daily_stats['min']
-        arbitrage_value = daily_stats['arbitrage'].mean()
-        avg_daily_max = daily_stats['max'].mean()
-        avg_daily_min = daily_stats['min'].mean()
-    else:
-        arbitrage_value = data['price'].std()
-    
     # Display using HTML from config
-    html = get_summary_stats_html(avg_price, max_price, min_price, arbitrage_value, show_arbitrage,
-                                  avg_daily_max=avg_daily_max, avg_daily_min=avg_daily_min)
+    html = get_summary_stats_html(stats['avg_price'], stats['max_price'], stats['min_price'],
+                                  stats['arbitrage_value'], show_arbitrage,
+                                  avg_daily_max=stats['avg_daily_max'], avg_daily_min=stats['avg_daily_min'])
     st.markdown(html, unsafe_allow_html=True)
     
-    return arbitrage_value
+    return stats['arbitrage_value']
 
-def calculate_summary_statistics(daily_stats):
-    """Calculate summary statistics for arbitrage analysis"""
-    if daily_stats.empty:
+@timed()
+def display_zone_stats(wide):
+    """Display per-zone statistics and ES–PT coupling metrics"""
+    per_zone, coupling = compute_zone_stats(wide)
+    if per_zone is None:
         return None
-    
-    return {
-        'median_benefit': daily_stats['daily_benefit'].median(),
-        'std_benefit': daily_stats['daily_benefit'].std(),
-        'mean_benefit': daily_stats['daily_benefit'].mean(),
-        'max_benefit': daily_stats['daily_benefit'].max(),
-        'min_benefit': daily_stats['daily_benefit'].min()
-    }
\ No newline at end of file
+
+    table = per_zone.rename(columns={
+        'mean': 'Average Price (€/MWh)',
+        'max': 'Maximum Price (€/MWh)',
+        'min': 'Minimum Price (€/MWh)',
+        'avg_daily_arbitrage': 'Avg Daily Arbitrage (€/MWh)',
+    }).round(2)
+    table.index.name = 'Zone'
+    st.dataframe(table, use_container_width=True)
+
+    if coupling is not None:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Coupled Hours", f"{coupling['coupled_pct']:.1f} %",
+                    help=f"Share of the period with |ES − PT| < {COUPLING_TOLERANCE} €/MWh")
+        col2.metric("Mean |ES − PT|", f"{coupling['mean_abs_spread']:.2f} €/MWh")
+        col3.metric("Hours ES > PT", f"{coupling['es_premium_hours']:.0f} h")
+        col4.metric("Hours PT > ES", f"{coupling['pt_premium_hours']:.0f} h")
+
+    return coupling
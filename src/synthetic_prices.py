@@ -0,0 +1,159 @@
+"""Seeded synthetic MIBEL-like day-ahead prices for benchmarks and demos.
+
+Pure functions (no Streamlit, no network). Frames look like what
+``data_loader`` returns: a tz-naive Europe/Madrid ``DatetimeIndex`` and a
+``price`` column (EUR/MWh), or one column per zone plus ``spread`` for the
+multi-zone shape of ``load_mibel_zones``.
+
+The series has a morning and evening peak, a midday solar dip that deepens
+in spring and in later years, winter/summer seasonality, cheaper weekends,
+AR(1) noise, occasional scarcity spikes and negative prices on sunny
+low-demand hours. Local-time conversion gives real DST days: the spring day
+misses 02:00 and the autumn day repeats it. With ``resolution="mixed"`` the
+series is hourly before ``QUARTER_HOUR_SWITCH`` and 15-minute from then on,
+as ENTSO-E serves the Iberian zones.
+
+The same ``seed`` always yields the same frame.
+"""
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# First day of 15-minute day-ahead products in MIBEL.
+QUARTER_HOUR_SWITCH = "2025-10-01"
+
+_LOCAL_TZ = "Europe/Madrid"
+_RESOLUTIONS = ("60min", "15min", "mixed")
+
+
+def _local_index(start: str, end: str, freq: str) -> pd.DatetimeIndex:
+    """UTC grid for local days ``start``..``end`` converted to naive local time."""
+    lo = pd.Timestamp(start).tz_localize(_LOCAL_TZ)
+    hi = (pd.Timestamp(end) + pd.Timedelta(days=1)).tz_localize(_LOCAL_TZ)
+    utc = pd.date_range(lo.tz_convert("UTC"), hi.tz_convert("UTC"), freq=freq, inclusive="left")
+    local = utc.tz_convert(_LOCAL_TZ).tz_localize(None).as_unit("ns")
+    # The repeated autumn hour comes back out of order below hourly steps;
+    # keep the index sorted as the loaders do.
+    return local[np.argsort(local.asi8, kind="stable")]
+
+
+def synthetic_index(start: str, end: str, resolution: str = "mixed",
+                    switch_date: str = QUARTER_HOUR_SWITCH) -> pd.DatetimeIndex:
+    """Naive local timestamps for ``start``..``end`` (inclusive days)."""
+    if resolution not in _RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {_RESOLUTIONS}, got {resolution!r}")
+    if resolution != "mixed":
+        return _local_index(start, end, "h" if resolution == "60min" else "15min")
+    switch = pd.Timestamp(switch_date)
+    parts = []
+    if pd.Timestamp(start) < switch:
+        parts.append(_local_index(start, min(pd.Timestamp(end), switch - pd.Timedelta(days=1)), "h"))
+    if pd.Timestamp(end) >= switch:
+        parts.append(_local_index(max(pd.Timestamp(start), switch), end, "15min"))
+    return parts[0].append(parts[1:]) if parts else pd.DatetimeIndex([], dtype="datetime64[ns]")
+
+
+def _ar1(rng: np.random.Generator, n: int, phi: float, sigma: float) -> np.ndarray:
+    """AR(1) noise via a blocked recursion (exact, no Python loop per sample)."""
+    if n == 0:
+        return np.zeros(0)
+    shocks = rng.normal(0.0, sigma, n)
+    out = np.empty(n)
+    block = 256
+    powers = phi ** np.arange(block)
+    # x[t] = phi^(t+1) * prev + sum_{k<=t} phi^(t-k) e[k]: a lower-triangular product per block.
+    lag = np.arange(block)[:, None] - np.arange(block)[None, :]
+    weights = np.where(lag >= 0, phi ** np.maximum(lag, 0), 0.0)
+    prev = 0.0
+    for lo in range(0, n, block):
+        e = shocks[lo:lo + block]
+        m = len(e)
+        out[lo:lo + m] = weights[:m, :m] @ e + powers[:m] * phi * prev
+        prev = out[lo + m - 1]
+    return out
+
+
+def _base_shape(index: pd.DatetimeIndex, rng: np.random.Generator) -> np.ndarray:
+    """Deterministic price level plus noise, spikes and solar-driven negatives."""
+    n = len(index)
+    hour = index.hour.to_numpy() + index.minute.to_numpy() / 60.0
+    doy = index.dayofyear.to_numpy()
+    dow = index.dayofweek.to_numpy()
+    years = (index.year.to_numpy() - 2016) + doy / 365.25
+
+    # Gas-driven level: cheap, then a 2021-2022 crisis hump, then back down.
+    level = 45.0 + 120.0 * np.exp(-((years - 6.6) ** 2) / 0.5) + 8.0 * np.sin(years)
+    season = 12.0 * np.cos((doy - 15) / 365.25 * 2 * np.pi)
+    peaks = 14.0 * np.exp(-((hour - 8.5) ** 2) / 3.0) + 22.0 * np.exp(-((hour - 20.5) ** 2) / 4.0)
+    # Solar dip: stronger from March to June and as installed PV grows.
+    solar_season = 0.5 + 0.5 * np.cos((doy - 120) / 365.25 * 2 * np.pi)
+    solar_growth = np.clip((years - 3.0) / 6.0, 0.1, 1.3)
+    solar = 45.0 * solar_growth * solar_season * np.exp(-((hour - 13.5) ** 2) / 6.0)
+    weekend = np.where(dow >= 5, 9.0, 0.0)
+
+    price = level + season + peaks - solar - weekend
+    price += _ar1(rng, n, 0.9, 6.0)
+    # Scarcity spikes: a few evening hours a year.
+    spikes = (rng.random(n) < 0.0015) & (hour >= 18) & (hour <= 22)
+    price[spikes] += rng.gamma(2.0, 60.0, spikes.sum())
+    # Oversupply: sunny low-demand hours clear at or below zero.
+    oversupply = (solar > 30.0) & (rng.random(n) < 0.35 * solar_season)
+    price[oversupply] = np.minimum(price[oversupply], rng.normal(-2.0, 4.0, oversupply.sum()))
+    return np.clip(price, -500.0, 3000.0)
+
+
+def synthetic_prices(start: str = "2016-01-01", end: str = "2025-12-31",
+                     resolution: str = "mixed", zones: Optional[Sequence[str]] = None,
+                     seed: int = 0, switch_date: str = QUARTER_HOUR_SWITCH) -> pd.DataFrame:
+    """Synthetic day-ahead prices for ``start``..``end`` (inclusive days).
+
+    ``resolution`` is ``"60min"``, ``"15min"`` or ``"mixed"``. Without
+    ``zones`` the frame has a single ``price`` column; with ``zones`` (e.g.
+    ``("ES", "PT")``) it has one column per zone, coupled except for
+    occasional splits, plus ``spread`` (first zone minus second).
+    """
+    index = synthetic_index(start, end, resolution, switch_date)
+    rng = np.random.default_rng(seed)
+    base = _base_shape(index, rng)
+    if not zones:
+        df = pd.DataFrame({"price": np.round(base, 2)}, index=index)
+    else:
+        columns = {}
+        for i, zone in enumerate(zones):
+            values = base.copy()
+            if i:
+                # Market splitting: a few percent of samples decouple.
+                split = rng.random(len(index)) < 0.04
+                values[split] += rng.normal(0.0, 15.0, split.sum())
+            columns[zone] = np.round(values, 2)
+        df = pd.DataFrame(columns, index=index)
+        if len(zones) >= 2:
+            df["spread"] = df[zones[0]] - df[zones[1]]
+    df.index.name = "datetime"
+    df.attrs["source"] = "synthetic"
+    return df
+
+
+def synthetic_omie_rows(start: str = "2016-01-01", end: str = "2025-12-31",
+                        seed: int = 0, concept: str = "PRICE_SP") -> pd.DataFrame:
+    """Rows shaped like ``OMIEMarginalPriceFileImporter.read_to_dataframe``.
+
+    One row per day with ``DATE``, ``CONCEPT`` and ``H1``..``H25``: hour
+    ``h`` is the ``h``-th hour of the local day, 23-hour days have NaN in
+    ``H24``/``H25`` and only 25-hour days fill ``H25``.
+    """
+    df = synthetic_prices(start, end, resolution="60min", seed=seed)
+    index = df.index
+    day = index.normalize()
+    # Position within each local day: repeated 02:00 on the autumn day counts twice.
+    slot = pd.Series(np.arange(len(index))).groupby(day.to_numpy()).cumcount().to_numpy()
+    days = day.unique()
+    table = np.full((len(days), 25), np.nan)
+    table[days.get_indexer(day), slot] = df["price"].to_numpy()
+    rows = pd.DataFrame(table, columns=[f"H{h}" for h in range(1, 26)])
+    rows.insert(0, "CONCEPT", concept)
+    rows.insert(0, "DATE", days.date)
+    return rows
@@ -3,6 +3,8 @@ import os
 import pandas as pd
 from datetime import date
 
+from perf import timed
+
 _TARIFAS_CACHE = None
 
 # Display order for bands in the results table
@@ -136,6 +138,7 @@ def _resolve_band(hour_map, day_type, season):
     return None
 
 
+@timed()
 def assign_bands(price_df, tipo_ciclo):
     """
     Return a copy of price_df with an extra 'banda' column based on tipo_ciclo.
@@ -161,6 +164,7 @@ def assign_bands(price_df, tipo_ciclo):
     return df
 
 
+@timed()
 def compute_band_averages(price_df, tipo_ciclo):
     """
     Return a DataFrame: columns ['Period', 'Average Price (€/MWh)'] with average
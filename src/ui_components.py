@@ -1,6 +1,12 @@
+import json
+import os
+
+import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
 from config import get_button_styles
+from data_loader import MULTI_ZONE
+from perf import get_collector
 
 def render_header():
     """Render the main header"""
@@ -124,9 +130,10 @@ def render_country_selection():
     """Render country selection"""
     return st.selectbox(
         "Select Country",
-        ["Spain", "Portugal"],
+        ["Spain", "Portugal", MULTI_ZONE],
         key="global_country_selection",
-        help="Choose which country's electricity prices to analyze in both tabs"
+        help="Choose which country's electricity prices to analyze in both tabs. "
+             f"'{MULTI_ZONE}' loads both zones together and compares them."
     )
 
 def render_load_data_button(start_date, end_date, country):
@@ -192,9 +199,10 @@ def render_analysis_type_selection():
     """Render analysis type selection"""
     return st.radio(
         "Select Analysis Type:",
-        ["1 Cycle", "2 Cycles"],
+        ["1 Cycle", "2 Cycles", "Revenue Stacking"],
         horizontal=True,
-        help="1 Cycle: Single charge-discharge per day. 2 Cycles: Two charge-discharge cycles per day with time constraints."
+        help="1 Cycle: Single charge-discharge per day. 2 Cycles: Two charge-discharge cycles per day with time constraints. "
+             "Revenue Stacking: hourly co-optimisation of spot arbitrage with aFRR/mFRR capacity (REN prices)."
     )
 
 def render_summary_statistics_table(daily_stats):
@@ -275,4 +283,52 @@ def render_best_worst_days(daily_stats):
                 <div style="color: #ccc; font-size: 1rem; font-weight: bold;">{worst_day_benefit:.2f} €</div>
                 <div style="color: #EF9A9A; font-size: 0.8rem;">{worst_day_date}</div>
             </div>
-            """, unsafe_allow_html=True)
\ No newline at end of file
+            """, unsafe_allow_html=True)
+
+def _perf_panel_enabled():
+    """Developer panel is opt-in: ``?perf=1`` in the URL or ``PERF_PANEL=1``."""
+    return os.environ.get("PERF_PANEL") == "1" or st.query_params.get("perf") == "1"
+
+def render_perf_panel(trace):
+    """Render the span tree of this rerun plus recent rerun totals (developer panel)"""
+    if trace is None or not _perf_panel_enabled():
+        return
+
+    rows = []
+    def walk(nodes, depth):
+        for node in nodes:
+            span = node["span"]
+            info = ", ".join(f"{k}={v}" for k, v in span["attrs"].items())
+            if span.get("error"):
+                info = f"{info}, raised {span['error']}" if info else f"raised {span['error']}"
+            rows.append({
+                "Stage": "\u2003" * depth + span["name"],
+                "ms": span["duration_ms"] or 0.0,
+                "Start (ms)": span["offset_ms"],
+                "Thread": span["thread"],
+                "Info": info,
+            })
+            walk(node["children"], depth + 1)
+    walk(trace.tree(), 0)
+
+    total = trace.duration_ms or 0.0
+    with st.expander(f"⏱️ Performance: {total:.0f} ms this rerun", expanded=False):
+        st.dataframe(
+            pd.DataFrame(rows),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "ms": st.column_config.ProgressColumn("ms", format="%.1f", min_value=0.0, max_value=max(total, 1.0)),
+            },
+        )
+        recent = get_collector().recent(trace.name, limit=20)
+        if len(recent) > 1:
+            st.caption("Recent reruns of this process (all sessions), oldest to newest")
+            st.bar_chart(pd.Series([t.duration_ms for t in reversed(recent)], name="ms"), height=120)
+        st.download_button(
+            "Download trace (JSON)",
+            data=json.dumps(trace.to_dict(), indent=2, default=str),
+            file_name=f"perf_trace_{trace.id}.json",
+            mime="application/json",
+            key="perf_trace_download",
+        )